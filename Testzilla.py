@@ -4,6 +4,8 @@
 import pandas as pd
 import numpy as np
 import time
+import argparse
+import socket
 import threading
 from datetime import date, datetime, timedelta
 from PySide6.QtWidgets import *
@@ -15,14 +17,31 @@ import core.file_utils as fu
 import core.sys_utils as sus
 import core.niDAQFuncs as ni 
 import core.modbusFuncs as mb
+import core.alarms as al
+import core.detectors as dt
+import core.cumulative as cm
+import core.groups as gr
+import core.replay as rp
+import core.journal as jr
+import core.server as sv
+import core.collector as co
+import core.metrics as mt
+import core.profiler as pf
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#                                   Metrics
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+NI_READ_SECONDS = mt.histogram("ni_read_seconds", "Time to read every NI module (including the thermocouple buffer)",
+                               buckets=mt.SLOW_BUCKETS)
+NI_READ_ERRORS = mt.counter("ni_read_errors_total", "NI reads that failed and stopped the NI stream")
 #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 #                           Classes & Functions
 #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 # Class for handling timing events
 class TestTime:
 
-    def __init__(self, timing_interval=1):
-        self.initial_clock_time = time.monotonic()
+    def __init__(self, timing_interval=1, clock=time.monotonic):
+        self.clock = clock # time source (replaced by the recorded time during replay)
+        self.initial_clock_time = self.clock()
         self.clock_time = 0
         self.test_time = 0
         self.test_time_min = 0
@@ -31,7 +50,7 @@ class TestTime:
         self.time_to_write = False
 
     def update_time(self):
-        self.clock_time = time.monotonic() - self.initial_clock_time
+        self.clock_time = self.clock() - self.initial_clock_time
         self.test_time = int(self.clock_time)
         if self.test_time % self.timing_interval == 0:
             self.time_to_write = True
@@ -40,7 +59,7 @@ class TestTime:
             self.time_to_write = False
 
     def reset(self):
-        self.initial_clock_time = time.monotonic()
+        self.initial_clock_time = self.clock()
         self.clock_time = 0
         self.test_time = 0
         self.test_time_min = 0
@@ -62,10 +81,20 @@ class Data:
         self.pcfs = [1,0.0125, 1, 1] # pcfs = pulse conversion factors
         self.pulse_data = [0, 0, 0, 0]
         self.pulse_reset = [0, 0, 0, 0]
-        self.current_index = 0
+        self.current_index = 0 # samples since start/reset (data_log is trimmed, the index is not)
+        self.cumulative = cm.CumulativeIndex() # O(1) range queries over the whole test
+        self.alarms = al.AlarmEngine(n_channels=max(self.tc_modules, 1)*16)
+        self.steady = dt.SteadyStateDetector(n_channels=max(self.tc_modules, 1)*16)
+        self.groups = gr.ChannelGroups(n_channels=max(self.tc_modules, 1)*16)
+        self.group_rows = [] # group log rows waiting to be written
+        self.group_headers = None # group log header the pending rows belong to
+        self.groups_written = time.monotonic() # last write of the group log
+        self.procedure = None # active fry/burger test procedure
+        self.journal = None # write-ahead session journal (None when replaying)
 
     def update_ni_data(self):
-        self.ni_data = self.ni_daq.read_all_tz()
+        with NI_READ_SECONDS.time():
+            self.ni_data = self.ni_daq.read_all_tz()
 
     def read_ni_data(self):
         return self.ni_data
@@ -80,6 +109,7 @@ class Data:
                     self.stream = False
                     self.ni_data = [0]*22
             except Exception as e:
+                NI_READ_ERRORS.inc()
                 print("The connection with the ni DAQ was lost.")
                 self.stream = False
 
@@ -104,10 +134,102 @@ class Data:
             average_data = pd.DataFrame(self.data_log[-test_time.timing_interval:].copy()).drop(columns=[0,1,4,5,6,7,8]).mean()
             _write = [*average_data[0:2], *self.data_log[-1][4:9], *average_data[2:]]
             self.data_to_write = time_data.copy() + [None if np.isnan(item) else round(item,2) for item in _write]
+        self.cumulative.append(self.data_log[-1])
+        self.current_index = len(self.cumulative)
         # Limit memory storage for data log to 6 hours
-        self.current_index = len(self.data_log)
         if len(self.data_log) > 21600: 
             self.data_log.pop(0)
+
+    def journal_event(self, event, *args):
+        # Forward a control event (start, reset, headers, ...) to the journal
+        if self.journal is not None:
+            getattr(self.journal, event)(*args)
+
+    def journal_sample(self):
+        # Append the latest sample; compact once the journal holds 2x the log
+        if self.journal is not None:
+            self.journal.sample(self.data_log[-1], self.current_index - 1)
+            if self.journal.samples > 2*jr.MAX_LOG:
+                self.journal.compact(self.data_log, self.current_index)
+
+    def restore(self, state, test_time):
+        # Rebuild the session from a recovered journal
+        self.data_log = state.rows
+        # Only the recovered rows can be indexed again; they keep their
+        # sample indices and earlier samples are reported as unavailable
+        self.cumulative.reset(state.first_index)
+        self.cumulative.extend(self.data_log)
+        self.current_index = len(self.cumulative)
+        self.pcfs = state.pcfs
+        self.pulse_reset = state.pulse_reset
+        # NI counters restart at zero with the new tasks, so offset the reset
+        # by the last recorded totals to keep the totals continuous
+        if self.data_log:
+            self.pulse_reset = [-total/pcf if total is not None and pcf else 0
+                                for total, pcf in zip(self.data_log[-1][5:9], self.pcfs)]
+        test_time.testing = state.testing
+        test_time.initial_clock_time = test_time.clock() - state.elapsed()
+        # Group log rows that were journaled but not yet written
+        for headers, row in state.group_rows:
+            fu.write_groups(headers, [row])
+        state.group_rows = []
+
+    def check_alarms(self, test_time):
+        # Evaluate alarm rules on the latest sample and log any state changes
+        events = self.alarms.update(self.data_log[-1], test_time)
+        if events:
+            fu.write_alarms(events, self.data_log[-1][:2])
+            for name, rule, state, value in events:
+                status.append(f"ALARM {state}: {name} {rule} ({value})")
+
+    def update_groups(self, test_time):
+        # Group statistics and alarms for the latest sample; log rows are
+        # journaled and written every gr.LOG_SECONDS
+        if not self.groups.names:
+            return
+        self.groups.update(self.data_log[-1])
+        events = self.groups.evaluate_alarms(test_time.clock_time)
+        if events:
+            fu.write_alarms(events, self.data_log[-1][:2])
+            for name, rule, state, value in events:
+                status.append(f"ALARM {state}: {name} {rule} ({value})")
+        if test_time.testing and test_time.time_to_write:
+            headers = self.groups.headers()
+            if headers != self.group_headers:
+                self.flush_groups()
+                self.group_headers = headers
+            self.group_rows.append(self.data_log[-1][:2] + self.groups.row())
+            self.journal_event("group_row", headers, self.group_rows[-1])
+        if time.monotonic() - self.groups_written >= gr.LOG_SECONDS:
+            self.flush_groups()
+
+    def flush_groups(self):
+        # Write pending group log rows (on stop, at shutdown, every
+        # gr.LOG_SECONDS and whenever the groups change)
+        if self.group_rows:
+            fu.write_groups(self.group_headers, self.group_rows)
+            self.group_rows = []
+            self.journal_event("groups_written")
+        self.groups_written = time.monotonic()
+
+    def update_procedure(self):
+        # Advance the active test procedure and log any phase changes
+        if self.procedure is None:
+            return
+        events = self.procedure.update(self)
+        if events:
+            fu.write_procedure(events, self.data_log[-1][:2])
+            for event, message in events:
+                status.append(message)
+
+    def reset_procedure(self):
+        # Start/Reset: loads in progress refer to the cleared log and totals
+        if self.procedure is None:
+            return
+        self.procedure.reset()
+        message = f"{self.procedure.name} restarted with the test"
+        fu.write_procedure([("reset", message)], [datetime.now().strftime("%H:%M:%S"), 0.0])
+        status.append(message)
         
     def modbus_thread(self, device):
         # Initialize modbus client connection and start reading modbus data
@@ -126,30 +248,56 @@ class Data:
 #                            Startup Application
 #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Testzilla")
+    parser.add_argument("--replay", metavar="CSV", help="replay a recorded test file instead of reading the DAQ")
+    parser.add_argument("--speed", type=float, default=1.0, help="replay speed multiplier (0 = as fast as possible)")
+    parser.add_argument("--columnar", action="store_true", help="also store test data in the columnar binary format")
+    parser.add_argument("--segment-hours", type=float, default=0, help="start a new compressed segment every N hours")
+    parser.add_argument("--segment-mb", type=float, default=0, help="start a new compressed segment every N MB")
+    parser.add_argument("--serve", metavar="HOST:PORT", nargs="?", const=f"{sv.DEFAULT_HOST}:{sv.DEFAULT_PORT}",
+                        help="stream live data over HTTP/WebSocket (0.0.0.0:PORT to serve the lab network)")
+    parser.add_argument("--collector", metavar="HOST:PORT", help="also send the recorded rows to a collector (core/collector.py)")
+    parser.add_argument("--metrics", metavar="HOST:PORT", nargs="?", const=f"{mt.DEFAULT_HOST}:{mt.DEFAULT_PORT}",
+                        help="export acquisition health metrics for Prometheus at http://HOST:PORT/metrics")
+    parser.add_argument("--profile", action="store_true", help="start with per-stage timing shown in the status bar")
+    parser.add_argument("--station", default=socket.gethostname(), help="station name used by --serve and --collector")
+    args = parser.parse_args()
     # system status record
     status = []
+    server = None # live data server (--serve)
+    link = None # collector link (--collector)
+    metrics = None # metrics endpoint (--metrics)
 #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 #                            Initialize DAQ(s)
 #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
-    # Initializes Data object and begin ni DAQ processes
-    ni_daq = ni.NI()
-    ni_daq.setup_testzilla()
-    data = Data(ni_daq)
-    # Initialize modbus client connection and start reading modbus data
-    data.modbus_thread(device="Shark200")
+    if args.replay:
+        # Replay a recorded test through the same pipeline
+        ni_daq = rp.ReplayDAQ(args.replay, speed=args.speed)
+        data = Data(ni_daq)
+        status.append(f"Replaying: {args.replay} at {args.speed or 'max'}x")
+    else:
+        # Initializes Data object and begin ni DAQ processes
+        ni_daq = ni.NI()
+        ni_daq.setup_testzilla()
+        data = Data(ni_daq)
+        # Initialize modbus client connection and start reading modbus data
+        data.modbus_thread(device="Shark200")
  #~~~~~~~ USE THIS SECTION TO THREAD NI DATA PROCESS ~~~~~~~~~~~~~~~~~~~~~~~~~~
-    data.stream = True
-    try:
-        thread = threading.Thread(target=data.ni_stream, args=(), daemon=True)
-        thread.start()
-    except Exception as e:
-        print("Unable to connect to ni DAQ.")
+        data.stream = True
+        try:
+            thread = threading.Thread(target=data.ni_stream, args=(), daemon=True)
+            thread.start()
+        except Exception as e:
+            print("Unable to connect to ni DAQ.")
 #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 #                Initialize Application and Start Event Loop
 #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
     try:
         sus.prevent_sleep() # Keep system awake while application is running
-        test_time = TestTime(1) # Initialize timing object with 1 second timing_interval
+        if args.replay:
+            test_time = TestTime(ni_daq.interval, clock=ni_daq.clock) # follow the recorded test time
+        else:
+            test_time = TestTime(1) # Initialize timing object with 1 second timing_interval
         # Create a QTimer for event loop
         timer = QTimer() 
         timer.setTimerType(Qt.PreciseTimer)
@@ -161,27 +309,115 @@ if __name__ == "__main__":
         mw.show()
         # Create Data directory if it does not exist
         fu.create_directory()
-        # Create new CSV Test File
-        fu.file_setup(test_time.testing, ni_daq.tc_modules)
-        status.append("Adding new file: {}".format(fu.file_name))
+        fu.columnar = args.columnar
+        fu.segment_hours, fu.segment_mb = args.segment_hours, args.segment_mb
+        journal_path = fu.current_directory + "/Data/" + jr.JOURNAL_FILE
+        recovered = None if args.replay else jr.recover(journal_path)
+        if recovered is not None and recovered.file_name is not None:
+            # Continue the session that was interrupted
+            start = time.perf_counter()
+            fu.resume_file(recovered.file_name)
+            data.restore(recovered, test_time)
+            data.journal = jr.Journal(journal_path, state=recovered)
+            data.journal.pulse_reset(data.pulse_reset, data.pcfs)
+            data.journal.compact(data.data_log, data.current_index)
+            mw.resume_test(recovered)
+            status.append("Recovered session: {} ({} rows in {:.2f}s)".format(
+                fu.file_name, len(data.data_log), time.perf_counter() - start))
+        else:
+            # Create new CSV Test File
+            fu.file_setup(test_time.testing, ni_daq.tc_modules)
+            status.append("Adding new file: {}".format(fu.file_name))
+            if not args.replay:
+                data.journal = jr.Journal(journal_path)
+                data.journal.new_file(fu.file_name)
     #~~~~~~ Timing Sequence ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
-        timer.start(1000)
+        if args.replay:
+            timer.start(ni_daq.timer_interval())
+        else:
+            timer.start(1000)
+        # First slots: tick interval and jitter, start of the profiled tick
+        ticks = mt.TickMonitor(timer.interval()/1000)
+        timer.timeout.connect(ticks.tick)
+        profiler = pf.TickProfiler(ticks, enabled=args.profile)
+        stage = profiler.wrap # every slot below is timed while stage timing is on
+        timer.timeout.connect(profiler.begin)
+        if args.replay:
+            timer.timeout.connect(stage("replay step", lambda: ni_daq.step(data)))
+        else:
+            data.update_ni_data = stage("ni read", data.update_ni_data) # runs on the NI stream thread
         # timer event executions
-        timer.timeout.connect(test_time.update_time)
+        timer.timeout.connect(stage("test time", test_time.update_time))
         # timer.timeout.connect(data.update_ni_data)
-        timer.timeout.connect(lambda: data.get_data(test_time))
-        timer.timeout.connect(lambda: mw.update_plot(data.data_log))
-        timer.timeout.connect(lambda: mw.data_window.update_data(data, test_time))
-        timer.timeout.connect(lambda: mw.update_values(data, test_time))
-        timer.timeout.connect(lambda: mw.update_system_status(status[-1]))
-        timer.timeout.connect(lambda: fu.write_data(data.data_to_write, test_time.testing, test_time.time_to_write))
-        timer.timeout.connect(mw.data_window.retrieve_model_data)
+        timer.timeout.connect(stage("get_data", lambda: data.get_data(test_time)))
+        timer.timeout.connect(stage("plot feed", lambda: mw.chart.feed(data.data_log, data.current_index)))
+        timer.timeout.connect(stage("journal", data.journal_sample))
+        timer.timeout.connect(stage("alarms", lambda: data.check_alarms(test_time)))
+        timer.timeout.connect(stage("groups", lambda: data.update_groups(test_time)))
+        timer.timeout.connect(stage("steady state", lambda: data.steady.update(data, test_time)))
+        timer.timeout.connect(stage("procedure", data.update_procedure))
+        timer.timeout.connect(stage("write", lambda: fu.write_data(data.data_to_write, test_time.testing, test_time.time_to_write)))
+        # UI consumers refresh at their own rates (and not while hidden); only
+        # drawing is throttled, the chart history is fed above on every tick
+        refresh = UI.RefreshScheduler()
+        refresh.add("plot", stage("ui plot", mw.update_plot), UI.REFRESH_MS["plot"], mw.canvas)
+        refresh.add("data", stage("ui tables", lambda: mw.data_window.update_data(data, test_time)), UI.REFRESH_MS["data"], mw.data_window)
+        refresh.add("values", stage("ui values", lambda: mw.update_values(data, test_time)), UI.REFRESH_MS["values"], mw)
+        refresh.add("status", stage("ui status", lambda: mw.update_system_status(status[-1])), UI.REFRESH_MS["status"], mw)
+        refresh.add("alarms", stage("ui alarms", lambda: mw.update_alarms(data.alarms, data.groups.alarms)), UI.REFRESH_MS["alarms"], mw)
+        refresh.add("profile", mw.update_profile, UI.REFRESH_MS["profile"], mw.profile_label)
+        mw.set_profiler(profiler)
+        timer.timeout.connect(stage("refresh notify", refresh.notify))
+        # Live data server: publish() only hands the sample to the server thread
+        if args.serve:
+            server = sv.LiveServer(*sv.parse_address(args.serve), station=args.station)
+            server.set_headers(mw.data_window.retrieve_model_data())
+            mw.data_window.headers_changed.connect(server.set_headers)
+            if server.start():
+                status.append(f"Live server: http://{server.host}:{server.port}")
+                timer.timeout.connect(stage("publish", lambda: server.publish(
+                    data.data_log[-1], file_name=fu.file_name, testing=test_time.testing,
+                    alarms=data.alarms.summary(data.groups.alarms))))
+        # Collector link: rows written to the CSV are also queued for the collector
+        if args.collector:
+            link = co.NodeLink(*sv.parse_address(args.collector, sv.DEFAULT_HOST, co.DEFAULT_PORT), args.station,
+                               mw.data_window.retrieve_model_data(), fu.file_name.split("_")[0])
+            mw.data_window.headers_changed.connect(link.set_headers)
+            link.start()
+            status.append(f"Sending data to collector {args.collector} as {args.station}")
+            timer.timeout.connect(stage("collector", lambda: test_time.testing and test_time.time_to_write and link.add(data.data_to_write)))
+        # Metrics endpoint: queue depths are read when it is scraped
+        mt.gauge("csv_queue_rows", "Rows waiting for the CSV writer thread",
+                 function=lambda: 0 if fu.writer is None else fu.writer.queue.qsize() + len(fu.writer.pending))
+        mt.gauge("data_log_rows", "Samples held in memory", function=lambda: len(data.data_log))
+        mt.gauge("group_log_rows", "Group log rows waiting to be written", function=lambda: len(data.group_rows))
+        mt.gauge("modbus_connected", "1 while the meter answers", function=lambda: int(data.mb_connected))
+        mt.gauge("ni_stream_running", "1 while the NI stream thread reads", function=lambda: int(data.stream))
+        if link is not None:
+            mt.gauge("collector_pending_rows", "Rows not yet stored by the collector", function=lambda: len(link.pending))
+            mt.gauge("collector_dropped_rows", "Rows dropped from a full collector buffer", function=lambda: link.dropped)
+        if server is not None:
+            mt.gauge("live_clients", "Connected live data clients", function=lambda: len(server.clients))
+        if args.metrics:
+            metrics = mt.MetricsServer(*sv.parse_address(args.metrics, mt.DEFAULT_HOST, mt.DEFAULT_PORT))
+            if metrics.start():
+                status.append(f"Metrics: http://{metrics.host}:{metrics.port}/metrics")
+        if args.replay:
+            timer.timeout.connect(lambda: ni_daq.finished and timer.stop())
+        # Last slot: end of the profiled tick
+        timer.timeout.connect(profiler.end)
 
         app.exec()
     except Exception as e:
         print(e)
 
     finally:
+        if server is not None: server.stop()
+        if link is not None: link.stop()
+        if metrics is not None: metrics.stop()
+        data.flush_groups()
+        if data.journal is not None: data.journal.close()
+        fu.close_writer()
         data.ni_daq.close_daq()
         sus.allow_sleep()
 
@@ -21,11 +21,18 @@ from PySide6.QtGui import *
 import pandas as pd
 import numpy as np
 import os
+import time
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 
+import core.alarms as al
 import core.file_utils as fu
 import core.modbusFuncs as mb 
+import core.procedures as pr
+import core.plotting as pl
+import core.reader as rd
+import core.groups as gr
+import core.profiler as pf
 #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 #                                Constants
 #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
@@ -42,6 +49,16 @@ ERROR_FONT = "#b8494d"
 GRID_COLOR = "#03fcd3"
 BORDER_COLOR = "#ffffff"
 IMAGE_FONT = "nasa"
+# Minimum time between refreshes of each UI consumer (ms)
+REFRESH_MS = {"plot": 1000, "data": 1000, "values": 500, "status": 1000, "alarms": 1000, "profile": 1000}
+REFRESH_BUDGET_MS = 100 # UI work per pass before yielding back to acquisition
+# Graph 2 channels: (menu name, data_log column or ("rate", cumulative column), y axis)
+GRAPH2_CHANNELS = [("Watts", 3, "W"), ("Voltage", 2, "V"),
+                   ("Wh.208 Rate", ("rate", 4), "W"), ("Wh.120 Rate", ("rate", 5), "W"),
+                   ("Gas Rate", ("rate", 6), "Rate (/h)"), ("Water Rate", ("rate", 7), "Rate (/h)"),
+                   ("Extra Rate", ("rate", 8), "Rate (/h)")]
+VIEWER_DETAIL_ROWS = 20000 # test viewer reads every row of views up to this size
+VIEWER_SAMPLES = 2 # rows sampled per pixel for longer views
 #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 #                           Classes & Functions
 #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
@@ -50,6 +67,117 @@ def spacer_():
     spacer_item = QSpacerItem(10, 10, QSizePolicy.Expanding, QSizePolicy.Fixed)
     return spacer_item
 
+# Format a plot (applied on full redraws only); lines from every axis share
+# the legend and secondary axes (twins) get matching ticks
+def style_plot(ax, lines=None, twins=()):
+    ax.legend(handles=lines, loc='lower right', frameon=False, ncol=3, labelcolor=FONT_COLOR1)
+    ax.set_facecolor(TRI_COLOR)
+    ax.tick_params(labelbottom=True, labelcolor=FONT_COLOR1, color="#ffffff", labelsize=11)
+    ax.minorticks_on()
+    #ax.spines[:].set_visible(False)#set_color("#ffffff")
+    ax.spines[:].set_color("#2b2b2a")
+    ax.spines[:].set_linewidth(0.25)
+    ax.grid(which='major', linewidth=0.3, color=GRID_COLOR) 
+    ax.grid(which='minor', linewidth=0.1, color=GRID_COLOR)
+    for twin in twins:
+        twin.tick_params(labelcolor=FONT_COLOR1, color="#ffffff", labelsize=11)
+        twin.yaxis.label.set_color(FONT_COLOR1)
+        twin.spines[:].set_visible(False)
+
+# Restyling a widget is expensive, so only apply a changed stylesheet
+def set_style(widget, style):
+    if widget.styleSheet() != style:
+        widget.setStyleSheet(style)
+
+# Parse a channel list such as "1-4, 7" into [1, 2, 3, 4, 7]
+def parse_channels(text):
+    channels = []
+    for part in text.replace(" ", "").split(","):
+        if "-" in part:
+            first, last = part.split("-")
+            channels.extend(range(int(first), int(last)+1))
+        elif part:
+            channels.append(int(part))
+    if not channels:
+        raise ValueError("no channels selected")
+    return channels
+
+class RefreshScheduler(QObject):
+    """
+    Runs the UI consumers (plot, tables, labels) apart from acquisition. The
+    acquisition timer only calls notify(); each consumer then runs at most
+    once per its own interval, however many samples arrived in between, and
+    is skipped while its widget is hidden or minimized (it catches up when
+    shown). A pass stops after REFRESH_BUDGET_MS and resumes on the next
+    event loop turn, so queued acquisition ticks are never held up by UI work.
+    """
+
+    def __init__(self, budget_ms=REFRESH_BUDGET_MS):
+        super().__init__()
+        self.budget = budget_ms/1000
+        self.consumers = {}
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.run)
+
+    def add(self, name, callback, interval_ms, widget=None):
+        self.consumers[name] = {"callback": callback, "interval": interval_ms/1000, "widget": widget,
+                                "dirty": False, "last": 0.0, "runs": 0, "skipped": 0, "time": 0.0}
+        if widget is not None:
+            widget.installEventFilter(self)
+            widget.window().installEventFilter(self) # minimize/restore go to the window
+
+    def set_interval(self, name, interval_ms):
+        self.consumers[name]["interval"] = interval_ms/1000
+
+    def notify(self):
+        # New data is available; consumers coalesce it into their next refresh
+        for consumer in self.consumers.values():
+            if consumer["dirty"]:
+                consumer["skipped"] += 1
+            consumer["dirty"] = True
+        self._schedule(0)
+
+    def _schedule(self, delay):
+        delay_ms = max(int(delay*1000), 0)
+        if not self.timer.isActive() or self.timer.remainingTime() > delay_ms:
+            self.timer.start(delay_ms)
+
+    def visible(self, widget):
+        return widget is None or (widget.isVisible() and not widget.window().isMinimized())
+
+    def run(self):
+        start = time.perf_counter()
+        next_due = None
+        # Longest-waiting consumers first so none starves when over budget
+        for name, consumer in sorted(self.consumers.items(), key=lambda item: item[1]["last"]):
+            if not consumer["dirty"] or not self.visible(consumer["widget"]):
+                continue
+            now = time.perf_counter()
+            due = consumer["last"] + consumer["interval"]
+            if now - start > self.budget:
+                next_due = now
+                break
+            if due > now:
+                next_due = due if next_due is None else min(next_due, due)
+                continue
+            try:
+                consumer["callback"]()
+            except Exception as e:
+                print(f"Unable to refresh {name}: {e}")
+            consumer["dirty"] = False
+            consumer["runs"] += 1
+            consumer["last"] = time.perf_counter()
+            consumer["time"] += consumer["last"] - now
+        if next_due is not None:
+            self._schedule(next_due - time.perf_counter())
+
+    def eventFilter(self, watched, event):
+        # Catch up as soon as a hidden/minimized widget is shown again
+        if event.type() in (QEvent.Show, QEvent.WindowStateChange):
+            self._schedule(0)
+        return False
+
 class MainWindow(QMainWindow):
 
     def __init__(self, data, ni_daq, test_time, status, timer):
@@ -62,7 +190,9 @@ class MainWindow(QMainWindow):
         self.tc_modules = ni_daq.tc_modules
         # Initialize other window classes and variables
         self.start_time = QTime.currentTime()
-        self.data_window = DataWindow()
+        self.data_window = DataWindow(self.data.cumulative, self.data.groups)
+        self.data_window.headers_changed.connect(self.rename_headers)
+        self.data_window.groups_changed.connect(self.update_group_menu)
      #~~~~~~~ MAIN WINDOW ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
         # Create the main window for the application
         self.setWindowTitle("Testzilla")
@@ -135,13 +265,17 @@ class MainWindow(QMainWindow):
         self.canvas = FigureCanvas(fig)
         self.ax = fig.add_subplot(111)
         self.ax.set_facecolor(PRIMARY_COLOR)
+        self.chart = pl.StripChart(self.canvas, self.ax, style=style_plot)
      #~~~~~~ GRAPH WINDOW ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
         self.graph_window = None
         self.graph_range = None
+        self.test_viewer = None
      #~~~~~~ CONFIG WINDOW ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
         self.config_window = None
         self.configs_window = None
         self.configs = None
+     #~~~~~~ PROCEDURE WINDOW ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+        self.procedure_window = None
      #~~~~~~~~ PUSH BUTTONS ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
         # Set push button styles
         button_style1 = f"""QPushButton {{background-color: {BUTTON_COLOR}; 
@@ -205,12 +339,20 @@ class MainWindow(QMainWindow):
         file_menu.addAction(new_test_action)
         # Add an action for copying test file
         copy_file_action = QAction("Create File Copy", self)
-        copy_file_action.triggered.connect(fu.copy_file)
+        copy_file_action.triggered.connect(lambda: fu.copy_file(self.status.append))
         file_menu.addAction(copy_file_action)
          # Add an action for emergency data dump
         data_dump_action = QAction("Data Dump", self)
-        data_dump_action.triggered.connect(lambda: fu.data_dump(data.data_log, self.test_time.testing))
+        data_dump_action.triggered.connect(lambda: fu.data_dump(data.data_log, self.test_time.testing, self.status.append))
         file_menu.addAction(data_dump_action)
+        # Add an action for searching past tests
+        catalog_action = QAction("Test Catalog", self)
+        catalog_action.triggered.connect(self.catalog_window)
+        file_menu.addAction(catalog_action)
+        # Add an action for viewing finished tests
+        viewer_action = QAction("Test Viewer", self)
+        viewer_action.triggered.connect(lambda: self.viewer_window())
+        file_menu.addAction(viewer_action)
        # Add a Setup menu
         setup_menu = self.menubar.addMenu("Setup")
         # Add an action for Fry Test
@@ -255,15 +397,22 @@ class MainWindow(QMainWindow):
         set_graph_action = QAction("Set Graph Range", self)
         set_graph_action.triggered.connect(self.set_graph_window)
         self.graph_menu.addAction(set_graph_action)
-        # Add Graph menu for other channels
-        # self.graph_menu2 = QMenu("Graph 2", self.menubar)
-        # graph_action1 = QAction("mb.Watts", self.graph_menu2, checkable=True)
-        # graph_action2 = QAction("mb.Voltage", self.graph_menu2, checkable=True)
-        # self.graph_items = [graph_action1, graph_action2]
-        # for item in self.graph_items: 
-        #     self.graph_menu2.addAction(item)
-        # self.menubar.addMenu(self.graph_menu2)
-        # self.graph_menu2.triggered.connect(self.show_graph2_window)
+        # Whole test (decimated) instead of the last hour; wheel zooms, drag pans
+        self.history_action = QAction("Show Full Test", self.graph_menu, checkable=True)
+        self.graph_menu.addAction(self.history_action)
+        # Add Graph menu for other channels (plotted on right-hand axes)
+        self.graph_menu2 = QMenu("Graph 2", self.menubar)
+        self.graph_items = [QAction(name, self.graph_menu2, checkable=True) for name, _, _ in GRAPH2_CHANNELS]
+        for item in self.graph_items: 
+            self.graph_menu2.addAction(item)
+        self.menubar.addMenu(self.graph_menu2)
+        self.graph_menu2.triggered.connect(self.show_graph2_window)
+        # Add Groups menu (mean on the temperature axis, spread on its own axis)
+        self.group_menu = QMenu("Groups", self.menubar)
+        self.group_items = []
+        self.menubar.addMenu(self.group_menu)
+        self.group_menu.triggered.connect(self.show_group_window)
+        self.update_group_menu()
         # Add a Configuration menu
         config_menu = self.menubar.addMenu("Config")
         setup_config_action = QAction("Setup Config", self)
@@ -285,6 +434,20 @@ class MainWindow(QMainWindow):
         self.test_file_label = QLabel("")
         self.test_file_label.setStyleSheet("color: #ffffff;")
         self.status_bar.addPermanentWidget(self.test_file_label)
+        # Add a label to the status bar for the active test procedure
+        self.procedure_label = QLabel("")
+        self.procedure_label.setStyleSheet("color: #ffffff;")
+        self.status_bar.addPermanentWidget(self.procedure_label)
+        # Add a label to the status bar for the per-tick profile (Profiler menu)
+        self.profile_label = QLabel("")
+        self.profile_label.setStyleSheet("color: #ffffff;")
+        self.profile_label.hide()
+        self.status_bar.addPermanentWidget(self.profile_label)
+        self.profiler = None
+        # Add a label to the status bar for active alarms
+        self.alarm_label = QLabel("Alarms: none")
+        self.alarm_label.setStyleSheet("color: #ffffff;")
+        self.status_bar.addPermanentWidget(self.alarm_label)
         # Add a label to the status bar for elapsed time
         self.status_bar_label = QLabel("Elapsed Time: 00:00:00")
         self.status_bar_label.setStyleSheet("color: #ffffff;")
@@ -314,59 +477,105 @@ class MainWindow(QMainWindow):
         elapsed_time = QTime(0, 0, 0).addSecs(time_difference).toString("hh:mm:ss")
         self.status_bar_label.setText("Elapsed Time: {}".format(elapsed_time))
    
+    def update_alarms(self, alarms, *others):
+        # Update status bar w/ active alarms (red while any alarm is latched)
+        self.alarm_label.setText(alarms.summary(*others))
+        color = ERROR_FONT if any(engine.active.any() for engine in (alarms, *others)) else FONT_COLOR1
+        set_style(self.alarm_label, f"color: {color};")
+   
+    #~~~~~~ PER-TICK PROFILER ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    def set_profiler(self, profiler):
+        # Add the Profiler menu for the stages wrapped by `profiler`
+        self.profiler = profiler
+        profiler_menu = self.menubar.addMenu("Profiler")
+        self.profile_action = QAction("Stage Timing", self, checkable=True)
+        self.profile_action.setShortcut("Ctrl+Shift+T")
+        self.profile_action.setChecked(profiler.enabled)
+        self.profile_action.toggled.connect(self.enable_profiler)
+        profiler_menu.addAction(self.profile_action)
+        dump_action = QAction(f"Sample Profile ({pf.SAMPLE_SECONDS:.0f} s)", self)
+        dump_action.setShortcut("Ctrl+Shift+P")
+        dump_action.triggered.connect(self.dump_profile)
+        profiler_menu.addAction(dump_action)
+        self.enable_profiler(profiler.enabled)
+
+    def enable_profiler(self, enabled):
+        self.profiler.set_enabled(enabled)
+        self.profile_label.setVisible(enabled)
+
+    def update_profile(self):
+        # Refresh the status bar readout of stage cost and jitter
+        if self.profiler is not None and self.profiler.enabled:
+            self.profile_label.setText(self.profiler.readout())
+
+    def dump_profile(self):
+        # Sample the UI thread in the background and save the stacks in Data
+        path = pf.profile_path(fu.current_directory + "/Data")
+        header = self.profiler.report() if self.profiler is not None and self.profiler.enabled else ""
+        pf.SamplingProfiler(path, header=header).start()
+        self.status.append(f"Sampling profile for {pf.SAMPLE_SECONDS:.0f} s: {os.path.basename(path)}")
+
     #~~~~~~ UPDATE PLOT FUNCTION ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
-    def update_plot(self, data_log):
-        # Update the plot with new data
-        df = pd.DataFrame(data_log)
-        # Create list of tc channels to graph    
+    def update_plot(self):
+        # Redraw the plot (persistent lines, blitted); rows are fed to the
+        # chart on every acquisition tick, so skipped refreshes lose nothing
+        tc_list = []
         if self.graph_menu is not None:
-            tc_list_ = [tc.text() for tc in self.graph_menu.actions() if tc.isCheckable() and tc.isChecked()]
-            tc_list = [int(name.split()[1]) for name in tc_list_]
-            while len(tc_list) > 11:
-                tc_list.remove(tc_list[-1])
-        # Graph tc channels in list
-        if len(data_log) < 3600 and len(tc_list)>0:
-            self.ax.clear()
-            for item in tc_list:
-                self.ax.plot(df[1], df[item+11], label=str(item), lw=0.75)
-        elif len(data_log) >= 3600 and len(tc_list)>0:
-            self.ax.clear()
-            for item in tc_list:
-                self.ax.plot(df[1][-3600:-1], df[item+11][-3600:-1], label=str(item), lw=0.75)
+            tc_list_ = [tc.text() for tc in self.tc_items if tc.isChecked()]
+            tc_list = [int(name.split()[1]) for name in tc_list_][:11]
         # Graph tc channel 0 if none selected
+        if tc_list:
+            columns, labels = [item+11 for item in tc_list], [str(item) for item in tc_list]
         else:
-            if len(df) < 3600:
-                self.ax.clear()
-                self.ax.plot(df[1], df[11], label="ambient", lw=0.75)
-            else:
-                self.ax.clear()
-                self.ax.plot(df[1][-3600:-1], df[11][-3600:-1], label="ambient", lw=0.75)
-        # Format Plot   
+            columns, labels = [11], ["ambient"]
+        axes = [None]*len(columns)
+        # Electrical channels and pulse rates on their own y axes
+        for item, (name, column, axis) in zip(self.graph_items, GRAPH2_CHANNELS):
+            if item.isChecked():
+                columns.append(column)
+                labels.append(name)
+                axes.append(axis)
+        # Channel group statistics
+        for item in self.group_items:
+            name, stat = item.data()
+            if item.isChecked() and name in self.data.groups.names:
+                columns.append(("group", stat, self.data.groups.columns(name)))
+                labels.append(f"{name} {stat}")
+                axes.append("Spread (F)" if stat == "Spread" else None)
+        ylim = None
         if self.graph_window is not None:
             try:
-                self.ax.set_ylim([self.graph_range[-1][1], self.graph_range[-1][0]])
+                ylim = (self.graph_range[-1][1], self.graph_range[-1][0])
             except Exception as e:
                 pass
-        else: 
-            self.ax.set_ylim([None, None])
-        self.ax.legend(loc='lower right', frameon=False, ncol=3, labelcolor=FONT_COLOR1)
-        self.ax.set_facecolor(TRI_COLOR)
-        self.ax.tick_params(labelbottom=True, labelcolor=FONT_COLOR1, color="#ffffff", labelsize=11)
-        self.ax.minorticks_on()
-        #ax.spines[:].set_visible(False)#set_color("#ffffff")
-        self.ax.spines[:].set_color("#2b2b2a")
-        self.ax.spines[:].set_linewidth(0.25)
-        self.ax.grid(which='major', linewidth=0.3, color=GRID_COLOR) 
-        self.ax.grid(which='minor', linewidth=0.1, color=GRID_COLOR)
-        self.canvas.draw() # update plot
-    
+        self.chart.set_lines(columns, labels, ylim, axes)
+        self.chart.set_history(self.history_action.isChecked())
+        self.chart.render()
+
     #~~~ DISPLAY GRAPH CHANNEL LIST ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ 
     def show_graph_window(self):
         self.graph_menu.exec()
-    # #~~~ DISPLAY GRAPH CHANNEL LIST ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ 
-    # def show_graph2_window(self):
-    #     self.graph_menu2.exec()
-    #
+    #~~~ DISPLAY GRAPH 2 CHANNEL LIST ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ 
+    def show_graph2_window(self):
+        self.graph_menu2.exec()
+
+    #~~~ DISPLAY GROUP CHANNEL LIST ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ 
+    def show_group_window(self):
+        self.group_menu.exec()
+
+    def update_group_menu(self):
+        # Rebuild the Groups menu after the groups change, keeping checked items
+        checked = {item.data() for item in self.group_items if item.isChecked()}
+        self.group_menu.clear()
+        self.group_items = []
+        for name in self.data.groups.names:
+            for stat in ("Avg", "Spread"):
+                item = QAction(f"{name} {stat}", self.group_menu, checkable=True)
+                item.setData((name, stat))
+                item.setChecked((name, stat) in checked)
+                self.group_menu.addAction(item)
+                self.group_items.append(item)
+
     #~~~ SET GRAPH RANGE FUNCTION ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
     def set_graph_window(self):
         self.graph_window = QWidget()
@@ -410,6 +619,10 @@ class MainWindow(QMainWindow):
         self.data.mb_port = port_dict[index]
         print(f"Changing Modbus Port to: {self.data.mb_port}")
 
+    def handle_window_selection(self, index):
+        window_dict = {0: 300, 1: 60, 2: 600, 3: 900}
+        self.data.steady.set_window(window_dict[index])
+
     #~~~ CONFIGURATION SETTING FUNCTION ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
     def set_config_window(self):
         self.config_window = QWidget()
@@ -439,11 +652,23 @@ class MainWindow(QMainWindow):
         port_selection.addItem("COM5")
         port_selection.addItem("COM6")
         port_selection.currentIndexChanged.connect(self.handle_port_selection)
+        # Set steady-state detection window
+        label3 = QLabel("Set Stability Window:")
+        label3.setStyleSheet("color: #ffffff; font: 14px;")
+        window_selection = QComboBox()
+        window_selection.setStyleSheet("background-color:#222; color: #ffffff; font: 14px;")
+        window_selection.addItem("5 minutes")
+        window_selection.addItem("1 minute")
+        window_selection.addItem("10 minutes")
+        window_selection.addItem("15 minutes")
+        window_selection.currentIndexChanged.connect(self.handle_window_selection)
         
         layout.addWidget(label1)
         layout.addWidget(time_selection)
         layout.addWidget(label2)
         layout.addWidget(port_selection)
+        layout.addWidget(label3)
+        layout.addWidget(window_selection)
         self.config_window.setLayout(layout)
         self.config_window.show()
 
@@ -486,6 +711,9 @@ class MainWindow(QMainWindow):
             file_name = os.path.basename(file_path)
             self.config_path_label.setText(f"Selected File: {file_name}") 
             self.configs = fu.read_config(file_name) 
+            self.data.alarms.load_config(self.configs)
+            self.data.groups.load_config(self.configs)
+            self.update_group_menu()
         else:
             self.config_path_label.setText(f"No file selected") 
 
@@ -493,7 +721,10 @@ class MainWindow(QMainWindow):
     def start_test(self):
         self.test_time.testing = True
         self.data.data_log = []
+        self.data.cumulative.reset()
         self.data.pulse_reset = self.data.pulse_data
+        self.data.steady.reset()
+        self.data.reset_procedure()
         self.status.append("testing in progress...")
         # Styling for status indicator ~~~
         self.status_indicator.setStyleSheet("background-color: #225c40; font: 12px; \
@@ -504,7 +735,8 @@ class MainWindow(QMainWindow):
         pixmap = QPixmap(image_path)
         self.status_indicator.setPixmap(pixmap)
         # rewrite headers (if headers were renamed)
-        fu.write_headers(self.data_window.retrieve_model_data())
+        headers = self.data_window.retrieve_model_data()
+        fu.write_headers(headers)
         # update configs if changed 
         if self.configs is not None: 
             self.data.pcfs = [self.configs.elec_pcf[0], self.configs.gas_pcf[0], self.configs.water_pcf[0], self.configs.extra_pcf[0]]
@@ -512,14 +744,22 @@ class MainWindow(QMainWindow):
         self.test_file_label.setText(f"File Name: {fu.file_name}")
         self.start_time = QTime.currentTime()
         self.test_time.reset()
+        # journal the new test so it can be recovered after a crash
+        self.data.journal_event("headers", headers)
+        self.data.journal_event("pulse_reset", self.data.pulse_reset, self.data.pcfs)
+        self.data.journal_event("start")
+        fu.update_catalog(pcfs=self.data.pcfs)
         self.data.data_to_write[1] = 0.0 # resets the clock and writes a t0 timestamp 
         fu.write_data(self.data.data_to_write, self.test_time.testing, True)
-        self.timer.start(1000)  # Start the timer to update the plot every 1000 milliseconds (1 second)
+        self.timer.start()  # Restart the timer at its configured interval (1 second when live)
     
     #~~~~ SLOT FUNCTION FOR HANDLING STOP BUTTON CLICK EVENT ~~~~~~~~~~~~~~~~~
     def stop_test(self):
         self.test_time.testing = False
         self.timer.stop()  # Stop the timer to stop updating the plot
+        self.data.journal_event("stop")
+        self.data.flush_groups()
+        fu.flush_data()
         self.status.append("testing concluded.")
         self.update_system_status(self.status[-1])
         self.status_indicator.setStyleSheet("background-color: #b8494d; font: 12px; \
@@ -533,12 +773,37 @@ class MainWindow(QMainWindow):
     #~~~~ SLOT FUNCTION FOR HANDLING RESET BUTTON CLICK EVENT ~~~~~~~~~~~~~~~~
     def reset_(self):
         self.data.data_log = []
+        self.data.cumulative.reset()
         self.data.pulse_reset = self.data.pulse_data
+        self.data.steady.reset()
+        self.data.reset_procedure()
         self.start_time = QTime.currentTime()
         self.test_time.reset()
+        self.data.journal_event("pulse_reset", self.data.pulse_reset, self.data.pcfs)
+        self.data.journal_event("reset")
         self.data.data_to_write[1] = 0.0 # resets the clock and writes a t0 timestamp 
         fu.write_data(self.data.data_to_write, self.test_time.testing, True)
-        self.timer.start(1000)
+        fu.flush_data()
+        self.timer.start()
+
+    #~~~~ SLOT FUNCTION FOR HANDLING CHANNEL RENAMES ~~~~~~~~~~~~~~~~~~~~~~~~~
+    def rename_headers(self, headers):
+        # Sidecar write only, so renaming is safe while recording
+        if fu.file_name is not None:
+            fu.write_headers(headers)
+            self.data.journal_event("headers", headers)
+
+    #~~~~ RESTORE A SESSION RECOVERED FROM THE JOURNAL ~~~~~~~~~~~~~~~~~~~~~~~~
+    def resume_test(self, state):
+        if state.headers is not None:
+            self.data_window.set_model_data(state.headers)
+        self.test_file_label.setText(f"File Name: {fu.file_name}")
+        self.start_time = QTime.currentTime().addSecs(-int(state.elapsed()))
+        if state.testing:
+            self.status_indicator.setStyleSheet("background-color: #225c40; font: 12px; \
+                color: #ffffff; font-weight: bold;")
+            app_dir = fu.current_directory
+            self.status_indicator.setPixmap(QPixmap(f"{app_dir}/photos/recording_{IMAGE_FONT}.png"))
 
     def update_values(self, data, test_time):
     #~~~~~ Update Elapsed Time ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
@@ -549,40 +814,509 @@ class MainWindow(QMainWindow):
         
     #~~~~ Update Time Label ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
         self.time_label_value.setText("{:.2f}".format(test_time.test_time_min))
-    #~~~~ Update Ambient Temp Label ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
-    
+    #~~~~ Update Ambient Temp Label ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+        if not data.data_log:
+            return # cleared by Start/Reset before the next sample
         if data.data_log[-1][11] == None:
             self.ambient_label_value.setText("Open")
-            self.ambient_label_value.setStyleSheet("color: #b8494d; font: 25px; font-weight:;\
+            set_style(self.ambient_label_value, "color: #b8494d; font: 25px; font-weight:;\
                 font-family:{};".format(FONT_STYLE))
     
         elif 70 <= data.data_log[-1][11] < 80:
             self.ambient_label_value.setText("{}".format(data.data_log[-1][11]))
-            self.ambient_label_value.setStyleSheet("color: #ffffff; font: 25px; font-weight:;\
+            set_style(self.ambient_label_value, "color: #ffffff; font: 25px; font-weight:;\
                 font-family:{};".format(FONT_STYLE))
         elif data.data_log[-1][11] >=80:
             self.ambient_label_value.setText("{}".format(data.data_log[-1][11]))
-            self.ambient_label_value.setStyleSheet("color: #b8494d; font: 25px; font-weight:;\
+            set_style(self.ambient_label_value, "color: #b8494d; font: 25px; font-weight:;\
                 font-family:{};".format(FONT_STYLE))
         else:
             self.ambient_label_value.setText("{}".format(data.data_log[-1][11]))
-            self.ambient_label_value.setStyleSheet("color: #4e94c7; font: 25px; font-weight:;\
+            set_style(self.ambient_label_value, "color: #4e94c7; font: 25px; font-weight:;\
                 font-family:{};".format(FONT_STYLE))
+    #~~~~ Update Test Procedure Status ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+        if data.procedure is not None:
+            self.procedure_label.setText(data.procedure.summary())
 
     def new_test(self):
         fu.file_setup(self.test_time.testing, self.tc_modules)
+        self.data.journal_event("new_file", fu.file_name)
         self.test_file_label.setText(f"File Name: {fu.file_name}")
 
     def fry_test(self):
-        pass
+        self.set_procedure_window(pr.FryTest)
 
     def burger_test(self):
-        pass
+        self.set_procedure_window(pr.BurgerTest)
+
+    #~~~ TEST PROCEDURE SETUP FUNCTION ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    def set_procedure_window(self, procedure):
+        defaults = procedure(channels=[1])
+        self.procedure_window = QWidget()
+        self.procedure_window.setWindowTitle(f"{procedure.name} Setup")
+        self.procedure_window.setGeometry(200, 200, 300, 300)
+        self.procedure_window.setStyleSheet(f"background-color: {PRIMARY_COLOR};")
+        layout = QVBoxLayout()
+        layout.setSpacing(0)
+
+        entries = {}
+        for key, text, value in (("channels", "Control Channels (e.g. 1-4):", "1"),
+                                 ("setpoint", "Setpoint (F):", defaults.setpoint),
+                                 ("load_weight", "Load Weight (lb):", defaults.load_weight),
+                                 ("n_loads", "Number of Loads:", defaults.n_loads)):
+            label = QLabel(text)
+            label.setStyleSheet("color: #ffffff; font: 14px;")
+            entries[key] = QLineEdit(str(value))
+            entries[key].setStyleSheet("color: #ffffff; font: 14px;")
+            layout.addWidget(label)
+            layout.addWidget(entries[key])
+        label = QLabel("Energy Meter:")
+        label.setStyleSheet("color: #ffffff; font: 14px;")
+        meter_selection = QComboBox()
+        meter_selection.setStyleSheet("background-color:#222; color: #ffffff; font: 14px;")
+        for meter in pr.METER_COLUMNS:
+            meter_selection.addItem(meter)
+        layout.addWidget(label)
+        layout.addWidget(meter_selection)
+
+        def start_procedure():
+            try:
+                self.data.procedure = procedure(
+                    channels=parse_channels(entries["channels"].text()),
+                    setpoint=float(entries["setpoint"].text()),
+                    load_weight=float(entries["load_weight"].text()),
+                    n_loads=int(entries["n_loads"].text()),
+                    meter=meter_selection.currentText(),
+                    hhv=float(self.data_window.hhv_input.text()),
+                    gcf=float(self.data_window.gcf_input.text()),
+                    n_channels=max(self.tc_modules, 1)*16)
+                self.status.append(f"{procedure.name} started")
+                self.procedure_window.close()
+            except ValueError as e:
+                self.status.append(f"Invalid {procedure.name} setup: {e}")
+
+        button_style = "QPushButton {background-color: #2b2b2b; color: #ffffff;}" \
+                    "QPushButton:hover {background-color: #555555;}" \
+                    "QPushButton:pressed {background-color: #777777;}"
+        start_button = QPushButton("Start Procedure")
+        start_button.setStyleSheet(button_style)
+        start_button.clicked.connect(start_procedure)
+        layout.addWidget(start_button)
+        self.procedure_window.setLayout(layout)
+        self.procedure_window.show()
+
+    #~~~ TEST CATALOG WINDOW ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    def catalog_window(self):
+        if fu.catalog is None:
+            self.status.append("Test catalog unavailable")
+            return
+        self.catalog_widget = QWidget()
+        self.catalog_widget.setWindowTitle("Test Catalog")
+        self.catalog_widget.setGeometry(200, 200, 700, 600)
+        self.catalog_widget.setStyleSheet(f"background-color: {PRIMARY_COLOR};")
+        layout = QVBoxLayout()
+
+        search_layout = QHBoxLayout()
+        label = QLabel("Search (file, date or channel):")
+        label.setStyleSheet("color: #ffffff; font: 14px;")
+        search_input = QLineEdit()
+        search_input.setStyleSheet("color: #ffffff; font: 14px;")
+        button_style = "QPushButton {background-color: #2b2b2b; color: #ffffff;}" \
+                    "QPushButton:hover {background-color: #555555;}" \
+                    "QPushButton:pressed {background-color: #777777;}"
+        scan_button = QPushButton("Scan Data Folder")
+        scan_button.setStyleSheet(button_style)
+        view_button = QPushButton("Open in Viewer")
+        view_button.setStyleSheet(button_style)
+        search_layout.addWidget(label)
+        search_layout.addWidget(search_input)
+        search_layout.addWidget(scan_button)
+        search_layout.addWidget(view_button)
+        layout.addLayout(search_layout)
+
+        table_style = f"background-color: {DT_COLOR}; color: {DATA_FONT}; font: 12px; font-family:{FONT_STYLE};"
+        test_model = QStandardItemModel(0, 6)
+        test_model.setHorizontalHeaderLabels(["File", "Date", "Start", "End", "Test Time (min)", "Rows"])
+        test_view = QTableView()
+        test_view.setModel(test_model)
+        test_view.setSelectionBehavior(QAbstractItemView.SelectRows)
+        test_view.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        test_view.setStyleSheet(table_style)
+        layout.addWidget(test_view)
+        stats_model = QStandardItemModel(0, 5)
+        stats_model.setHorizontalHeaderLabels(["Channel", "Mean", "Std", "Min", "Max"])
+        stats_view = QTableView()
+        stats_view.setModel(stats_model)
+        stats_view.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        stats_view.setStyleSheet(table_style)
+        layout.addWidget(stats_view)
+
+        def fmt(value):
+            return "" if value is None else f"{value:.2f}" if isinstance(value, float) else str(value)
+
+        def refresh():
+            test_model.setRowCount(0)
+            for test in fu.catalog.search(search_input.text().strip()):
+                test_model.appendRow([QStandardItem(fmt(test[key])) for key in
+                                      ("file_name", "file_date", "start_time", "end_time",
+                                       "end_test_time", "rows")])
+
+        def show_stats(index):
+            stats_model.setRowCount(0)
+            file_name = test_model.item(index.row(), 0).text()
+            for name, (n, mean, std, minimum, maximum) in fu.catalog.channel_stats(file_name).items():
+                if n:
+                    stats_model.appendRow([QStandardItem(name)] +
+                                          [QStandardItem(fmt(v)) for v in (mean, std, minimum, maximum)])
+
+        def scan():
+            added = fu.catalog.scan(fu.current_directory + "/Data")
+            self.status.append(f"Catalog scan: {len(added)} test files added")
+            refresh()
+
+        def view():
+            rows = sorted({index.row() for index in test_view.selectionModel().selectedRows()})
+            paths = [fu.current_directory + "/Data/" + test_model.item(row, 0).text() for row in rows]
+            if paths:
+                self.viewer_window(paths)
+
+        search_input.textChanged.connect(refresh)
+        scan_button.clicked.connect(scan)
+        view_button.clicked.connect(view)
+        test_view.clicked.connect(show_stats)
+        refresh()
+        self.catalog_widget.setLayout(layout)
+        self.catalog_widget.show()
+
+    #~~~ HISTORICAL TEST VIEWER ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    def viewer_window(self, paths=()):
+        if self.test_viewer is None:
+            self.test_viewer = TestViewer(fu.current_directory + "/Data")
+        for path in paths:
+            self.test_viewer.add_test(path)
+        self.test_viewer.show()
+        self.test_viewer.raise_()
  
+class TestViewer(QWidget):
+    """
+    Window for looking at finished tests. Files are opened with core.reader,
+    so only the rows and channels of the current view are read: views of up
+    to VIEWER_DETAIL_ROWS rows are read in full, longer ones as an evenly
+    spaced sample of VIEWER_SAMPLES rows per pixel (zoom in for every row).
+    Several tests can be overlaid on a common test time axis (elapsed test
+    time, so tests with a Reset keep a single increasing axis). The wheel
+    zooms, dragging pans, a double click shows the whole test and the
+    readout follows the cursor.
+    """
+
+    def __init__(self, directory):
+        super().__init__()
+        self.directory = directory
+        self.tests = [] # {"name", "path", "reader", "span"}
+        self.series = [] # (label, t, y) currently plotted
+        self.view = None # (t0, t1) shown (None = all tests)
+        self.setWindowTitle("Test Viewer")
+        self.setGeometry(150, 100, 1200, 700)
+        self.setStyleSheet(f"background-color: {PRIMARY_COLOR};")
+        button_style = "QPushButton {background-color: #2b2b2b; color: #ffffff;}" \
+                    "QPushButton:hover {background-color: #555555;}" \
+                    "QPushButton:pressed {background-color: #777777;}"
+        list_style = f"background-color: {DT_COLOR}; color: {DATA_FONT}; font: 12px; font-family:{FONT_STYLE};"
+        label_style = f"color: #ffffff; font: 14px; font-family:{FONT_STYLE};"
+        # Tests and channels on the left
+        side_layout = QVBoxLayout()
+        button_layout = QHBoxLayout()
+        add_button = QPushButton("Add Test")
+        add_button.setStyleSheet(button_style)
+        add_button.clicked.connect(self.select_tests)
+        remove_button = QPushButton("Remove")
+        remove_button.setStyleSheet(button_style)
+        remove_button.clicked.connect(self.remove_test)
+        button_layout.addWidget(add_button)
+        button_layout.addWidget(remove_button)
+        side_layout.addLayout(button_layout)
+        tests_label = QLabel("Tests:")
+        tests_label.setStyleSheet(label_style)
+        side_layout.addWidget(tests_label)
+        self.test_list = QListWidget()
+        self.test_list.setStyleSheet(list_style)
+        self.test_list.setFixedHeight(120)
+        side_layout.addWidget(self.test_list)
+        channels_label = QLabel("Channels:")
+        channels_label.setStyleSheet(label_style)
+        side_layout.addWidget(channels_label)
+        self.channel_list = QListWidget()
+        self.channel_list.setStyleSheet(list_style)
+        self.channel_list.itemChanged.connect(lambda item: self.load())
+        side_layout.addWidget(self.channel_list)
+        side_widget = QWidget()
+        side_widget.setLayout(side_layout)
+        side_widget.setFixedWidth(240)
+        # Plot and cursor readout on the right
+        fig = plt.Figure(facecolor=(PRIMARY_COLOR))
+        self.canvas = FigureCanvas(fig)
+        self.ax = fig.add_subplot(111)
+        self.ax.set_facecolor(PRIMARY_COLOR)
+        self.cursor = None
+        self.zoom = pl.ZoomPan(self.canvas, self.ax, self.set_view)
+        self.canvas.mpl_connect("motion_notify_event", self.readout)
+        self.readout_label = QLabel("Test Time = NA")
+        self.readout_label.setStyleSheet(label_style)
+        self.readout_label.setWordWrap(True)
+        plot_layout = QVBoxLayout()
+        plot_layout.addWidget(self.canvas)
+        plot_layout.addWidget(self.readout_label)
+        layout = QHBoxLayout()
+        layout.addWidget(side_widget)
+        layout.addLayout(plot_layout)
+        self.setLayout(layout)
+        # Reload once zooming/panning pauses instead of on every mouse event
+        self.load_timer = QTimer(self)
+        self.load_timer.setSingleShot(True)
+        self.load_timer.setInterval(150)
+        self.load_timer.timeout.connect(self.load)
+
+    #~~~ TESTS ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    def select_tests(self):
+        paths, _ = QFileDialog.getOpenFileNames(self,
+                                                "Open Test File",
+                                                self.directory,
+                                                "Test Files (*.csv *.csv.gz)")
+        for path in paths:
+            self.add_test(path)
+
+    def add_test(self, path):
+        try:
+            reader = rd.open_test(path)
+            n = len(reader)
+            # Elapsed test time keeps increasing through resets (reader.elapsed())
+            span = (float(reader.elapsed()[0]), float(reader.elapsed()[-1])) if n else None
+        except (OSError, ValueError, IndexError) as e:
+            print(f"Unable to open {path}: {e}")
+            return
+        name = os.path.basename(path)
+        self.tests.append({"name": name, "path": path, "reader": reader, "span": span})
+        self.test_list.addItem(f"{name}  ({n} rows)")
+        # Channels are matched by name across tests
+        known = {self.channel_list.item(i).text() for i in range(self.channel_list.count())}
+        self.channel_list.blockSignals(True)
+        for name in reader.headers[2:]:
+            if name not in known:
+                item = QListWidgetItem(name)
+                item.setFlags(item.flags() | Qt.ItemIsUserCheckable)
+                item.setCheckState(Qt.Checked if name == "Ambient" and not self.channels() else Qt.Unchecked)
+                self.channel_list.addItem(item)
+                known.add(name)
+        self.channel_list.blockSignals(False)
+        self.view = None
+        self.load()
+
+    def remove_test(self):
+        row = self.test_list.currentRow()
+        if row < 0:
+            return
+        self.test_list.takeItem(row)
+        self.tests.pop(row)["reader"].close()
+        self.load()
+
+    def channels(self):
+        return [self.channel_list.item(i).text() for i in range(self.channel_list.count())
+                if self.channel_list.item(i).checkState() == Qt.Checked]
+
+    #~~~ VIEW ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    def full_span(self):
+        spans = [test["span"] for test in self.tests if test["span"] is not None]
+        if not spans:
+            return None
+        return min(span[0] for span in spans), max(span[1] for span in spans)
+
+    def set_view(self, t0, t1):
+        # Move the axis right away; the data for the new view loads after a pause
+        self.view = None if t0 is None else (t0, t1)
+        span = self.view or self.full_span()
+        if span is not None and span[1] > span[0]:
+            self.ax.set_xlim(span)
+            self.canvas.draw_idle()
+        self.load_timer.start()
+
+    def read_view(self, test, channels, t0, t1):
+        # Rows of one test between test times t0 and t1, sampled when the range is long
+        reader = test["reader"]
+        start = max(reader.find_time(t0) - 1, 0)
+        stop = min(reader.find_time(t1) + 1, len(reader))
+        columns = channels
+        if stop - start <= VIEWER_DETAIL_ROWS:
+            frame = reader.read(start, stop, columns)
+        else:
+            samples = max(int(self.ax.bbox.width), 100)*VIEWER_SAMPLES
+            frame = reader.take(np.unique(np.linspace(start, stop - 1, samples).astype(np.int64)), columns)
+        return frame
+
+    def load(self):
+        self.load_timer.stop()
+        channels = self.channels()
+        span = self.view or self.full_span()
+        self.series = []
+        for test in self.tests:
+            names = [name for name in channels if name in test["reader"].headers]
+            if span is None or test["span"] is None or not names:
+                continue
+            try:
+                frame = self.read_view(test, names, *span)
+            except (OSError, ValueError) as e:
+                print(f"Unable to read {test['name']}: {e}")
+                continue
+            t = test["reader"].elapsed()[frame.index.to_numpy()]
+            for name in names:
+                label = name if len(self.tests) == 1 else f"{test['name']} {name}"
+                self.series.append((label, t, pd.to_numeric(frame[name], errors="coerce").to_numpy(dtype=float)))
+        self.draw(span)
+
+    def draw(self, span):
+        self.ax.cla()
+        for label, t, y in self.series:
+            self.ax.plot(t, y, label=label, lw=0.75)
+        if span is not None and span[1] > span[0]:
+            self.ax.set_xlim(span)
+        self.cursor = self.ax.axvline(np.nan, color=FONT_COLOR1, lw=0.5)
+        self.ax.set_xlabel("Test Time (min)", color=FONT_COLOR1)
+        if self.series:
+            style_plot(self.ax)
+        self.canvas.draw_idle()
+
+    def readout(self, event):
+        # Values of every plotted series at the cursor's test time
+        if self.zoom.drag is not None or event.inaxes is not self.ax or event.xdata is None:
+            return
+        values = []
+        for label, t, y in self.series:
+            i = min(np.searchsorted(t, event.xdata), len(t) - 1) if len(t) else -1
+            if i >= 0:
+                values.append(f"{label}: {'NA' if np.isnan(y[i]) else f'{y[i]:.2f}'}")
+        self.readout_label.setText(f"Test Time = {event.xdata:.2f} min     " + "   |   ".join(values))
+        if self.cursor is not None:
+            self.cursor.set_xdata([event.xdata, event.xdata])
+            self.canvas.draw_idle()
+
+    def closeEvent(self, event):
+        for test in self.tests:
+            test["reader"].close()
+        self.tests = []
+        self.test_list.clear()
+        self.channel_list.clear()
+        self.series = []
+        super().closeEvent(event)
+
+
+class FrameTableModel(QAbstractTableModel):
+    """
+    Table model for the data window. Each cell is either a label or a label
+    followed by one value of the latest frame (a float array, NaN = no data).
+    update() only reformats and emits dataChanged for the cells whose shown
+    value changed, so unchanged cells are not repainted every second; the
+    view reads the cached text.
+    """
+    # Emitted with (row, column) when a label cell is edited or set
+    text_changed = Signal(int, int)
+    TEXT_ROLES = {Qt.DisplayRole, Qt.EditRole}
+    LABEL_FLAGS = Qt.ItemIsEnabled | Qt.ItemIsSelectable | Qt.ItemIsEditable
+    VALUE_FLAGS = Qt.ItemIsEnabled | Qt.ItemIsSelectable
+
+    def __init__(self, rows, columns, editable=False, decimals=2):
+        super().__init__()
+        self.labels = [[""]*columns for _ in range(rows)]
+        self.texts = [[""]*columns for _ in range(rows)] # shown text per cell
+        self.source = np.full((rows, columns), -1) # frame index per cell (-1 = label only)
+        self.formats = [[None]*columns for _ in range(rows)]
+        self.values = np.full((rows, columns), np.nan)
+        self.editable = editable
+        self.decimals = decimals
+
+    def rowCount(self, parent=QModelIndex()):
+        return len(self.labels)
+
+    def columnCount(self, parent=QModelIndex()):
+        return len(self.labels[0])
+
+    def set_cell(self, row, column, label, source=-1, fmt=None):
+        # fmt: format spec for the value (None = as logged, rounded)
+        self.labels[row][column] = label
+        self.source[row, column] = source
+        self.formats[row][column] = fmt
+        self.texts[row][column] = self._format(row, column)
+
+    def _format(self, row, column):
+        label = self.labels[row][column]
+        if self.source[row, column] < 0:
+            return label
+        value = self.values[row, column]
+        if np.isnan(value):
+            return f"{label}NA"
+        fmt = self.formats[row][column]
+        return f"{label}{format(value, fmt) if fmt else round(float(value), self.decimals)}"
+
+    def text(self, row, column):
+        return self.labels[row][column]
+
+    def set_text(self, row, column, text):
+        self.labels[row][column] = text
+        self.texts[row][column] = self._format(row, column)
+        index = self.index(row, column)
+        self.dataChanged.emit(index, index)
+        self.text_changed.emit(row, column)
+
+    def data(self, index, role=Qt.DisplayRole):
+        # Called for every role of every visible cell on each repaint, so keep it cheap
+        if role in self.TEXT_ROLES:
+            return self.texts[index.row()][index.column()]
+        return None
+
+    def flags(self, index):
+        if self.editable and self.source[index.row(), index.column()] < 0:
+            return self.LABEL_FLAGS
+        return self.VALUE_FLAGS
+
+    def setData(self, index, value, role=Qt.EditRole):
+        if role != Qt.EditRole or self.flags(index) != self.LABEL_FLAGS:
+            return False
+        self.set_text(index.row(), index.column(), str(value))
+        return True
+
+    def update(self, frame):
+        # Take the cell values from the frame and repaint only what changed
+        cells = self.source >= 0
+        index = self.source[cells]
+        values = np.full(index.shape, np.nan)
+        valid = index < len(frame)
+        values[valid] = np.round(frame[index[valid]], self.decimals)
+        new = np.full(self.values.shape, np.nan)
+        new[cells] = values
+        changed = cells & ~((new == self.values) | (np.isnan(new) & np.isnan(self.values)))
+        self.values = new
+        for row, column in zip(*np.nonzero(changed)):
+            row, column = int(row), int(column)
+            self.texts[row][column] = self._format(row, column)
+            model_index = self.index(row, column)
+            self.dataChanged.emit(model_index, model_index)
+        return int(changed.sum())
+
+
+def frame_array(values):
+    # Logged values as floats (None/open channels -> NaN)
+    return np.array([np.nan if value is None or isinstance(value, str) else value
+                     for value in values], dtype=float)
+
+
 class DataWindow(QWidget):
+    # Emitted with the full header list whenever a channel is renamed
+    headers_changed = Signal(list)
+    # Emitted when a channel group is added or removed
+    groups_changed = Signal()
 
-    def __init__(self):
+    def __init__(self, cumulative, groups):
         super().__init__()
+        self.cumulative = cumulative # cumulative index of the running test (range queries)
+        self.groups = groups # channel groups of the running test
         self.setWindowTitle("Data")
         self.setGeometry(1050, 50, 425, 800)
         self.setStyleSheet(f"background-color: {PRIMARY_COLOR};")
@@ -615,18 +1349,18 @@ class DataWindow(QWidget):
                 font-family:{}; text-decoration: underline;".format(FONT_STYLE))
         label5.setPixmap(QPixmap(f"photos/analysis_{IMAGE_FONT}.png"))
     #~~~~~ Section 1: Temperature Data ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
-        self.tc_model = QStandardItemModel(8, 8)
+        # Names in the even columns (editable), values (data_log index+11) in the odd ones
+        self.tc_model = FrameTableModel(8, 8, editable=True)
         for row in range(8):
             for column in range(8):
+                index = int((row)+((column//2)*8))
                 if column % 2 == 0:
-                    index = int((row)+((column/2)*8))
-                    item = QStandardItem(f"Temp {index}:")
-                    self.tc_model.setItem(row, column, item)
+                    self.tc_model.set_cell(row, column, f"Temp {index}:")
                 else:
-                    item = QStandardItem("NA".format(index))
-                    self.tc_model.setItem(row, column, item)
+                    self.tc_model.set_cell(row, column, "", source=index+11)
 
-        self.tc_model.item(0, 0).setText("Ambient:")
+        self.tc_model.set_cell(0, 0, "Ambient:")
+        self.tc_model.text_changed.connect(self.handle_item_changed)
         table_view1 = QTableView()
         table_view1.horizontalHeader().setVisible(False)
         table_view1.verticalHeader().setVisible(False)
@@ -634,69 +1368,44 @@ class DataWindow(QWidget):
         table_view1.setModel(self.tc_model)
         table_view1.setStyleSheet(f"background-color: {DT_COLOR}; color: {DATA_FONT}; font: 14px; font-family:{FONT_STYLE};"\
                 "border-style: solid; border-width: 1px 1px 1px")
-        # Temp Average
-        temp_avg_layout1 = QHBoxLayout()
-        label_1a = QLabel(" Average of Temps  ")
-        label_1a.setStyleSheet(f"color: #ffffff; font: 14px; font-family:{FONT_STYLE}")
-        label_1a.setPixmap(QPixmap(f"photos/avg_temp_{IMAGE_FONT}.png"))
-        temp_avg_layout1.addWidget(label_1a)
-        self.temp_avg_value_1a = QLineEdit()
-        self.temp_avg_value_1a.setStyleSheet(f"color: {DATA_FONT}; font: 14px; border:none;border-bottom:1px solid white;")
-        temp_avg_layout1.addWidget(self.temp_avg_value_1a)
-        label_1b = QLabel(" to ")
-        label_1b.setStyleSheet(f"color: {DATA_FONT}; font: 14px; font-family:{FONT_STYLE}")
-        temp_avg_layout1.addWidget(label_1b)
-        self.temp_avg_value_1b = QLineEdit()
-        self.temp_avg_value_1b.setStyleSheet(f"color: {DATA_FONT}; font: 14px; border: none; border-bottom:1px solid white;")
-        temp_avg_layout1.addWidget(self.temp_avg_value_1b)
-        self.temp_avg_value_1c = QLabel(" = NA")
-        self.temp_avg_value_1c.setStyleSheet(f"color: {DATA_FONT}; font: 14px; font-weight:bold;")
-        temp_avg_layout1.addWidget(self.temp_avg_value_1c)
-        
-        temp_avg_layout2 = QHBoxLayout()
-        label_2a = QLabel(" Average of Temps  ")
-        label_2a.setStyleSheet(f"color: #ffffff; font: 14px; font-family:{FONT_STYLE}")
-        label_2a.setPixmap(QPixmap(f"photos/avg_temp_{IMAGE_FONT}.png"))
-        temp_avg_layout2.addWidget(label_2a)
-        self.temp_avg_value_2a = QLineEdit()
-        self.temp_avg_value_2a.setStyleSheet(f"color: {DATA_FONT}; font: 14px; border:none;border-bottom:1px solid white;")
-        temp_avg_layout2.addWidget(self.temp_avg_value_2a)
-        label_2b = QLabel(" to ")
-        label_2b.setStyleSheet(f"color: {DATA_FONT}; font: 14px; font-family:{FONT_STYLE}")
-        temp_avg_layout2.addWidget(label_2b)
-        self.temp_avg_value_2b = QLineEdit()
-        self.temp_avg_value_2b.setStyleSheet(f"color: {DATA_FONT}; font: 14px; border:none;border-bottom:1px solid white;")
-        temp_avg_layout2.addWidget(self.temp_avg_value_2b)
-        self.temp_avg_value_2c = QLabel(" = NA")
-        self.temp_avg_value_2c.setStyleSheet(f"color: {DATA_FONT}; font: 14px; font-weight:bold;")
-        temp_avg_layout2.addWidget(self.temp_avg_value_2c)
+        # Channel groups: named sets of channels ("1-4" or "1,3,5") with their
+        # mean, min, max and spread (computed per tick by Data.update_groups)
+        group_layout = QHBoxLayout()
+        self.group_name_input = QLineEdit()
+        self.group_name_input.setPlaceholderText("Group name")
+        self.group_name_input.setStyleSheet(f"color: {DATA_FONT}; font: 14px; border:none;border-bottom:1px solid white;")
+        group_layout.addWidget(self.group_name_input)
+        self.group_channels_input = QLineEdit()
+        self.group_channels_input.setPlaceholderText("Channels (1-4)")
+        self.group_channels_input.setStyleSheet(f"color: {DATA_FONT}; font: 14px; border:none;border-bottom:1px solid white;")
+        group_layout.addWidget(self.group_channels_input)
+        button_style = "QPushButton {background-color: #2b2b2b; color: #ffffff;}" \
+                    "QPushButton:hover {background-color: #555555;}" \
+                    "QPushButton:pressed {background-color: #777777;}"
+        add_group_button = QPushButton("Add Group")
+        add_group_button.setStyleSheet(button_style)
+        add_group_button.clicked.connect(self.add_group)
+        group_layout.addWidget(add_group_button)
+        remove_group_button = QPushButton("Remove")
+        remove_group_button.setStyleSheet(button_style)
+        remove_group_button.clicked.connect(self.remove_group)
+        group_layout.addWidget(remove_group_button)
+        self.group_model = QStandardItemModel(0, 6)
+        self.group_model.setHorizontalHeaderLabels(["Group", "Channels"] + list(gr.STATS))
+        self.group_view = QTableView()
+        self.group_view.setModel(self.group_model)
+        self.group_view.verticalHeader().setVisible(False)
+        self.group_view.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.group_view.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.group_view.setMaximumHeight(150)
+        self.group_view.setStyleSheet(f"background-color: {DT_COLOR}; color: {DATA_FONT}; font: 12px; font-family:{FONT_STYLE};")
     #~~~~~~ Section 2: Pulse and Other Data ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
-        self.pulse_model = QStandardItemModel(3, 4)
-        item1 = QStandardItem("Electric Energy:")
-        item2 = QStandardItem("Interval: NA")
-        item3 = QStandardItem("Total: NA")
-        item4 = QStandardItem("Gas Energy:")
-        item5 = QStandardItem("Interval: NA")
-        item6 = QStandardItem("Total: NA")
-        item7 = QStandardItem("Water:")
-        item8 = QStandardItem("Interval: NA")
-        item9 = QStandardItem("Total: NA")
-        item10 = QStandardItem("Extra:")
-        item11 = QStandardItem("Interval: NA")
-        item12 = QStandardItem("Total: NA")
-
-        self.pulse_model.setItem(0, 0, item1)
-        self.pulse_model.setItem(1, 0, item2)
-        self.pulse_model.setItem(2, 0, item3) # electric total
-        self.pulse_model.setItem(0, 1, item4)
-        self.pulse_model.setItem(1, 1, item5)
-        self.pulse_model.setItem(2, 1, item6) # gas total
-        self.pulse_model.setItem(0, 2, item7)
-        self.pulse_model.setItem(1, 2, item8) 
-        self.pulse_model.setItem(2, 2, item9) # water total
-        self.pulse_model.setItem(0, 3, item10)
-        self.pulse_model.setItem(1, 3, item11)
-        self.pulse_model.setItem(2, 3, item12) # extra total
+        # Frame: pulse intervals 0-3, then totals (data_log 5-8) 4-7
+        self.pulse_model = FrameTableModel(3, 4)
+        for i, name in enumerate(["Electric Energy:", "Gas Energy:", "Water:", "Extra:"]):
+            self.pulse_model.set_cell(0, i, name)
+            self.pulse_model.set_cell(1, i, "Interval: ", source=i, fmt=".2f")
+            self.pulse_model.set_cell(2, i, "Total: ", source=i+4, fmt=".2f")
         
         table_view2 = QTableView()
         table_view2.horizontalHeader().setVisible(False)
@@ -706,44 +1415,23 @@ class DataWindow(QWidget):
                 f"font-family:{FONT_STYLE}; border-style: solid; border-width: 0 1px 1px 1px;")
 
     #~~~~~~ Section 3: Modbus Data ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
-        self.modbus_model = QStandardItemModel(4, 3)
-        mb_item1 = QStandardItem("Avg. Voltage: NA")
-        mb_item2 = QStandardItem("Watts: NA")
-        mb_item3 = QStandardItem("Electric Energy: NA")
-        mb_item4 = QStandardItem("V_AN: NA")
-        mb_item5 = QStandardItem("V_BN: NA")
-        mb_item6 = QStandardItem("V_CN: NA")
-        mb_item7 = QStandardItem("V_AB: NA")
-        mb_item8 = QStandardItem("V_BC: NA")
-        mb_item9 = QStandardItem("V_AC: NA")
-        mb_item10 = QStandardItem("I_A: NA")
-        mb_item11 = QStandardItem("I_B: NA")
-        mb_item12 = QStandardItem("I_C: NA")
-
-        self.modbus_model.setItem(0, 0, mb_item1)
-        self.modbus_model.setItem(0, 1, mb_item2)
-        self.modbus_model.setItem(0, 2, mb_item3)
-        self.modbus_model.setItem(1, 0, mb_item4)
-        self.modbus_model.setItem(1, 1, mb_item5)
-        self.modbus_model.setItem(1, 2, mb_item6)
-        self.modbus_model.setItem(2, 0, mb_item7)
-        self.modbus_model.setItem(2, 1, mb_item8)
-        self.modbus_model.setItem(2, 2, mb_item9)
-        self.modbus_model.setItem(3, 0, mb_item10)
-        self.modbus_model.setItem(3, 1, mb_item11)
-        self.modbus_model.setItem(3, 2, mb_item12)
+        # Frame: the first 12 modbus readings, in register order
+        self.modbus_model = FrameTableModel(4, 3)
+        mb_names = ["Avg. Voltage: ", "Watts: ", "Electrical Energy: ", "V_AN: ", "V_BN: ", "V_CN: ",
+                    "V_AB: ", "V_BC: ", "V_CA: ", "I_A: ", "I_B: ", "I_C: "]
+        for i, name in enumerate(mb_names):
+            self.modbus_model.set_cell(i//3, i % 3, name, source=i)
+        self.mb_connected = None # connection state the modbus table is styled for
 
         self.table_view3 = QTableView()
         self.table_view3.horizontalHeader().setVisible(False)
         self.table_view3.verticalHeader().setVisible(False)
         self.table_view3.setModel(self.modbus_model)
     #~~~~~~ Section 4: Analog Data ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
-        self.analog_model = QStandardItemModel(1, 1)
-        ai_item1 = QStandardItem("AI 1:  NA")
-        ai_item2 = QStandardItem("AI 2:  NA")
-
-        self.analog_model.setItem(0, 0, ai_item1)
-        self.analog_model.setItem(0, 1, ai_item2)
+        # Frame: the data_log row (AI 1 and AI 2 are columns 9 and 10)
+        self.analog_model = FrameTableModel(1, 2)
+        self.analog_model.set_cell(0, 0, "AI 1:  ", source=9)
+        self.analog_model.set_cell(0, 1, "AI 2:  ", source=10)
 
         table_view4 = QTableView()
         table_view4.horizontalHeader().setVisible(False)
@@ -756,6 +1444,12 @@ class DataWindow(QWidget):
         self.index_label = QLabel("Current Index = NA", self) 
         self.index_label.setStyleSheet(f"color: {DATA_FONT}; font: 14px; font-family:{FONT_STYLE};")
         index_layout = QHBoxLayout()
+        # Start/end are sample indices or test times (minutes)
+        self.select_by = QComboBox()
+        self.select_by.setStyleSheet(f"background-color: #111; color: {DATA_FONT}; font: 14px;")
+        self.select_by.addItem("Index")
+        self.select_by.addItem("Test Time (min)")
+        index_layout.addWidget(self.select_by)
         start_index_label = QLabel(" Start Index =  ")
         start_index_label.setStyleSheet(f"color: {DATA_FONT}; font: 14px; font-family:{FONT_STYLE}")
         start_index_label.setPixmap(QPixmap(f"photos/start_index_{IMAGE_FONT}.png"))
@@ -781,6 +1475,14 @@ class DataWindow(QWidget):
         self.meter_selection.addItem("208V Meter")
         self.meter_selection.addItem("Water Meter")
         # meter_selection.currentIndexChanged.connect(handle_meter_selection)
+        # Auto index: take start/end indices from the steady-state detector
+        stability_layout = QHBoxLayout()
+        self.auto_index_check = QCheckBox("Auto Index (steady state)")
+        self.auto_index_check.setStyleSheet(f"color: {DATA_FONT}; font: 14px; font-family:{FONT_STYLE};")
+        stability_layout.addWidget(self.auto_index_check)
+        self.stability_label = QLabel("Stability: NA")
+        self.stability_label.setStyleSheet(f"color: {DATA_FONT}; font: 14px; font-family:{FONT_STYLE};")
+        stability_layout.addWidget(self.stability_label)
         energy_rate_layout = QHBoxLayout()
         hhv_label = QLabel(" HHV =            ")
         hhv_label.setStyleSheet(f"color: #ffffff; font: 14px; font-family:{FONT_STYLE}")
@@ -799,12 +1501,39 @@ class DataWindow(QWidget):
         
         self.energy_rate_label = QLabel(" Energy Rate = ")
         self.energy_rate_label.setStyleSheet(f"color: #ffffff; font: 14px; font-family:{FONT_STYLE};")
+        # Named ranges: the current start/end saved under a name and
+        # re-evaluated every refresh
+        range_layout = QHBoxLayout()
+        self.range_name_input = QLineEdit()
+        self.range_name_input.setPlaceholderText("Range name")
+        self.range_name_input.setStyleSheet(f"color: {DATA_FONT}; font: 14px; border:none;border-bottom: 1px solid white;")
+        range_layout.addWidget(self.range_name_input)
+        button_style = "QPushButton {background-color: #2b2b2b; color: #ffffff;}" \
+                    "QPushButton:hover {background-color: #555555;}" \
+                    "QPushButton:pressed {background-color: #777777;}"
+        save_range_button = QPushButton("Save Range")
+        save_range_button.setStyleSheet(button_style)
+        save_range_button.clicked.connect(self.save_range)
+        range_layout.addWidget(save_range_button)
+        remove_range_button = QPushButton("Remove")
+        remove_range_button.setStyleSheet(button_style)
+        remove_range_button.clicked.connect(self.remove_range)
+        range_layout.addWidget(remove_range_button)
+        self.range_model = QStandardItemModel(0, 6)
+        self.range_model.setHorizontalHeaderLabels(["Range", "Start", "End", "Minutes", "Rate", "Avg. Temp"])
+        self.range_view = QTableView()
+        self.range_view.setModel(self.range_model)
+        self.range_view.verticalHeader().setVisible(False)
+        self.range_view.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.range_view.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.range_view.setMaximumHeight(120)
+        self.range_view.setStyleSheet(f"background-color: {DT_COLOR}; color: {DATA_FONT}; font: 12px; font-family:{FONT_STYLE};")
     #~~~~~~ Adjust Layout ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
         # Organize structure of layout 
         self.layout.addWidget(label1)
         self.layout.addWidget(table_view1)
-        self.layout.addLayout(temp_avg_layout1)
-        self.layout.addLayout(temp_avg_layout2)
+        self.layout.addLayout(group_layout)
+        self.layout.addWidget(self.group_view)
         self.layout.addItem(spacer_())
         self.layout.addWidget(label2)
         self.layout.addWidget(table_view2)
@@ -816,105 +1545,191 @@ class DataWindow(QWidget):
         self.layout.addItem(spacer_())
         self.layout.addWidget(self.index_label)
         self.layout.addWidget(self.meter_selection)
+        self.layout.addLayout(stability_layout)
         self.layout.addLayout(index_layout)
         self.layout.addItem(spacer_())
         self.layout.addWidget(self.er_time_label)
         self.layout.addLayout(energy_rate_layout)
         self.layout.addItem(spacer_())
         self.layout.addWidget(self.energy_rate_label)
+        self.layout.addLayout(range_layout)
+        self.layout.addWidget(self.range_view)
         self.setLayout(self.layout)
  
     def display(self):
         self.show()
 
     def update_data(self, data, test_time):
-        # Update the values in the temperature table 
-        for row in range(8):
-            if len(data.data_log[0]) > 30: # if there are more than 16 tc's
-                for column in range(1,8,2):
-                    index = int((row)+(((column-1)/2)*8))
-                    self.tc_model.item(row, column).setText(f"{data.data_log[-1][index+11]}")
-            else:
-                for column in range(1,4,2):
-                    index = int((row)+(((column-1)/2)*8))
-                    self.tc_model.item(row, column).setText(f"{data.data_log[-1][index+11]}")
-
-        try:
-            t1a = int(self.temp_avg_value_1a.text())
-            t1b = int(self.temp_avg_value_1b.text())
-            t1_l = data.ni_data[t1a+6:t1b+7]
-            tavg1 = np.mean(np.array([value for value in t1_l if value < 4000]))
-            self.temp_avg_value_1c.setText(f" = {round(tavg1, 1)}")
-        except Exception as e:
-            self.temp_avg_value_1c.setText(" = NA")
+        if not data.data_log:
+            return # cleared by Start/Reset before the next sample
+        # Update the values in the temperature table (channels past the
+        # connected modules are outside the frame and stay NA)
+        frame = frame_array(data.data_log[-1])
+        self.tc_model.update(frame)
 
-        try:
-            t2a = int(self.temp_avg_value_2a.text())
-            t2b = int(self.temp_avg_value_2b.text())
-            t2_l = data.ni_data[t2a+6:t2b+7]
-            tavg2 = np.mean(np.array([value for value in t2_l if value < 4000]))
-            self.temp_avg_value_2c.setText(f" = {round(tavg2, 1)}")
-        except Exception as e:
-            self.temp_avg_value_2c.setText(" = NA")
+        # Update the channel group statistics
+        self.update_groups()
 
         # Update the values in pulse table
-        for i in range(4):
-            self.pulse_model.item(1, i).setText(f"Interval: {data.pulse_data[i]:.2f}")
-        for i in range(4):
-            self.pulse_model.item(2, i).setText(f"Total: {data.data_log[-1][i+5]:.2f}")
-
-        # Update the values in modbus table
-        if data.mb_connected == True:
-            self.table_view3.setStyleSheet(f"background-color: {DT_COLOR}; color: {DATA_FONT}; font: 14px;"\
-                    f"font-family:{FONT_STYLE}; border-style: solid; border-width: 0 1px 1px 1px;")
-        elif data.mb_connected == False:
-            self.table_view3.setStyleSheet(f"background-color: {DT_COLOR}; color: {ERROR_FONT}; font: 14px;"\
-                    f"font-family:{FONT_STYLE}; border-style: solid; border-width: 0 1px 1px 1px;")
+        self.pulse_model.update(frame_array(list(data.pulse_data) + data.data_log[-1][5:9]))
 
-        self.modbus_model.item(0, 0).setText(f"Avg. Voltage: {data.mb_data[0][0]}")
-        self.modbus_model.item(0, 1).setText(f"Watts: {data.mb_data[0][1]}")
-        self.modbus_model.item(0, 2).setText(f"Electrical Energy: {data.mb_data[0][2]}")
-        self.modbus_model.item(1, 0).setText(f"V_AN: {data.mb_data[0][3]}")
-        self.modbus_model.item(1, 1).setText(f"V_BN: {data.mb_data[0][4]}")
-        self.modbus_model.item(1, 2).setText(f"V_CN: {data.mb_data[0][5]}")
-        self.modbus_model.item(2, 0).setText(f"V_AB: {data.mb_data[0][6]}")
-        self.modbus_model.item(2, 1).setText(f"V_BC: {data.mb_data[0][7]}")
-        self.modbus_model.item(2, 2).setText(f"V_CA: {data.mb_data[0][8]}")
-        self.modbus_model.item(3, 0).setText(f"I_A: {data.mb_data[0][9]}")
-        self.modbus_model.item(3, 1).setText(f"I_B: {data.mb_data[0][10]}")
-        self.modbus_model.item(3, 2).setText(f"I_C: {data.mb_data[0][11]}")
+        # Update the values in modbus table (restyled only when the connection changes)
+        if data.mb_connected != self.mb_connected:
+            color = DATA_FONT if data.mb_connected else ERROR_FONT
+            self.table_view3.setStyleSheet(f"background-color: {DT_COLOR}; color: {color}; font: 14px;"\
+                    f"font-family:{FONT_STYLE}; border-style: solid; border-width: 0 1px 1px 1px;")
+            self.mb_connected = data.mb_connected
+        self.modbus_model.update(frame_array(data.mb_data[0][:12]))
 
         # Update values in AI section
-        self.analog_model.item(0, 0).setText(f"AI 1:  {data.data_log[-1][9]}")
-        self.analog_model.item(0, 1).setText(f"AI 2:  {data.data_log[-1][10]}")
+        self.analog_model.update(frame)
         # Update the values in analysis section 
         self.index_label.setText("Current Index = {}".format(data.current_index))
+        # Update stability of the selected meter and drive the indices if auto is set
+        meter_series = {"Gas Meter": "Gas Rate", "120V Meter": "Wh.120 Rate",
+                        "208V Meter": "W", "Water Meter": "Water Rate"}[self.meter_selection.currentText()]
+        stable_range = data.steady.stable_range(meter_series)
+        if data.steady.stable[data.steady.series(meter_series)]:
+            self.stability_label.setText(f"Stability: stable since {stable_range[0]}")
+        else:
+            self.stability_label.setText("Stability: not stable")
+        if self.auto_index_check.isChecked() and stable_range is not None:
+            if self.select_by.currentIndex() == 0:
+                self.start_index_input.setText(str(stable_range[0]))
+                self.end_index_input.setText(str(stable_range[1]))
+            else:
+                try:
+                    self.start_index_input.setText(f"{self.cumulative.time(stable_range[0]):.2f}")
+                    self.end_index_input.setText(f"{self.cumulative.time(stable_range[1]):.2f}")
+                except IndexError as e:
+                    pass
+        # Energy rate of the selected range from the cumulative index, so any
+        # sample since the start of the test can be used
         try:
-            st_i = int(self.start_index_input.text())
-            et_i = int(self.end_index_input.text())
+            st_i, et_i = self.selected_range()
             hhv = int(self.hhv_input.text())
             gcf = float(self.gcf_input.text())
-            ti = data.data_log[st_i][1]
-            tf = data.data_log[et_i][1]
+            ti = self.cumulative.time(st_i)
+            tf = self.cumulative.time(et_i)
             self.er_time_label.setText(f" Start Time = {ti}     |     End Time = {tf}")
-            meter_ix = {"Gas Meter": 6, "120V Meter": 5, "208V Meter":4, "Water Meter": 7}[self.meter_selection.currentText()]
-            er_calc = (data.data_log[et_i][meter_ix] - data.data_log[st_i][meter_ix])*hhv*gcf/((tf-ti)/60)
+            er_calc = self.cumulative.energy_rate(self.meter_selection.currentText(), st_i, et_i, hhv, gcf)
             self.energy_rate_label.setText(f" Energy Rate = {round(er_calc,1)}")
         except ValueError as e:
             pass
         except IndexError as e:
+            # Range not recorded (yet), or before the rows of a recovered session
+            self.energy_rate_label.setText(" Energy Rate = n/a")
+        except ZeroDivisionError as e:
             pass
+        self.update_ranges()
+
+    def selected_range(self):
+        # (start, end) sample indices of the start/end inputs; test times are
+        # looked up in the cumulative index
+        if self.select_by.currentIndex() == 0:
+            return int(self.start_index_input.text()), int(self.end_index_input.text())
+        return (self.cumulative.find_time(float(self.start_index_input.text())),
+                self.cumulative.find_time(float(self.end_index_input.text())))
+
+    def add_group(self):
+        name = self.group_name_input.text().strip() or f"Group {len(self.groups.names) + 1}"
+        try:
+            self.groups.set_group(name, self.group_channels_input.text())
+        except ValueError as e:
+            print(f"Unable to add group: {e}")
+            return
+        self.group_name_input.clear()
+        self.group_channels_input.clear()
+        self.update_groups()
+        self.groups_changed.emit()
+
+    def remove_group(self):
+        for index in self.group_view.selectionModel().selectedRows():
+            self.groups.remove_group(self.group_model.item(index.row(), 0).text())
+        self.update_groups()
+        self.groups_changed.emit()
+
+    def update_groups(self):
+        # Show the latest statistics of every channel group
+        groups = [(name, gr.format_channels(channels)) for name, channels in zip(self.groups.names, self.groups.channels)]
+        shown = [(self.group_model.item(row, 0).text(), self.group_model.item(row, 1).text())
+                 for row in range(self.group_model.rowCount())]
+        if shown != groups:
+            self.group_model.setRowCount(0)
+            for name, channels in groups:
+                self.group_model.appendRow([QStandardItem(name), QStandardItem(channels)] +
+                                           [QStandardItem("") for _ in gr.STATS])
+        for row in range(len(groups)):
+            for k, value in enumerate(self.groups.stats[:, row]):
+                text = "NA" if np.isnan(value) else f"{value:.1f}"
+                item = self.group_model.item(row, k + 2)
+                if item.text() != text:
+                    item.setText(text)
+
+    def save_range(self):
+        try:
+            start, end = self.selected_range()
+        except (ValueError, IndexError) as e:
+            print(f"Unable to save range: {e}")
+            return
+        name = self.range_name_input.text().strip() or f"Range {len(self.cumulative.ranges) + 1}"
+        self.cumulative.set_range(name, start, end)
+        self.range_name_input.clear()
+        self.update_ranges()
+
+    def remove_range(self):
+        for index in self.range_view.selectionModel().selectedRows():
+            self.cumulative.remove_range(self.range_model.item(index.row(), 0).text())
+        self.update_ranges()
+
+    def update_ranges(self):
+        # Re-evaluate every named range; each one costs O(1) however long it is
+        names = list(self.cumulative.ranges)
+        if [self.range_model.item(row, 0).text() for row in range(self.range_model.rowCount())] != names:
+            self.range_model.setRowCount(0)
+            for name in names:
+                self.range_model.appendRow([QStandardItem(name)] + [QStandardItem("") for _ in range(5)])
+        try:
+            hhv = int(self.hhv_input.text())
+            gcf = float(self.gcf_input.text())
+        except ValueError as e:
+            hhv, gcf = 1, 1
+        # Average over the temperature channels after ambient
+        channels = range(al.TC_OFFSET + 1, self.cumulative.width or 0)
+        meter = self.meter_selection.currentText()
+        for row, name in enumerate(names):
+            summary = self.cumulative.range_summary(name, meter, hhv, gcf, channels)
+            texts = [str(summary["start"]), str(summary["end"])] + \
+                    ["NA" if summary[key] is None or np.isnan(summary[key]) else f"{summary[key]:.1f}"
+                     for key in ("duration", "energy_rate", "mean")]
+            for column, text in enumerate(texts, start=1):
+                item = self.range_model.item(row, column)
+                if item.text() != text:
+                    item.setText(text)
 
     def retrieve_model_data(self):
         headers = ["Time of Day", "Test Time", "Voltage", "W", "Wh.208", "Wh.120","Gas","Water","Extra"] + \
                   ["AI 1", "AI 2", "Ambient"]
         for column in range(0,7,2):
             for row in range(8):
-                item_data = self.tc_model.item(row, column).text()
+                item_data = self.tc_model.text(row, column)
                 headers.append(item_data)
         headers.pop(12) # ambient header is unchanged 
         return headers
 
+    def handle_item_changed(self, row, column):
+        # Channel name cells are the even columns; odd columns hold values
+        if column % 2 == 0:
+            self.headers_changed.emit(self.retrieve_model_data())
+
+    def set_model_data(self, headers):
+        # Inverse of retrieve_model_data: apply saved channel names to the table
+        names = headers[12:]
+        for i, name in enumerate(names, start=1):
+            row, column = i % 8, (i // 8)*2
+            if column < 8:
+                self.tc_model.set_text(row, column, name)
+
 
 if __name__ == "__main__":
     
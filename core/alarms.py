@@ -0,0 +1,137 @@
+"""
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+                                 HEADER
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+Title:       alarms.py
+Origin Date: 10/19/2026
+Revised:     10/19/2026
+Author(s):   Russell Hedrick
+Contact:     rhedrick@frontierenergy.com
+Description:
+
+The following script is designed to evaluate alarm rules (over/under
+temperature, rate-of-change and open thermocouple) across every temperature
+channel in a single vectorized pass per sample. Each rule has hysteresis and
+debounce so that a noisy channel does not chatter between states.
+
+"""
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#                                   Imports
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+import numpy as np
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#                                  Constants
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+RULES = ("high", "low", "rate", "open") # row order of the alarm state arrays
+TC_OFFSET = 11 # index of the first temperature channel (ambient) in data_log and test rows
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#                           Classes & Functions
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+class AlarmEngine:
+    """
+    Per-channel limits are held as numpy arrays (NaN disables a rule for that
+    channel) so each update is a handful of array comparisons no matter how
+    many thermocouples are connected.
+    high/low  - temperature limits (F)
+    rate      - maximum absolute rate of change (F/min)
+    hysteresis - band (F or F/min) a value must fall back through to clear
+    debounce  - consecutive samples a condition must hold to raise or clear
+    """
+
+    def __init__(self, n_channels, high=np.nan, low=np.nan, rate=np.nan,
+                 hysteresis=2.0, debounce=3):
+        self.n_channels = n_channels
+        self.high = np.full(n_channels, high, dtype=float)
+        self.low = np.full(n_channels, low, dtype=float)
+        self.rate = np.full(n_channels, rate, dtype=float)
+        self.hysteresis = hysteresis
+        self.debounce = debounce
+        self.names = ["Ambient"] + [f"Temp {i}" for i in range(1, n_channels)]
+        self.reset()
+
+    def reset(self):
+        n = self.n_channels
+        self.active = np.zeros((len(RULES), n), dtype=bool) # latched alarm state
+        self.counts = np.zeros((len(RULES), n), dtype=np.int32) # debounce counters
+        self.seen = np.zeros(n, dtype=bool) # channel has reported a valid value
+        self.last_values = np.full(n, np.nan)
+        self.last_time = None
+
+    def set_limits(self, channel, high=None, low=None, rate=None):
+        if high is not None: self.high[channel] = high
+        if low is not None: self.low[channel] = low
+        if rate is not None: self.rate[channel] = rate
+
+    def load_config(self, configs):
+        """
+        Read optional high_alarm/low_alarm/rate_alarm columns from a loaded
+        config DataFrame. Config rows map to Temp 1..n; ambient keeps the
+        limits it was constructed with.
+        """
+        for column, limits in (("high_alarm", self.high), ("low_alarm", self.low),
+                               ("rate_alarm", self.rate)):
+            if column not in configs:
+                continue
+            values = np.array(configs[column], dtype=float)[:self.n_channels-1]
+            limits[1:1+values.size] = values
+
+    def evaluate(self, values, t):
+        """
+        Evaluate all rules against one sample of temperature values (None or
+        NaN for open channels) taken at t seconds. Returns a list of events as
+        (channel name, rule, state, value) where state is "raised"/"cleared".
+        """
+        values = np.array(values[:self.n_channels], dtype=float)
+        if values.size < self.n_channels:
+            values = np.pad(values, (0, self.n_channels - values.size), constant_values=np.nan)
+        is_open = np.isnan(values)
+        # Rate of change in F/min relative to the previous sample
+        if self.last_time is not None and t > self.last_time:
+            rate = np.abs(values - self.last_values)*60/(t - self.last_time)
+        else:
+            rate = np.full(self.n_channels, np.nan)
+        h = self.hysteresis
+        with np.errstate(invalid="ignore"):
+            # Conditions for raising an alarm that is currently clear
+            raise_cond = np.vstack((values > self.high,
+                                    values < self.low,
+                                    rate > self.rate,
+                                    is_open & self.seen))
+            # Conditions for clearing an alarm that is currently active
+            clear_cond = np.vstack((values < self.high - h,
+                                    values > self.low + h,
+                                    rate < self.rate - h,
+                                    ~is_open))
+        # An open channel can neither raise nor clear the value based rules
+        clear_cond[:3] &= ~is_open
+        toggling = np.where(self.active, clear_cond, raise_cond)
+        self.counts = np.where(toggling, self.counts + 1, 0)
+        flip = self.counts >= self.debounce
+        self.active ^= flip
+        self.counts[flip] = 0
+        self.seen |= ~is_open
+        self.last_values = values
+        self.last_time = t
+        events = []
+        for rule, channel in zip(*np.nonzero(flip)):
+            state = "raised" if self.active[rule, channel] else "cleared"
+            value = None if is_open[channel] else round(float(values[channel]), 2)
+            events.append((self.names[channel], RULES[rule], state, value))
+        return events
+
+    def update(self, row, test_time):
+        # Evaluate the temperature section of the latest data_log row
+        return self.evaluate(row[TC_OFFSET:], test_time.clock_time)
+
+    def active_alarms(self):
+        return [(self.names[c], RULES[r]) for r, c in zip(*np.nonzero(self.active))]
+
+    def summary(self, *others):
+        # Status text for this engine's active alarms plus any other engines'
+        alarms = self.active_alarms() + [alarm for other in others for alarm in other.active_alarms()]
+        if not alarms:
+            return "Alarms: none"
+        text = ", ".join(f"{name} {rule}" for name, rule in alarms[:3])
+        if len(alarms) > 3:
+            text += f" (+{len(alarms)-3})"
+        return f"Alarms: {text}"
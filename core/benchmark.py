@@ -0,0 +1,411 @@
+"""
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+                                 HEADER
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+Title:       benchmark.py
+Origin Date: 10/19/2026
+Revised:     10/19/2026
+Author(s):   Russell Hedrick
+Contact:     rhedrick@frontierenergy.com
+Description:
+
+The following script is designed to benchmark the per-tick pipeline without
+hardware. Simulated NI modules and a simulated Shark 200 feed the real Data,
+MainWindow, DataWindow and CSV writer code, and every stage is timed over a
+sweep of thermocouple module counts, averaging intervals and data_log lengths.
+Results (p50/p99/max latency and throughput per case) are saved as JSON and
+CSV so runs of different versions can be compared.
+
+Cases:
+    get_data          Data.get_data, 1 second interval
+    interval_average  Data.get_data with the interval averaging (interval > 1)
+    update_plot       MainWindow.update_plot (offscreen Qt)
+    update_data       DataWindow.update_data (offscreen Qt)
+    write_data        fu.write_data (queueing) and CSV writer throughput
+    modbus_get_all    modbusFuncs.get_all decoding (simulated meter)
+
+Run from the application folder (the UI cases load photos/).
+
+Usage:
+    python -m core.benchmark [results.json] [quick] [case ...]
+    python -m core.benchmark compare <baseline.json> <results.json> [threshold]
+
+"""
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#                                   Imports
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+import os
+import sys
+import csv
+import json
+import time
+import struct
+import random
+import shutil
+import platform
+import tempfile
+import itertools
+import subprocess
+from datetime import datetime
+import numpy as np
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#                                  Constants
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+CASES = ("get_data", "interval_average", "update_plot", "update_data", "write_data", "modbus_get_all")
+# Sweeps: thermocouple modules (16 channels each), averaging intervals (s),
+# data_log lengths (rows; 21600 = the 6 hour cap) and plotted lines
+SWEEP = {"modules": (1, 2), "interval": (5, 30), "log_length": (60, 3600, 21600), "lines": (1, 11)}
+QUICK_SWEEP = {"modules": (2,), "interval": (5,), "log_length": (3600,), "lines": (11,)}
+REPEAT = 300 # timed calls per case
+QUICK_REPEAT = 50
+WARMUP = 10 # untimed calls before each case
+WRITE_ROWS = 5000 # rows pushed through the CSV writer for the throughput figure
+OPEN_CHANNEL = 9999.0 # value an open thermocouple reads (outside the valid range)
+REGRESSION = 1.2 # compare: p50 or p99 ratio above which a case is flagged
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#                           Classes & Functions
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+class SimulatedNI:
+    """
+    Stand-in for niDAQFuncs.NI returning read_all_tz() rows: 4 pulse
+    counters, 2 analog inputs, ambient and 16 thermocouples per module.
+    Temperatures follow a random walk and the last channel reads open.
+    """
+    connected = True
+    four_chan = False
+
+    def __init__(self, tc_modules=2, seed=0):
+        self.tc_modules = tc_modules
+        self.random = np.random.default_rng(seed)
+        self.pulses = np.zeros(4)
+        self.temps = np.full(16*tc_modules - 2, 350.0) # ambient and the open channel excluded
+
+    def read_all_tz(self):
+        self.pulses += (3, 1, 1, 0)
+        self.temps += self.random.normal(0, 0.5, self.temps.size)
+        return list(self.pulses) + [1.2, 3.4, 75.0 + self.random.random()] + \
+               list(self.temps) + [OPEN_CHANNEL]
+
+    def close_daq(self):
+        pass
+
+
+class SimulatedMeter:
+    """
+    Stand-in for the minimalmodbus client of a Shark 200: read_registers
+    returns 32 bit floats (voltages, currents, watts, pf) and the Wh
+    accumulator as 16 bit words. latency - seconds added per transaction
+    (a 19200 baud RTU read takes roughly 0.03-0.06 s).
+    """
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.wh = 0
+
+    def read_registers(self, address, count, functioncode=3):
+        if self.latency:
+            time.sleep(self.latency)
+        if address == 1505:
+            self.wh += 1
+            return list(struct.unpack(">HH", struct.pack(">i", self.wh)))
+        values = [120.1, 120.3, 119.9, 208.2, 207.9, 208.4, 10.1, 10.3, 9.9, 2400.0, 0.0, 0.0, 0.98]
+        words = struct.unpack(f">{2*len(values)}H", struct.pack(f">{len(values)}f", *values))
+        return list(words[:count])
+
+
+class BenchTime:
+    # Minimal TestTime advanced by hand (no wall clock)
+    def __init__(self, timing_interval=1):
+        self.timing_interval = timing_interval
+        self.clock_time = self.test_time = self.test_time_min = 0
+        self.testing = True
+        self.time_to_write = True
+
+    def advance(self):
+        self.clock_time += 1
+        self.test_time = self.clock_time
+        self.test_time_min = round(self.test_time/60, 2)
+        self.time_to_write = self.test_time % self.timing_interval == 0
+
+
+def new_data(modules, log_length, interval=1):
+    """
+    Data object fed by a SimulatedNI with `log_length` rows already in its
+    data_log (filled through get_data, so the cumulative index matches).
+    """
+    import Testzilla as tz
+    ni_daq = SimulatedNI(modules)
+    data = tz.Data(ni_daq)
+    data.mb_data = [[208.0, 2400.0, 0] + [0]*10]
+    test_time = BenchTime(1)
+    for _ in range(max(log_length, interval)):
+        step(data, test_time)
+    test_time.timing_interval = interval
+    return data, test_time
+
+def step(data, test_time):
+    # One acquisition tick (not timed)
+    test_time.advance()
+    data.ni_data = data.ni_daq.read_all_tz()
+    data.get_data(test_time)
+
+def trim(data, log_length):
+    # Keep the log at the length of the case (get_data only trims at the cap)
+    if len(data.data_log) > log_length:
+        del data.data_log[:len(data.data_log) - log_length]
+
+def measure(call, repeat, warmup=WARMUP, setup=None):
+    # Seconds per call; setup() runs untimed before every call
+    samples = []
+    for i in range(warmup + repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        call()
+        elapsed = time.perf_counter() - start
+        if i >= warmup:
+            samples.append(elapsed)
+    return samples
+
+def summarize(case, params, samples, **extra):
+    samples = np.asarray(samples)
+    result = {"case": case, "params": params, "n": int(samples.size),
+              "mean_us": float(samples.mean()*1e6),
+              "p50_us": float(np.percentile(samples, 50)*1e6),
+              "p99_us": float(np.percentile(samples, 99)*1e6),
+              "max_us": float(samples.max()*1e6),
+              "per_second": float(1/samples.mean()) if samples.mean() > 0 else None}
+    result.update(extra)
+    return result
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ Cases ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+def bench_get_data(sweep, repeat):
+    results = []
+    for modules, log_length in itertools.product(sweep["modules"], sweep["log_length"]):
+        data, test_time = new_data(modules, log_length)
+
+        def setup():
+            test_time.advance()
+            data.ni_data = data.ni_daq.read_all_tz()
+            trim(data, log_length)
+
+        samples = measure(lambda: data.get_data(test_time), repeat, setup=setup)
+        results.append(summarize("get_data", {"modules": modules, "log_length": log_length}, samples))
+    return results
+
+def bench_interval_average(sweep, repeat):
+    results = []
+    for modules, interval, log_length in itertools.product(sweep["modules"], sweep["interval"], sweep["log_length"]):
+        data, test_time = new_data(modules, log_length, interval)
+
+        def setup():
+            test_time.advance()
+            data.ni_data = data.ni_daq.read_all_tz()
+            trim(data, max(log_length, interval))
+
+        samples = measure(lambda: data.get_data(test_time), repeat, setup=setup)
+        results.append(summarize("interval_average",
+                                 {"modules": modules, "interval": interval, "log_length": log_length}, samples))
+    return results
+
+def qt_application():
+    # Offscreen Qt unless a platform was chosen
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PySide6.QtWidgets import QApplication
+    return QApplication.instance() or QApplication([])
+
+def new_window(data, test_time):
+    from PySide6.QtCore import QTimer
+    import core.UI as UI
+    timer = QTimer()
+    window = UI.MainWindow(data, data.ni_daq, test_time, ["benchmark"], timer)
+    window.resize(1200, 800)
+    window.show()
+    return window, timer
+
+def bench_update_plot(sweep, repeat):
+    app = qt_application()
+    results = []
+    for modules, log_length, lines in itertools.product(sweep["modules"], sweep["log_length"], sweep["lines"]):
+        for history in (False, True):
+            data, test_time = new_data(modules, log_length)
+            window, timer = new_window(data, test_time)
+            for item in window.tc_items[1:lines + 1]:
+                item.setChecked(True)
+            window.history_action.setChecked(history)
+            app.processEvents()
+
+            def setup():
+                step(data, test_time)
+                trim(data, log_length)
+                window.chart.feed(data.data_log, data.current_index)
+
+            samples = measure(window.update_plot, repeat, setup=setup)
+            results.append(summarize("update_plot", {"modules": modules, "log_length": log_length,
+                                                     "lines": lines, "history": history}, samples,
+                                     redraws=window.chart.redraws))
+            window.close()
+            app.processEvents()
+    return results
+
+def bench_update_data(sweep, repeat):
+    app = qt_application()
+    results = []
+    for modules, log_length in itertools.product(sweep["modules"], sweep["log_length"]):
+        data, test_time = new_data(modules, log_length)
+        window, timer = new_window(data, test_time)
+        window.data_window.show()
+        app.processEvents()
+
+        def setup():
+            step(data, test_time)
+            trim(data, log_length)
+
+        samples = measure(lambda: window.data_window.update_data(data, test_time), repeat, setup=setup)
+        results.append(summarize("update_data", {"modules": modules, "log_length": log_length}, samples))
+        window.data_window.close()
+        window.close()
+        app.processEvents()
+    return results
+
+def bench_write_data(sweep, repeat):
+    """
+    Time of fu.write_data (the call made on the timer, which only queues the
+    row) and rows per second through the writer thread to disk, with and
+    without the columnar copy.
+    """
+    import core.file_utils as fu
+    import core.storage as st
+    results = []
+    directory = tempfile.mkdtemp()
+    try:
+        for modules, columnar in itertools.product(sweep["modules"], (False, True)):
+            data, test_time = new_data(modules, 1)
+            path = os.path.join(directory, f"bench_{modules}_{int(columnar)}.csv")
+            headers = ["Time of Day"] + [f"Column {i}" for i in range(1, len(data.data_to_write))]
+            sinks = [st.ColumnStore(st.store_dir_name(path), "01-01-26", headers)] if columnar else []
+            fu.writer = fu.CSVWriter(path, sinks=sinks)
+            row = data.data_to_write
+            samples = measure(lambda: fu.write_data(row, True, True), repeat)
+            fu.writer.flush(wait=True, timeout=60)
+            start = time.perf_counter()
+            for _ in range(WRITE_ROWS):
+                fu.write_data(row, True, True)
+            fu.writer.flush(wait=True, timeout=60)
+            elapsed = time.perf_counter() - start
+            fu.close_writer()
+            fu.writer = None
+            results.append(summarize("write_data", {"modules": modules, "columnar": columnar}, samples,
+                                     rows_per_second=WRITE_ROWS/elapsed))
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    return results
+
+def bench_modbus_get_all(sweep, repeat):
+    import core.modbusFuncs as mb
+    meter = SimulatedMeter()
+    return [summarize("modbus_get_all", {}, measure(lambda: mb.get_all(meter), repeat))]
+
+BENCHMARKS = {"get_data": bench_get_data, "interval_average": bench_interval_average,
+              "update_plot": bench_update_plot, "update_data": bench_update_data,
+              "write_data": bench_write_data, "modbus_get_all": bench_modbus_get_all}
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ Results ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+def environment():
+    # What the numbers depend on, saved with every run
+    versions = {}
+    for module in ("numpy", "pandas", "matplotlib", "PySide6"):
+        try:
+            versions[module] = __import__(module).__version__
+        except Exception:
+            versions[module] = None
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {"date": datetime.now().isoformat(timespec="seconds"), "commit": commit,
+            "python": platform.python_version(), "platform": platform.platform(),
+            "processor": platform.processor(), "cpus": os.cpu_count(), "versions": versions}
+
+def run(cases=CASES, quick=False):
+    # Run the selected cases and return {"environment": ..., "results": [...]}
+    sweep = QUICK_SWEEP if quick else SWEEP
+    repeat = QUICK_REPEAT if quick else REPEAT
+    random.seed(0)
+    results = []
+    for case in cases:
+        print(f"Benchmarking {case}...")
+        for result in BENCHMARKS[case](sweep, repeat):
+            print(format_result(result))
+            results.append(result)
+    return {"environment": environment(), "sweep": sweep, "repeat": repeat, "results": results}
+
+def format_params(params):
+    return " ".join(f"{k}={v}" for k, v in params.items())
+
+def format_result(result):
+    return "  {:<16} {:<48} p50 {:>9.1f} us  p99 {:>9.1f} us  {:>9.0f}/s".format(
+        result["case"], format_params(result["params"]), result["p50_us"], result["p99_us"], result["per_second"])
+
+def save(report, path):
+    # JSON with everything, plus a flat CSV (one row per case) next to it
+    with open(path, "w") as file:
+        json.dump(report, file, indent=1)
+    keys = sorted({k for result in report["results"] for k in result["params"]})
+    values = ["n", "mean_us", "p50_us", "p99_us", "max_us", "per_second", "rows_per_second", "redraws"]
+    with open(os.path.splitext(path)[0] + ".csv", "w", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(["case"] + keys + values)
+        for result in report["results"]:
+            writer.writerow([result["case"]] + [result["params"].get(k, "") for k in keys] +
+                            [result.get(v, "") for v in values])
+
+def compare(baseline, results, threshold=REGRESSION):
+    """
+    Ratios (new/baseline) of p50 and p99 for every case present in both
+    reports. Returns [(case, params, p50 ratio, p99 ratio, regressed)].
+    """
+    def key(result):
+        return result["case"], json.dumps(result["params"], sort_keys=True)
+    before = {key(result): result for result in baseline["results"]}
+    rows = []
+    for result in results["results"]:
+        old = before.get(key(result))
+        if old is None:
+            continue
+        p50 = result["p50_us"]/old["p50_us"] if old["p50_us"] else float("nan")
+        p99 = result["p99_us"]/old["p99_us"] if old["p99_us"] else float("nan")
+        rows.append((result["case"], result["params"], p50, p99, p50 > threshold or p99 > threshold))
+    return rows
+
+
+if __name__ == "__main__":
+    if len(sys.argv) >= 4 and sys.argv[1] == "compare":
+        with open(sys.argv[2]) as file:
+            baseline = json.load(file)
+        with open(sys.argv[3]) as file:
+            results = json.load(file)
+        threshold = float(sys.argv[4]) if len(sys.argv) > 4 else REGRESSION
+        rows = compare(baseline, results, threshold)
+        for case, params, p50, p99, regressed in rows:
+            print("{:<16} {:<48} p50 x{:.2f}  p99 x{:.2f}{}".format(
+                case, format_params(params), p50, p99, "  REGRESSION" if regressed else ""))
+        sys.exit(1 if any(row[-1] for row in rows) else 0)
+    elif len(sys.argv) >= 2 and sys.argv[1] in ("-h", "--help", "help"):
+        print(__doc__)
+    else:
+        args = sys.argv[1:]
+        path = next((a for a in args if a.endswith(".json")),
+                    f"benchmark_{datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+        cases = [a for a in args if a in CASES] or CASES
+        unknown = [a for a in args if a not in CASES and a != "quick" and not a.endswith(".json")]
+        if unknown:
+            print(f"Unknown arguments: {' '.join(unknown)}")
+            print(__doc__)
+            sys.exit(2)
+        report = run(cases, quick="quick" in args)
+        save(report, path)
+        print(f"Results saved to {path}")
+        sys.stdout.flush()
+        os._exit(0) # skip Qt teardown of the benchmark windows
@@ -0,0 +1,283 @@
+"""
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+                                 HEADER
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+Title:       catalog.py
+Origin Date: 10/19/2026
+Revised:     10/19/2026
+Author(s):   Russell Hedrick
+Contact:     rhedrick@frontierenergy.com
+Description:
+
+The following script is designed to keep a catalog (SQLite) of every test
+file in the Data directory: start/end time, channel names, pcfs, row count
+and per-channel summary statistics. Running tests update their entry
+incrementally from the background writer, and older files can be indexed
+with a scan, so tests can be searched without opening hundreds of CSVs.
+
+Usage:
+    python -m core.catalog scan Data
+    python -m core.catalog list Data [search text]
+
+"""
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#                                   Imports
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+import os
+import re
+import sys
+import csv
+import json
+import time
+import sqlite3
+import numpy as np
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#                                  Constants
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+CATALOG_FILE = "catalog.db" # kept in the Data directory
+TEST_FILE = re.compile(r"^(\d{2}-\d{2}-\d{2})_(\d+)\.csv$")
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tests (
+    file_name TEXT PRIMARY KEY,
+    file_date TEXT,
+    file_index INTEGER,
+    headers TEXT,
+    pcfs TEXT,
+    rows INTEGER DEFAULT 0,
+    start_time TEXT,
+    end_time TEXT,
+    start_test_time REAL,
+    end_test_time REAL,
+    updated REAL);
+CREATE TABLE IF NOT EXISTS channel_stats (
+    file_name TEXT,
+    channel INTEGER,
+    count INTEGER,
+    total REAL,
+    total_sq REAL,
+    minimum REAL,
+    maximum REAL,
+    PRIMARY KEY (file_name, channel));
+"""
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#                           Classes & Functions
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+def file_index(file_name):
+    match = TEST_FILE.match(file_name)
+    return int(match.group(2)) if match else None
+
+
+class Catalog:
+    """
+    Connection to the test catalog. SQLite connections belong to the thread
+    that made them, so the UI and the background writer each open their own.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.connection = sqlite3.connect(path, timeout=10.0)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.executescript(SCHEMA)
+
+    def register(self, file_name, file_date, headers):
+        # Add a test file (no-op when it is already cataloged)
+        with self.connection:
+            self.connection.execute(
+                "INSERT OR IGNORE INTO tests (file_name, file_date, file_index, headers, updated) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (file_name, file_date, file_index(file_name), json.dumps(list(headers)), time.time()))
+
+    def update(self, file_name, **fields):
+        # Update test fields; lists (headers, pcfs) are stored as json
+        fields = {key: json.dumps([float(v) if key == "pcfs" else v for v in value])
+                  if isinstance(value, (list, tuple, np.ndarray)) else value
+                  for key, value in fields.items()}
+        fields["updated"] = time.time()
+        columns = ", ".join(f"{key} = ?" for key in fields)
+        with self.connection:
+            self.connection.execute(f"UPDATE tests SET {columns} WHERE file_name = ?",
+                                    list(fields.values()) + [file_name])
+
+    def next_index(self, file_date):
+        # Next free file index for the day (no fixed limit on files per day)
+        row = self.connection.execute("SELECT MAX(file_index) FROM tests WHERE file_date = ?",
+                                      (file_date,)).fetchone()
+        return 0 if row[0] is None else row[0] + 1
+
+    def test(self, file_name):
+        row = self.connection.execute("SELECT * FROM tests WHERE file_name = ?",
+                                      (file_name,)).fetchone()
+        return None if row is None else self._test(row)
+
+    def _test(self, row):
+        test = dict(row)
+        test["headers"] = json.loads(test["headers"]) if test["headers"] else []
+        test["pcfs"] = json.loads(test["pcfs"]) if test["pcfs"] else None
+        return test
+
+    def search(self, text=None):
+        """
+        Tests whose file name, date or channel names contain text (all tests
+        when text is empty), newest first.
+        """
+        query = "SELECT * FROM tests"
+        args = []
+        if text:
+            query += " WHERE file_name LIKE ? OR file_date LIKE ? OR headers LIKE ?"
+            args = [f"%{text}%"]*3
+        query += " ORDER BY substr(file_date, 7, 2) DESC, substr(file_date, 1, 5) DESC, file_index DESC"
+        return [self._test(row) for row in self.connection.execute(query, args)]
+
+    def channel_stats(self, file_name):
+        """
+        Returns {header: (count, mean, std, min, max)} for the numeric columns
+        of a test.
+        """
+        test = self.test(file_name)
+        stats = {}
+        for row in self.connection.execute(
+                "SELECT * FROM channel_stats WHERE file_name = ? ORDER BY channel", (file_name,)):
+            n = row["count"]
+            mean = row["total"]/n if n else None
+            std = float(np.sqrt(max(row["total_sq"]/n - mean*mean, 0.0))) if n else None
+            name = test["headers"][row["channel"]] if test and row["channel"] < len(test["headers"]) \
+                else str(row["channel"])
+            stats[name] = (n, mean, std, row["minimum"], row["maximum"])
+        return stats
+
+    def add_rows(self, file_name, rows):
+        """
+        Fold a batch of data rows (as written to the CSV) into the test's row
+        count, start/end times and per-channel statistics.
+        """
+        if not rows:
+            return
+        width = max(len(row) for row in rows) - 1
+        values = np.full((len(rows), width), np.nan)
+        for i, row in enumerate(rows):
+            cells = row[1:]
+            values[i, :len(cells)] = [v if isinstance(v, (int, float)) else np.nan for v in cells]
+        valid = ~np.isnan(values)
+        count = valid.sum(axis=0)
+        zeroed = np.where(valid, values, 0.0)
+        total, total_sq = zeroed.sum(axis=0), (zeroed*zeroed).sum(axis=0)
+        minimum = np.where(valid, values, np.inf).min(axis=0)
+        maximum = np.where(valid, values, -np.inf).max(axis=0)
+        with self.connection:
+            self.connection.executemany(
+                "INSERT INTO channel_stats VALUES (?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (file_name, channel) DO UPDATE SET "
+                "count = count + excluded.count, total = total + excluded.total, "
+                "total_sq = total_sq + excluded.total_sq, "
+                "minimum = MIN(COALESCE(minimum, excluded.minimum), COALESCE(excluded.minimum, minimum)), "
+                "maximum = MAX(COALESCE(maximum, excluded.maximum), COALESCE(excluded.maximum, maximum))",
+                [(file_name, i + 1, int(count[i]), float(total[i]), float(total_sq[i]),
+                  None if count[i] == 0 else float(minimum[i]),
+                  None if count[i] == 0 else float(maximum[i])) for i in range(width)])
+            test_times = [row[1] for row in rows if isinstance(row[1], (int, float))]
+            self.connection.execute(
+                "UPDATE tests SET rows = rows + ?, start_time = COALESCE(start_time, ?), end_time = ?, "
+                "start_test_time = COALESCE(start_test_time, ?), "
+                "end_test_time = COALESCE(?, end_test_time), updated = ? WHERE file_name = ?",
+                (len(rows), str(rows[0][0]), str(rows[-1][0]),
+                 test_times[0] if test_times else None, test_times[-1] if test_times else None,
+                 time.time(), file_name))
+
+    def index_file(self, path, chunk_rows=3600):
+        # (Re)build the entry for an existing test file
+        import core.file_utils as fu
+        file_name = os.path.basename(path)
+        with self.connection:
+            self.connection.execute("DELETE FROM tests WHERE file_name = ?", (file_name,))
+            self.connection.execute("DELETE FROM channel_stats WHERE file_name = ?", (file_name,))
+        with open(path, mode='r', newline='') as file:
+            rows = [row for _, row in zip(range(2), (row for row in csv.reader(file) if row))]
+        if len(rows) < 2:
+            return
+        self.register(file_name, rows[0][0], fu.read_headers(path))
+        batch = []
+        for row in fu.iter_rows(path):
+            batch.append([row[0]] + [float(v) if v else None for v in row[1:]])
+            if len(batch) >= chunk_rows:
+                self.add_rows(file_name, batch)
+                batch = []
+        self.add_rows(file_name, batch)
+
+    def scan(self, directory):
+        # Index test files that are missing from the catalog
+        known = {row[0] for row in self.connection.execute("SELECT file_name FROM tests")}
+        added = []
+        for file_name in sorted(os.listdir(directory)):
+            if TEST_FILE.match(file_name) and file_name not in known:
+                try:
+                    self.index_file(os.path.join(directory, file_name))
+                    added.append(file_name)
+                except (OSError, ValueError) as e:
+                    print(f"Unable to index {file_name}: {e}")
+        return added
+
+    def close(self):
+        self.connection.close()
+
+
+class CatalogRecorder:
+    """
+    Background writer sink that keeps the catalog entry of the running test
+    up to date. Rows are folded in every commit_interval seconds; the
+    connection is opened lazily on the writer thread.
+    """
+
+    def __init__(self, path, file_name, file_date, headers, commit_interval=10.0):
+        self.path = path
+        self.file_name = file_name
+        self.file_date = file_date
+        self.headers = headers
+        self.commit_interval = commit_interval
+        self.catalog = None
+        self.rows = []
+        self.last_commit = time.monotonic()
+
+    def append(self, row):
+        self.rows.append(row)
+        if time.monotonic() - self.last_commit >= self.commit_interval:
+            self.flush()
+
+    def sync(self):
+        # Writer sync cycle: commit rows still waiting for the interval
+        if self.rows and time.monotonic() - self.last_commit >= self.commit_interval:
+            self.flush()
+
+    def set_headers(self, headers):
+        # The catalog entry itself is renamed by file_utils.update_catalog
+        self.headers = list(headers)
+
+    def flush(self):
+        try:
+            if self.catalog is None:
+                self.catalog = Catalog(self.path)
+                self.catalog.register(self.file_name, self.file_date, self.headers)
+            self.catalog.add_rows(self.file_name, self.rows)
+            self.rows = []
+        except sqlite3.Error as e:
+            print(f"Unable to update test catalog: {e}")
+        self.last_commit = time.monotonic()
+
+    def close(self):
+        self.flush()
+        if self.catalog is not None:
+            self.catalog.close()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) >= 3 and sys.argv[1] in ("scan", "list"):
+        catalog = Catalog(os.path.join(sys.argv[2], CATALOG_FILE))
+        if sys.argv[1] == "scan":
+            for file_name in catalog.scan(sys.argv[2]):
+                print(f"Indexed {file_name}")
+        else:
+            for test in catalog.search(" ".join(sys.argv[3:])):
+                print(f"{test['file_name']:<16} {test['file_date']} {test['start_time'] or '':>8}-"
+                      f"{test['end_time'] or '':<8} {test['rows']:>8} rows")
+    else:
+        print(__doc__)
@@ -0,0 +1,475 @@
+"""
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+                                 HEADER
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+Title:       collector.py
+Origin Date: 10/19/2026
+Revised:     10/19/2026
+Author(s):   Russell Hedrick
+Contact:     rhedrick@frontierenergy.com
+Description:
+
+The following script is designed to gather the data of several Testzilla
+stations on one machine. Each acquisition node (Testzilla --collector) sends
+its rows over TCP in zlib compressed batches; the collector keeps one column
+store per station session (core/storage.py, with an Epoch column) under a
+common root and reads them back aligned on wall clock time.
+
+Nodes keep every row in memory (as a compact float array, up to BUFFER_ROWS)
+until the collector acknowledges it, and the
+collector only acknowledges rows that are on disk (stores are flushed every
+FLUSH_ROWS rows or FLUSH_SECONDS). After a link drop, or a collector
+restart, the node resends everything after the last acknowledged row.
+
+Messages: <type:u1><length:u4><payload>
+    HELLO   node -> collector  JSON {station, session, headers, file_date}
+                               answered with ACK (resume point)
+    BATCH   node -> collector  zlib(<first seq:i8><rows:u4><width:u4>
+                               epoch f8[rows], time of day S8[rows],
+                               values f8[rows*width]), answered with ACK
+    HEADERS node -> collector  JSON header list (channel rename)
+    ACK     collector -> node  <last stored seq:i8> (-1 = none)
+
+Usage:
+    python -m core.collector serve [root] [host:port]
+    python -m core.collector node <station> [host:port] [channels] [rate]
+    python -m core.collector merge <root> <destination.csv> [channel ...]
+
+"""
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#                                   Imports
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+import os
+import sys
+import json
+import time
+import zlib
+import random
+import socket
+import struct
+import asyncio
+import threading
+import itertools
+from collections import deque
+from datetime import date, datetime
+import numpy as np
+import pandas as pd
+
+import core.storage as st
+import core.server as sv
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#                                  Constants
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+DEFAULT_PORT = 8766 # host defaults to server.DEFAULT_HOST
+DEFAULT_ROOT = "Collected"
+HELLO, BATCH, HEADERS, ACK = 1, 2, 3, 4 # message types
+MESSAGE = struct.Struct("<BI") # type, payload length
+BATCH_HEADER = struct.Struct("<qII") # first seq, rows, width
+SEQ = struct.Struct("<q")
+MAX_PAYLOAD = 64 << 20 # largest message accepted (bytes)
+BATCH_ROWS = 600 # most rows per batch (backfill after a link drop)
+BATCH_SECONDS = 5.0 # a node sends what it has at least this often
+BUFFER_ROWS = 24*3600 # rows a node keeps while the collector is unreachable (~50 MB)
+RECONNECT_SECONDS = 5.0 # wait between connection attempts
+LINK_TIMEOUT = 30.0 # seconds without an answer before a link is dropped
+FLUSH_ROWS = 600 # rows buffered per station before a chunk is written
+FLUSH_SECONDS = 600.0 # longest time rows stay unflushed (and unacknowledged)
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#                           Classes & Functions
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+def message(kind, payload=b""):
+    return MESSAGE.pack(kind, len(payload)) + payload
+
+def row_values(row):
+    # Numeric columns of a data row as float64 (time of day and open channels -> NaN)
+    return np.array([v if isinstance(v, (int, float, np.number)) else np.nan for v in row[1:]], dtype=float)
+
+def encode_batch(rows):
+    # rows: (seq, epoch, time of day, row_values) with consecutive seq numbers
+    width = max(len(row) for _, _, _, row in rows)
+    values = np.full((len(rows), width), np.nan)
+    for i, (_, _, _, row) in enumerate(rows):
+        values[i, :len(row)] = row
+    epochs = np.array([epoch for _, epoch, _, _ in rows], dtype="<f8")
+    tods = np.array([tod for _, _, tod, _ in rows], dtype="S8")
+    return zlib.compress(BATCH_HEADER.pack(rows[0][0], len(rows), width) + epochs.tobytes() +
+                         tods.tobytes() + values.astype("<f8").tobytes())
+
+def decode_batch(payload):
+    # Inverse of encode_batch: (first seq, epochs, times of day, values)
+    raw = zlib.decompress(payload)
+    first, n, width = BATCH_HEADER.unpack_from(raw)
+    offset = BATCH_HEADER.size
+    epochs = np.frombuffer(raw, "<f8", n, offset)
+    tods = np.frombuffer(raw, "S8", n, offset + 8*n).astype(str)
+    values = np.frombuffer(raw, "<f8", n*width, offset + 16*n).reshape(n, width)
+    return first, epochs, tods, values
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ Node Side ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+def recv_exact(sock, n):
+    data = bytearray()
+    while len(data) < n:
+        chunk = sock.recv(n - len(data))
+        if not chunk:
+            raise ConnectionError("collector closed the link")
+        data += chunk
+    return bytes(data)
+
+def recv_message(sock):
+    kind, length = MESSAGE.unpack(recv_exact(sock, MESSAGE.size))
+    return kind, recv_exact(sock, length)
+
+
+class NodeLink:
+    """
+    Sends the rows of this station to a collector from a background thread.
+    add() only appends to an in-memory buffer, so a slow or unreachable
+    collector never delays the acquisition timer. Rows stay buffered until
+    the collector acknowledges them (up to buffer_rows; older rows are
+    dropped first and counted in `dropped`).
+    """
+
+    def __init__(self, host, port, station, headers, file_date=None,
+                 batch_rows=BATCH_ROWS, batch_seconds=BATCH_SECONDS, buffer_rows=BUFFER_ROWS):
+        self.address = (host, port)
+        self.station = station
+        self.session = datetime.now().strftime("%Y%m%d-%H%M%S") # new store per run
+        self.headers = list(headers)
+        self.file_date = file_date or date.today().strftime("%m-%d-%y")
+        self.batch_rows = batch_rows
+        self.batch_seconds = batch_seconds
+        self.buffer_rows = buffer_rows
+        self.pending = deque() # (seq, epoch, time of day, row_values) not yet acknowledged
+        self.lock = threading.Lock()
+        self.wake = threading.Event()
+        self.seq = 0
+        self.acked = -1 # last row stored by the collector
+        self.dropped = 0
+        self.connected = False
+        self.headers_changed = False
+        self.stopping = False
+        self.thread = None
+
+    def add(self, row):
+        # Queue one row (called from the acquisition thread)
+        item = (time.time(), str(row[0]), row_values(row))
+        with self.lock:
+            self.pending.append((self.seq,) + item)
+            self.seq += 1
+            if len(self.pending) > self.buffer_rows:
+                self.pending.popleft()
+                self.dropped += 1
+            if len(self.pending) >= self.batch_rows:
+                self.wake.set()
+
+    def set_headers(self, headers):
+        self.headers = list(headers)
+        self.headers_changed = True
+        self.wake.set()
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def stop(self, timeout=5.0):
+        # Stop after a last attempt to send what is buffered
+        self.stopping = True
+        self.wake.set()
+        if self.thread is not None:
+            self.thread.join(timeout)
+
+    def _trim(self, acked):
+        with self.lock:
+            self.acked = max(self.acked, acked)
+            while self.pending and self.pending[0][0] <= self.acked:
+                self.pending.popleft()
+
+    def _unsent(self, after):
+        # Seq numbers in pending are consecutive, so the rows after `after`
+        # start at a known offset
+        with self.lock:
+            if not self.pending:
+                return []
+            start = max(after + 1 - self.pending[0][0], 0)
+            return list(itertools.islice(self.pending, start, start + self.batch_rows))
+
+    def _run(self):
+        while True:
+            try:
+                with socket.create_connection(self.address, timeout=LINK_TIMEOUT) as sock:
+                    self._session(sock)
+            except (OSError, ConnectionError, ValueError) as e:
+                if self.connected:
+                    print(f"Collector link lost: {e}")
+                self.connected = False
+            if self.stopping:
+                return
+            self.wake.wait(RECONNECT_SECONDS)
+            self.wake.clear()
+
+    def _hello(self, sock):
+        hello = {"station": self.station, "session": self.session,
+                 "headers": self.headers, "file_date": self.file_date}
+        sock.sendall(message(HELLO, json.dumps(hello).encode()))
+        kind, payload = recv_message(sock)
+        if kind != ACK:
+            raise ValueError(f"unexpected message {kind}")
+        return SEQ.unpack(payload)[0]
+
+    def _session(self, sock):
+        # Resume after the collector's last stored row, then send batches
+        sent = self._hello(sock)
+        self._trim(sent)
+        self.headers_changed = False
+        self.connected = True
+        while True:
+            if self.headers_changed:
+                self.headers_changed = False
+                sock.sendall(message(HEADERS, json.dumps(self.headers).encode()))
+            rows = self._unsent(sent)
+            due = rows and (len(rows) >= self.batch_rows or time.time() - rows[0][1] >= self.batch_seconds)
+            if rows and (due or self.stopping):
+                sock.sendall(message(BATCH, encode_batch(rows)))
+                kind, payload = recv_message(sock)
+                if kind != ACK:
+                    raise ValueError(f"unexpected message {kind}")
+                sent = rows[-1][0]
+                self._trim(SEQ.unpack(payload)[0])
+                continue
+            if self.stopping:
+                return
+            self.wake.wait(self.batch_seconds/5)
+            self.wake.clear()
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ Collector Side ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+class Station:
+    """
+    Store of one station session: <root>/<station>/<session>.cols. The last
+    stored seq is kept in the store manifest so a restarted collector
+    resumes where its disk left off.
+    """
+
+    def __init__(self, root, name, session, headers, file_date):
+        self.name = name
+        self.session = session
+        directory = os.path.join(root, name, session + ".cols")
+        self.store = st.ColumnStore(directory, file_date, self.store_headers(headers), chunk_rows=FLUSH_ROWS)
+        self.stored = self.store.manifest.get("last_seq", -1) # last seq on disk
+        self.received = self.stored # last seq buffered
+        self.flushed_at = time.monotonic()
+        self.latest = None # (epoch, time of day, values) of the newest row
+        self.rows = 0 # rows received this run
+
+    @staticmethod
+    def store_headers(headers):
+        return ["Time of Day", "Epoch"] + list(headers[1:])
+
+    def resync(self):
+        # A node reconnected: drop rows that were buffered but never stored
+        self.store.rows = []
+        self.received = self.stored
+        return self.stored
+
+    def set_headers(self, headers):
+        self.store.set_headers(self.store_headers(headers))
+
+    def add(self, first, epochs, tods, values):
+        # Append the rows after the last one received (resent rows are skipped)
+        skip = max(self.received + 1 - first, 0)
+        for epoch, tod, row in zip(epochs[skip:], tods[skip:], values[skip:]):
+            self.store.rows.append([tod, float(epoch)] + [None if np.isnan(v) else float(v) for v in row])
+        if skip < len(epochs):
+            self.received = first + len(epochs) - 1
+            self.latest = (float(epochs[-1]), tods[-1], values[-1])
+            self.rows += len(epochs) - skip
+        if len(self.store.rows) >= FLUSH_ROWS or time.monotonic() - self.flushed_at >= FLUSH_SECONDS:
+            self.flush()
+        return self.stored
+
+    def flush(self):
+        self.store.manifest["last_seq"] = self.received
+        self.store.flush()
+        self.stored = self.received
+        self.flushed_at = time.monotonic()
+
+
+class Collector:
+    """
+    TCP server that stores the rows of every connected node. One asyncio
+    loop serves all stations; decoding a batch is a few NumPy calls, so a
+    modest machine keeps up with dozens of 1 Hz stations.
+    """
+
+    def __init__(self, root=DEFAULT_ROOT, host=sv.DEFAULT_HOST, port=DEFAULT_PORT):
+        self.root = root
+        self.host = host
+        self.port = port
+        self.stations = {} # (station, session) -> Station
+        self.links = {} # station -> connected peer
+        self.server = None
+        os.makedirs(root, exist_ok=True)
+
+    async def start(self):
+        self.server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        asyncio.ensure_future(self._flush_loop())
+        return self.server
+
+    async def _flush_loop(self):
+        # Store (and so acknowledge) rows of quiet stations too
+        while True:
+            await asyncio.sleep(FLUSH_SECONDS/10)
+            for station in list(self.stations.values()):
+                if station.store.rows and time.monotonic() - station.flushed_at >= FLUSH_SECONDS:
+                    station.flush()
+
+    def close(self):
+        for station in self.stations.values():
+            station.flush()
+
+    async def _read(self, reader):
+        kind, length = MESSAGE.unpack(await reader.readexactly(MESSAGE.size))
+        if length > MAX_PAYLOAD:
+            raise ValueError("message too large")
+        return kind, await reader.readexactly(length)
+
+    async def _handle(self, reader, writer):
+        peer = writer.get_extra_info("peername")
+        station = None
+        try:
+            kind, payload = await asyncio.wait_for(self._read(reader), LINK_TIMEOUT)
+            if kind != HELLO:
+                return
+            hello = json.loads(payload)
+            key = (hello["station"], hello["session"])
+            if key not in self.stations:
+                self.stations[key] = Station(self.root, hello["station"], hello["session"],
+                                             hello["headers"], hello.get("file_date", ""))
+            station = self.stations[key]
+            station.set_headers(hello["headers"])
+            self.links[station.name] = peer
+            print(f"{station.name} connected from {peer[0]} (resuming after row {station.stored})")
+            writer.write(message(ACK, SEQ.pack(station.resync())))
+            await writer.drain()
+            while True:
+                kind, payload = await self._read(reader)
+                if kind == BATCH:
+                    stored = station.add(*decode_batch(payload))
+                    writer.write(message(ACK, SEQ.pack(stored)))
+                    await writer.drain()
+                elif kind == HEADERS:
+                    station.set_headers(json.loads(payload))
+        except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError,
+                ValueError, KeyError, zlib.error):
+            pass
+        finally:
+            if station is not None:
+                station.flush()
+                if self.links.get(station.name) == peer:
+                    del self.links[station.name]
+                print(f"{station.name} disconnected ({station.rows} rows received)")
+            writer.close()
+
+    def status(self):
+        # One line per station: link state, rows and age of the newest row
+        lines = []
+        for (name, session), station in sorted(self.stations.items()):
+            age = "NA" if station.latest is None else f"{time.time() - station.latest[0]:.0f}s"
+            link = "connected" if name in self.links else "offline"
+            lines.append(f"{name} {session}: {link}, {station.rows} rows, last row {age} ago")
+        return lines
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ Merged Reading ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+def station_stores(root):
+    # {station: [store directories in session order]}
+    stores = {}
+    for name in sorted(os.listdir(root)):
+        path = os.path.join(root, name)
+        if os.path.isdir(path):
+            sessions = sorted(d for d in os.listdir(path) if d.endswith(".cols"))
+            stores[name] = [os.path.join(path, d) for d in sessions]
+    return stores
+
+def read_aligned(root, channels=None, t0=None, t1=None, step=1.0):
+    """
+    Data of every station on a common wall clock grid: a DataFrame indexed
+    by epoch time (rounded to `step` seconds) with one "station/channel"
+    column per channel. channels - names read from every station ("Temp 1")
+    or from one station ("cell-2/Temp 1"); None reads everything.
+    """
+    frames = []
+    for name, directories in station_stores(root).items():
+        wanted = None if channels is None else \
+            [c.split("/", 1)[1] if "/" in c else c for c in channels
+             if "/" not in c or c.split("/", 1)[0] == name]
+        parts = []
+        for directory in directories:
+            headers = st.read_manifest(directory)["headers"]
+            columns = headers[1:] if wanted is None else ["Epoch"] + [c for c in wanted if c in headers]
+            if len(columns) > 1:
+                parts.append(st.load(directory, columns))
+        if not parts:
+            continue
+        frame = pd.concat(parts, ignore_index=True)
+        frame["Epoch"] = np.round(frame["Epoch"]/step)*step
+        if t0 is not None:
+            frame = frame[frame["Epoch"] >= t0]
+        if t1 is not None:
+            frame = frame[frame["Epoch"] <= t1]
+        frame = frame.drop_duplicates("Epoch", keep="last").set_index("Epoch")
+        frames.append(frame.add_prefix(name + "/"))
+    if not frames:
+        return pd.DataFrame()
+    return pd.concat(frames, axis=1).sort_index()
+
+def merge_csv(root, destination_file, channels=None):
+    # Write the aligned data of all stations with a readable time column
+    frame = read_aligned(root, channels)
+    frame.insert(0, "Time", pd.to_datetime(frame.index, unit="s"))
+    frame.to_csv(destination_file, index_label="Epoch")
+    return len(frame)
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ Command Line ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+def serve(root=DEFAULT_ROOT, address=f"{sv.DEFAULT_HOST}:{DEFAULT_PORT}", status_seconds=60):
+    collector = Collector(root, *sv.parse_address(address, sv.DEFAULT_HOST, DEFAULT_PORT))
+
+    async def main():
+        await collector.start()
+        print(f"Collecting on {collector.host}:{collector.port} into {os.path.abspath(root)}")
+        while True:
+            await asyncio.sleep(status_seconds)
+            for line in collector.status():
+                print(line)
+
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        collector.close()
+
+def simulate_node(station, address=f"{sv.DEFAULT_HOST}:{DEFAULT_PORT}", channels=50, rate=1.0):
+    # Stand-in acquisition node for testing a collector (Ctrl+C to stop)
+    headers = ["Time of Day", "Test Time"] + [f"Temp {i}" for i in range(1, channels + 1)]
+    link = NodeLink(*sv.parse_address(address, sv.DEFAULT_HOST, DEFAULT_PORT), station, headers)
+    link.start()
+    start = time.time()
+    try:
+        while True:
+            elapsed = time.time() - start
+            link.add([datetime.now().strftime("%H:%M:%S"), round(elapsed/60, 2)] +
+                     [round(300 + 10*np.sin(elapsed/60 + i) + random.random(), 2) for i in range(channels)])
+            time.sleep(1/rate)
+    except KeyboardInterrupt:
+        link.stop()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) >= 2 and sys.argv[1] == "serve":
+        serve(*sys.argv[2:4])
+    elif len(sys.argv) >= 3 and sys.argv[1] == "node":
+        simulate_node(sys.argv[2], *sys.argv[3:4], *[float(v) if "." in v else int(v) for v in sys.argv[4:6]])
+    elif len(sys.argv) >= 4 and sys.argv[1] == "merge":
+        print(merge_csv(sys.argv[2], sys.argv[3], sys.argv[4:] or None), "rows")
+    else:
+        print(__doc__)
@@ -0,0 +1,210 @@
+"""
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+                                 HEADER
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+Title:       cumulative.py
+Origin Date: 10/19/2026
+Revised:     10/19/2026
+Author(s):   Russell Hedrick
+Contact:     rhedrick@frontierenergy.com
+Description:
+
+The following script keeps a cumulative index of the running test so energy
+rates, channel averages and durations over any range of samples are answered
+in constant time. Test time and the meter totals are kept per sample and the
+temperature columns as prefix sums (with prefix counts of valid samples), so
+a query only reads the two ends of the range. Indices count samples from the
+start (or last reset) of the test and are unaffected by the trimming of
+data_log. A session recovered from the journal only holds the rows still in
+memory: it starts at their first sample index, and ranges before it are
+reported as unavailable (IndexError) rather than answered from other rows.
+
+"""
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#                                   Imports
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+import numpy as np
+
+import core.alarms as al
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#                                  Constants
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# data_log columns of each meter total (same mapping as the energy rate calculator)
+METER_COLUMNS = {"Gas Meter": 6, "120V Meter": 5, "208V Meter": 4, "Water Meter": 7}
+KEPT_COLUMNS = [1, 4, 5, 6, 7, 8] # test time, Wh.208, Wh.120, Gas, Water, Extra
+BLOCK_ROWS = 3600 # samples per storage block
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#                           Classes & Functions
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+class CumulativeIndex:
+    """
+    Cumulative store of data_log rows in blocks of BLOCK_ROWS samples. For
+    sample i a block holds the test time and meter totals (KEPT_COLUMNS)
+    and the running sum and number of valid values of every temperature
+    column over samples 0..i, so the mean of a column over samples a..b is
+    (sums[b]-sums[a-1])/(counts[b]-counts[a-1]). Blocks are added as the
+    test grows and never copied. Ranges are inclusive and may be given as
+    sample indices or, through `find_time`, test times. Named ranges are
+    kept in `ranges` as name -> (start, end).
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self, offset=0):
+        # Drop every sample and named range (start of a test or reset);
+        # offset - index of the first sample that will be added
+        self.ranges = {}
+        self.offset = offset
+        self.n = 0
+        self.width = None
+        self.blocks = [] # (values, sums, counts) of BLOCK_ROWS samples each
+
+    def __len__(self):
+        # Samples recorded, including any before the offset
+        return self.offset + self.n
+
+    def _new_block(self):
+        n_temps = max(self.width - al.TC_OFFSET, 0)
+        self.blocks.append((np.full((BLOCK_ROWS, len(KEPT_COLUMNS)), np.nan),
+                            np.zeros((BLOCK_ROWS, n_temps)),
+                            np.zeros((BLOCK_ROWS, n_temps), dtype=np.int32)))
+
+    def _sample(self, index):
+        # (values, sums, counts) rows of one sample
+        index -= self.offset
+        values, sums, counts = self.blocks[index // BLOCK_ROWS]
+        row = index % BLOCK_ROWS
+        return values[row], sums[row], counts[row]
+
+    def append(self, row):
+        # Add one data_log row (the time of day string in column 0 is skipped)
+        self.extend([row])
+
+    def extend(self, rows):
+        # Add data_log rows in order
+        if not rows:
+            return
+        block = np.array([[np.nan] + list(row[1:]) for row in rows], dtype=float)
+        if self.width is None:
+            self.width = block.shape[1]
+        if block.shape[1] != self.width:
+            # The module count changed mid-test; pad or cut to the first width
+            fitted = np.full((len(block), self.width), np.nan)
+            width = min(self.width, block.shape[1])
+            fitted[:, :width] = block[:, :width]
+            block = fitted
+        temps = block[:, al.TC_OFFSET:]
+        valid = ~np.isnan(temps)
+        sums = np.cumsum(np.where(valid, temps, 0.0), axis=0)
+        counts = np.cumsum(valid, axis=0)
+        if self.n:
+            _, last_sums, last_counts = self._sample(len(self) - 1)
+            sums += last_sums
+            counts += last_counts
+        done = 0
+        while done < len(block):
+            k, row = divmod(self.n, BLOCK_ROWS)
+            if k == len(self.blocks):
+                self._new_block()
+            m = min(BLOCK_ROWS - row, len(block) - done)
+            values, block_sums, block_counts = self.blocks[k]
+            values[row:row + m] = block[done:done + m, KEPT_COLUMNS]
+            block_sums[row:row + m] = sums[done:done + m]
+            block_counts[row:row + m] = counts[done:done + m]
+            done += m
+            self.n += m
+
+    def _check(self, start, end):
+        # Validate an inclusive range of sample indices
+        if not self.offset <= start <= end < len(self):
+            raise IndexError(f"range {start}-{end} is outside samples {self.offset}-{len(self) - 1}")
+
+    def find_time(self, t):
+        """
+        Index of the first sample recorded at or after test time `t`
+        (minutes), or the last sample if `t` is past the end.
+        """
+        if self.n == 0:
+            raise IndexError("no samples recorded")
+        if self.offset and t < self.blocks[0][0][0, 0]:
+            raise IndexError(f"test time {t} is before the recovered samples")
+        # Block that may hold it (the next block starts at or after t)
+        firsts = np.array([values[0, 0] for values, _, _ in self.blocks])
+        k = max(int(np.searchsorted(firsts, t)) - 1, 0)
+        filled = min(BLOCK_ROWS, self.n - k*BLOCK_ROWS)
+        row = int(np.searchsorted(self.blocks[k][0][:filled, 0], t))
+        return self.offset + min(k*BLOCK_ROWS + row, self.n - 1)
+
+    def time(self, index):
+        # Test time (minutes) of a sample
+        self._check(index, index)
+        return float(self._sample(index)[0][0])
+
+    def duration(self, start, end):
+        # Test time (minutes) between two samples
+        self._check(start, end)
+        return float(self._sample(end)[0][0] - self._sample(start)[0][0])
+
+    def delta(self, column, start, end):
+        # Change of a meter total (data_log column 4-8) between two samples
+        self._check(start, end)
+        i = KEPT_COLUMNS.index(column)
+        return float(self._sample(end)[0][i] - self._sample(start)[0][i])
+
+    def energy_rate(self, meter, start, end, hhv=1, gcf=1):
+        """
+        Hourly rate of a meter ("Gas Meter", ... or a data_log column) over
+        samples start..end, scaled by the heating value and gas correction
+        factor as in the energy rate calculator.
+        """
+        column = METER_COLUMNS.get(meter, meter)
+        minutes = self.duration(start, end)
+        if minutes <= 0:
+            raise ZeroDivisionError("range has no duration")
+        return self.delta(column, start, end)*hhv*gcf/(minutes/60)
+
+    def mean(self, columns, start, end):
+        """
+        Average of temperature column(s) (data_log index) over samples
+        start..end, ignoring open channels. Several columns are averaged
+        together (e.g. a group of thermocouples); NaN when no valid value
+        was recorded.
+        """
+        self._check(start, end)
+        columns = np.atleast_1d(columns) - al.TC_OFFSET
+        if (columns < 0).any():
+            raise ValueError("only temperature columns are averaged")
+        _, sums, counts = self._sample(end)
+        total, count = sums[columns].sum(), counts[columns].sum()
+        if start > self.offset:
+            _, sums, counts = self._sample(start - 1)
+            total, count = total - sums[columns].sum(), count - counts[columns].sum()
+        return float(total/count) if count else float("nan")
+
+    def set_range(self, name, start, end):
+        # Store a named range of sample indices
+        self.ranges[name] = (int(start), int(end))
+
+    def remove_range(self, name):
+        self.ranges.pop(name, None)
+
+    def range_summary(self, name, meter="Gas Meter", hhv=1, gcf=1, columns=()):
+        """
+        Start/end time, duration, energy rate and the average of `columns` for
+        a named range. Values that cannot be computed (range outside the
+        recorded samples, no duration) are None.
+        """
+        start, end = self.ranges[name]
+        summary = {"start": start, "end": end, "start_time": None, "end_time": None,
+                   "duration": None, "energy_rate": None, "mean": None}
+        try:
+            summary["start_time"] = self.time(start)
+            summary["end_time"] = self.time(end)
+            summary["duration"] = self.duration(start, end)
+            if len(columns):
+                summary["mean"] = self.mean(columns, start, end)
+            summary["energy_rate"] = self.energy_rate(meter, start, end, hhv, gcf)
+        except (IndexError, ZeroDivisionError):
+            pass
+        return summary
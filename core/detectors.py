@@ -0,0 +1,199 @@
+"""
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+                                 HEADER
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+Title:       detectors.py
+Origin Date: 10/19/2026
+Revised:     10/19/2026
+Author(s):   Russell Hedrick
+Contact:     rhedrick@frontierenergy.com
+Description:
+
+The following script is designed to detect when an appliance has stabilized
+(end of preheat, steady idle rate, etc.). Sliding-window slope and variance
+are kept as running sums so every sample costs O(1) per channel regardless of
+the window length. Pulse meters are judged on their rate averaged over the
+window (from the cumulative totals), not on per-second pulse counts.
+
+"""
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#                                   Imports
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+import numpy as np
+
+import core.alarms as al
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#                                  Constants
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+RATE_NAMES = ["W", "Wh.120 Rate", "Gas Rate", "Water Rate", "Extra Rate"]
+TOTAL_OFFSET = 5 # index of the first pulse total (Wh.120) in data_log
+WATT_TOL = 10.0 # absolute tolerance of the modbus watts (W)
+RATE_FLOOR_PULSES = 2 # absolute tolerance of a pulse rate, in pulses per averaging window
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#                           Classes & Functions
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+class SlidingWindowStats:
+    """
+    Running least-squares slope, mean and variance over the last `window`
+    samples for several series at once. NaN samples are excluded from the
+    sums. The sums are rebuilt from the ring buffer once per window to keep
+    floating point drift from accumulating over multi-day tests.
+    """
+
+    def __init__(self, window, n_series):
+        self.window = window
+        self.n_series = n_series
+        self.t_buf = np.zeros(window)
+        self.y_buf = np.full((window, n_series), np.nan)
+        self.pos = 0
+        self.count = 0
+        self._rebuild()
+
+    def _contrib(self, t, y):
+        valid = ~np.isnan(y)
+        y0 = np.where(valid, y, 0.0)
+        t0 = np.where(valid, t, 0.0)
+        return valid.astype(float), t0, t0*t0, y0, t0*y0, y0*y0
+
+    def _rebuild(self):
+        # Recompute the sums directly from the buffer contents
+        filled = min(self.count, self.window)
+        t = self.t_buf[:filled, None]
+        y = self.y_buf[:filled]
+        self.sums = [c.sum(axis=0) for c in self._contrib(t, y)] if filled else \
+            [np.zeros(self.n_series) for _ in range(6)]
+
+    def push(self, t, y):
+        y = np.asarray(y, dtype=float)
+        if self.count >= self.window:
+            # Remove the sample being overwritten
+            for s, c in zip(self.sums, self._contrib(self.t_buf[self.pos], self.y_buf[self.pos])):
+                s -= c
+        self.t_buf[self.pos] = t
+        self.y_buf[self.pos] = y
+        for s, c in zip(self.sums, self._contrib(t, y)):
+            s += c
+        self.pos = (self.pos + 1) % self.window
+        self.count += 1
+        if self.pos == 0:
+            self._rebuild()
+
+    @property
+    def full(self):
+        return self.count >= self.window
+
+    def stats(self):
+        """ Returns (n, mean, slope, std) arrays, one entry per series. """
+        n, st, stt, sy, sty, syy = self.sums
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = sy/n
+            var = np.maximum(syy/n - mean*mean, 0.0)
+            denom = n*stt - st*st
+            slope = np.where(denom > 0, (n*sty - st*sy)/denom, np.nan)
+        return n, mean, slope, np.sqrt(var)
+
+    def reset(self):
+        self.y_buf[:] = np.nan
+        self.pos = 0
+        self.count = 0
+        self._rebuild()
+
+
+class SteadyStateDetector:
+    """
+    Tracks every temperature channel plus modbus watts and the pulse meter
+    rates (per hour). A pulse rate is the change of its cumulative total over
+    the last `window` samples, so a few pulses per second average out. A
+    series is stable once the window is full, its least-squares drift across
+    the window and its standard deviation are both within tolerance
+    (abs_tol + rel_tol*|mean|). Temperatures use an absolute tolerance (F);
+    rates a relative one with an absolute floor (WATT_TOL, and
+    RATE_FLOOR_PULSES pulses per window for the pulse meters).
+    """
+
+    def __init__(self, n_channels, window=300, temp_tol=1.0, rate_rel_tol=0.05):
+        self.names = RATE_NAMES + ["Ambient"] + [f"Temp {i}" for i in range(1, n_channels)]
+        n_rates = len(RATE_NAMES)
+        self.n_channels = n_channels
+        self.abs_tol = np.r_[WATT_TOL, np.zeros(n_rates - 1), np.full(n_channels, temp_tol)]
+        self.rel_tol = np.r_[np.full(n_rates, rate_rel_tol), np.zeros(n_channels)]
+        self.set_window(window)
+
+    def set_window(self, window):
+        self.stats = SlidingWindowStats(window, len(self.names))
+        # Pulse totals of the last window (+1) samples for the averaged rates
+        self.total_t = np.full(window + 1, np.nan)
+        self.totals = np.full((window + 1, len(RATE_NAMES) - 1), np.nan)
+        self.total_pos = 0
+        self.stable = np.zeros(len(self.names), dtype=bool)
+        self.stable_since = np.full(len(self.names), -1) # index where the stable window began
+        self.last_range = [None]*len(self.names) # (start, end) of the last completed stable run
+        self.index = -1
+
+    def reset(self):
+        self.set_window(self.stats.window)
+
+    def series(self, name):
+        return self.names.index(name)
+
+    def evaluate(self, t, values, index):
+        """
+        Push one sample (test time in minutes, series values) recorded at
+        data_log `index`. Returns (name, state, start index, end index) for
+        every series that became stable or stopped being stable.
+        """
+        self.stats.push(t, values)
+        self.index = index
+        n, mean, slope, std = self.stats.stats()
+        # Newest sample sits just behind the write position, oldest at it
+        span = self.stats.t_buf[self.stats.pos-1] - self.stats.t_buf[self.stats.pos]
+        tol = self.abs_tol + self.rel_tol*np.abs(mean)
+        with np.errstate(invalid="ignore"):
+            stable = self.stats.full & (n == self.stats.window) & \
+                (np.abs(slope*span) <= tol) & (std <= tol)
+        events = []
+        for i in np.nonzero(stable != self.stable)[0]:
+            if stable[i]:
+                self.stable_since[i] = index - self.stats.window + 1
+                events.append((self.names[i], "stable", int(self.stable_since[i]), index))
+            else:
+                self.last_range[i] = (int(self.stable_since[i]), index - 1)
+                events.append((self.names[i], "unstable", int(self.stable_since[i]), index - 1))
+                self.stable_since[i] = -1
+        self.stable = stable
+        return events
+
+    def average_rates(self, t, totals, pcfs):
+        """
+        Per-hour rates of the pulse totals over the last window (NaN until
+        the window is full) and sets their absolute tolerance floor.
+        """
+        oldest = (self.total_pos + 1) % len(self.total_t)
+        self.total_t[self.total_pos] = t
+        self.totals[self.total_pos] = totals
+        span = t - self.total_t[oldest] # minutes
+        with np.errstate(invalid="ignore", divide="ignore"):
+            rates = (self.totals[self.total_pos] - self.totals[oldest])/span*60
+            self.abs_tol[1:len(RATE_NAMES)] = RATE_FLOOR_PULSES*np.abs(pcfs)/span*60
+        self.total_pos = oldest
+        return rates
+
+    def update(self, data, test_time):
+        # Build the series vector from the latest data_log row
+        row = data.data_log[-1]
+        t = test_time.clock_time/60
+        totals = np.array(row[TOTAL_OFFSET:TOTAL_OFFSET+len(RATE_NAMES)-1], dtype=float)
+        rates = self.average_rates(t, totals, data.pcfs)
+        values = np.r_[row[3], rates, np.array(row[al.TC_OFFSET:al.TC_OFFSET+self.n_channels], dtype=float)]
+        values = np.pad(values, (0, len(self.names) - values.size), constant_values=np.nan)
+        return self.evaluate(t, values, data.current_index - 1)
+
+    def stable_range(self, name):
+        """
+        Returns the (start, end) index range of the current stable run, or of
+        the most recent completed run, or None if the series never settled.
+        """
+        i = self.series(name)
+        if self.stable[i]:
+            return int(self.stable_since[i]), self.index
+        return self.last_range[i]
@@ -19,9 +19,24 @@ file creation, file copying, data writing, etc.
 import sys
 import os
 import csv
+import json
+import time
+import queue
 import shutil
+import threading
+import gzip
+import io
 import pandas as pd
 from datetime import date
+
+import core.storage as st
+import core.catalog as ct
+import core.metrics as mt
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ Metrics ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+WRITE_SECONDS = mt.histogram("csv_write_seconds", "Time to write one batch of rows to the test file and its sinks")
+SYNC_SECONDS = mt.histogram("csv_fsync_seconds", "Time to flush and fsync the test file", buckets=mt.SLOW_BUCKETS)
+ROWS_WRITTEN = mt.counter("csv_rows_written_total", "Rows written to test files")
+WRITE_ERRORS = mt.counter("csv_write_errors_total", "Failed attempts to write the test file")
 #~~~~~~~~~~~~~~~~~~~~~~~~~~~ Creat File Directory  ~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 current_directory = None
 def create_directory():
@@ -30,6 +45,22 @@ def create_directory():
     if not os.path.exists(current_directory + "/Data"):
         os.mkdir(current_directory + "/Data")
         print("New Data directory added...\n")
+    open_catalog()
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ Test Catalog  ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+catalog = None
+def open_catalog():
+    global catalog
+    try:
+        catalog = ct.Catalog(current_directory + "/Data/" + ct.CATALOG_FILE)
+    except ct.sqlite3.Error as e:
+        print(f"Unable to open test catalog: {e}")
+        catalog = None
+
+def update_catalog(**fields):
+    # e.g. update_catalog(pcfs=data.pcfs) for the current test file
+    if catalog is not None and file_name is not None:
+        catalog.update(file_name, **fields)
 
 #~~~~~~~~~~~~~~~~~~~~~~~~~~ CSV File Setup Function ~~~~~~~~~~~~~~~~~~~~~~~~~~~
 file_name = None
@@ -53,57 +84,625 @@ def file_setup(testing, tc_modules):
                 headers.append("Temp {}".format(i))
 
             
-        for i in range(50):
-            if not os.path.isfile(os.getcwd() +'/'+ file_date +'_'+ str(i) + ".csv"):
-                file_name = file_date + '_' + str(i) + ".csv"
-                print("Adding new file: {}\n".format(file_name))
-                break
-            elif i==49:
-                print("Maximum files achieved for the day. Please remove some and try again.")
+        # Start from the catalog's next index; files not yet cataloged are skipped
+        i = catalog.next_index(file_date) if catalog is not None else 0
+        while os.path.isfile(os.getcwd() +'/'+ file_date +'_'+ str(i) + ".csv"):
+            i += 1
+        file_name = file_date + '_' + str(i) + ".csv"
+        print("Adding new file: {}\n".format(file_name))
         with open(file_name, 'a') as file_data:
             csvWriter = csv.writer(file_data, delimiter=',')
             csvWriter.writerow([file_date])
             csvWriter.writerow(headers)
+        open_writer()
     
-#~~~~~~~~~~~~~~~~~~~~~~~~~~~~ Create File Copy ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
-def copy_file():
-    global file_name
-    global current_directory
+def resume_file(name):
+    # Continue writing to an existing test file (session recovery)
     global file_name
+    os.chdir(current_directory + "/Data")
+    file_name = name
+    print("Resuming file: {}\n".format(file_name))
+    open_writer()
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~ Background CSV Writer ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+class CSVWriter:
+    """
+    Holds the test file open and writes rows from a queue on a background
+    thread so slow or unavailable (network) drives never block the UI timer.
+    The file is flushed and fsync'd every flush_interval seconds and whenever
+    flush() is requested, and the sinks are synced with it. Rows stay pending
+    until they are fsync'd and only then reach the sinks; after a failed
+    write the file is cut back to the last fsync and they are written again.
+    Long tests are split into segments: once the file reaches segment_bytes
+    or has been written for segment_seconds (0 = never) it is rotated into
+    a numbered segment, compressed in the background, and the test file
+    starts again with its date/header rows (see Segments below).
+    """
+    _SYNC = object() # periodic flush marker
+
+    def __init__(self, path, flush_interval=5.0, sinks=(), segment_bytes=0, segment_seconds=0):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.segment_bytes = segment_bytes
+        self.segment_seconds = segment_seconds
+        self.segment_start = time.monotonic()
+        self.segment_written = 0 # rows written to the current segment by this writer
+        # Objects with append(row)/sync()/set_headers(headers)/close() fed
+        # the same rows on this thread (storage.ColumnStore, catalog.CatalogRecorder)
+        self.sinks = list(sinks)
+        self.queue = queue.Queue()
+        self.pending = [] # rows not yet fsync'd to the file
+        self.unsynced = 0 # rows at the front of pending written but not yet fsync'd
+        self.synced_size = None # file size at the last fsync (None = not opened yet)
+        self.error = None # last write error (None when healthy)
+        self.rows_written = 0
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def write(self, row):
+        self.queue.put(list(row))
+
+    def set_headers(self, headers):
+        # Renamed channels for the sinks (applied on the writer thread)
+        self.queue.put(("headers", list(headers)))
+
+    def flush(self, wait=False, timeout=5.0):
+        # Request a flush + fsync; optionally block until it is on disk
+        done = threading.Event()
+        self.queue.put(done)
+        return done.wait(timeout) if wait else None
+
+    def close(self, timeout=5.0):
+        self.queue.put(None)
+        self.thread.join(timeout)
+
+    def _open(self):
+        """
+        Open the test file for appending. After a failed write, anything
+        past the last fsync (rows left in the old handle's buffer, a torn
+        line) is cut off first: those rows are still pending and are
+        written again.
+        """
+        if self.synced_size is not None and os.path.getsize(self.path) > self.synced_size:
+            with open(self.path, mode='r+b') as file:
+                file.truncate(self.synced_size)
+        file = open(self.path, 'a', newline='')
+        self.synced_size = os.path.getsize(self.path)
+        return file
+
+    def _feed_sinks(self, rows):
+        # Rows that are on disk in the test file; a failing sink never
+        # causes them to be written to the file again
+        for sink in self.sinks:
+            try:
+                for row in rows:
+                    sink.append(row)
+                sink.sync()
+            except OSError as e:
+                print(f"Unable to write {self.path} rows to {type(sink).__name__}: {e}")
+
+    def _run(self):
+        file, csvWriter = None, None
+        last_sync = time.monotonic()
+        while True:
+            timeout = max(0.0, self.flush_interval - (time.monotonic() - last_sync))
+            try:
+                batch = [self.queue.get(timeout=timeout)]
+            except queue.Empty:
+                batch = [self._SYNC]
+            # Drain everything already queued so rows are written in batches
+            while True:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = None in batch
+            waiters = [item for item in batch if isinstance(item, threading.Event)]
+            self.pending.extend(item for item in batch if isinstance(item, list))
+            for item in batch:
+                if isinstance(item, tuple):
+                    for sink in self.sinks:
+                        sink.set_headers(item[1])
+            try:
+                if file is None:
+                    file = self._open()
+                    csvWriter = csv.writer(file, delimiter=',')
+                # Rows stay pending until they are fsync'd
+                start = time.perf_counter()
+                for row in self.pending[self.unsynced:]:
+                    csvWriter.writerow(row)
+                if len(self.pending) > self.unsynced:
+                    WRITE_SECONDS.observe(time.perf_counter() - start)
+                    self.segment_written += len(self.pending) - self.unsynced
+                    self.unsynced = len(self.pending)
+                rotate = self._rotation_due(file)
+                if waiters or stop or rotate or time.monotonic() - last_sync >= self.flush_interval:
+                    with SYNC_SECONDS.time():
+                        file.flush()
+                        os.fsync(file.fileno())
+                    self.synced_size = os.fstat(file.fileno()).st_size
+                    synced, self.pending = self.pending[:self.unsynced], self.pending[self.unsynced:]
+                    self.unsynced = 0
+                    self.rows_written += len(synced)
+                    ROWS_WRITTEN.inc(len(synced))
+                    self._feed_sinks(synced)
+                    last_sync = time.monotonic()
+                    for waiter in waiters:
+                        waiter.set()
+                if rotate:
+                    self.synced_size = None # measured again when the new file is opened
+                    file = self._rotate(file)
+                    csvWriter = csv.writer(file, delimiter=',')
+                    self.synced_size = os.path.getsize(self.path)
+                self.error = None
+            except OSError as e:
+                # Drive unavailable: keep pending rows and reopen on the next cycle
+                WRITE_ERRORS.inc()
+                if self.error is None:
+                    print(f"Unable to write to {self.path}: {e}")
+                self.error = e
+                if file is not None:
+                    try:
+                        file.close()
+                    except OSError:
+                        pass
+                file = None
+                self.unsynced = 0 # written again after the file is cut back
+                last_sync = time.monotonic()
+            if stop:
+                if file is not None:
+                    file.close()
+                for sink in self.sinks:
+                    sink.close()
+                return
+
+    def _rotation_due(self, file):
+        if not self.segment_written:
+            return False
+        if self.segment_seconds and time.monotonic() - self.segment_start >= self.segment_seconds:
+            return True
+        if self.segment_bytes:
+            file.flush()
+            return os.fstat(file.fileno()).st_size >= self.segment_bytes
+        return False
+
+    def _rotate(self, file):
+        """
+        Close the current segment at a row boundary, move it to the next
+        segment name and start a new file with the same date/header rows.
+        Returns the new file, or the old one if the move failed (retried on
+        the next cycle).
+        """
+        file.flush()
+        os.fsync(file.fileno())
+        file.close()
+        with rotation_lock:
+            with open(self.path, mode='rb') as source:
+                head = b"".join(read_head(source))
+                data_bytes = os.fstat(source.fileno()).st_size - source.tell()
+                rows, first, last = 0, None, None
+                for line in source:
+                    if line.strip():
+                        rows += 1
+                        first, last = first or line, line
+                times = [line and line.split(b",", 1)[0].decode() for line in (first, last)]
+            segments = read_meta(self.path).get("segments", [])
+            segment_path = segment_file_name(self.path, len(segments))
+            try:
+                os.replace(self.path, segment_path)
+            except OSError as e:
+                print(f"Unable to rotate {self.path}: {e}")
+                self.segment_start = time.monotonic()
+                return open(self.path, 'a', newline='')
+            with open(self.path, mode='wb') as new_file:
+                new_file.write(head)
+            entry = {"file": os.path.basename(segment_path),
+                     "rows": rows,
+                     "data_bytes": data_bytes,
+                     "start": times[0],
+                     "end": times[1]}
+            update_meta(self.path, segments=segments + [entry])
+        threading.Thread(target=compress_segment, args=(self.path, len(segments)), daemon=True).start()
+        self.segment_start = time.monotonic()
+        self.segment_written = 0
+        return open(self.path, 'a', newline='')
+
+writer = None
+columnar = False # also keep a columnar binary copy of the test (see core/storage.py)
+segment_hours = 0 # rotate the test file every N hours (0 = never)
+segment_mb = 0 # rotate the test file once it reaches N MB (0 = never)
+def open_writer():
+    global writer
+    if writer is not None:
+        writer.close()
+    path = os.path.abspath(file_name)
+    with open(path, mode='r', newline='') as file:
+        file_date = next(row for row in csv.reader(file) if row)[0]
+    headers = read_headers(path)
+    sinks = []
+    if columnar:
+        sinks.append(st.ColumnStore(st.store_dir_name(path), file_date, headers))
+    if catalog is not None:
+        catalog.register(file_name, file_date, headers)
+        sinks.append(ct.CatalogRecorder(catalog.path, file_name, file_date, headers))
+    compress_pending(path)
+    writer = CSVWriter(path, sinks=sinks, segment_bytes=int(segment_mb*1e6),
+                       segment_seconds=segment_hours*3600)
+
+def flush_data(wait=False):
+    # Flush and fsync the test file (non-blocking unless wait is set)
+    if writer is not None:
+        return writer.flush(wait)
+
+def close_writer():
+    if writer is not None:
+        writer.close()
+    
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~ Create File Copy ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+class BackgroundJob:
+    """
+    Runs a copy/dump on its own thread so the UI timer never waits on disk.
+    progress - optional callable(message) for progress reports
+    """
+    name = "Job"
+    block_size = 1 << 20
+
+    def __init__(self, destination, progress=None):
+        self.destination = destination
+        self.progress = progress
+        self.thread = None
+        self.error = None
+
+    @property
+    def running(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def start(self, *args):
+        if self.running:
+            self.report(f"{self.name} already in progress")
+            return False
+        self.thread = threading.Thread(target=self._run_safe, args=args, daemon=True)
+        self.thread.start()
+        return True
+
+    def report(self, message):
+        if self.progress is not None:
+            self.progress(message)
+
+    def _run_safe(self, *args):
+        try:
+            self.error = None
+            self._run(*args)
+        except OSError as e:
+            self.error = e
+            self.report(f"{self.name} failed: {e}")
+
+
+class Snapshot(BackgroundJob):
+    """
+    Copy of the live test file cut at a complete row. The file is flushed
+    first and the copy ends at the last newline, so a half written row is
+    never captured. Segments of a long test are stitched in order. Repeated
+    snapshots of the same test only append the data bytes written since the
+    last one (a channel rename forces a full copy).
+    """
+    name = "File copy"
+
+    def __init__(self, destination, progress=None):
+        super().__init__(destination, progress)
+        self.source = None
+        self.copied = 0 # data bytes copied so far, across all segments
+        self.destination_size = 0
+        self.headers = None
+
+    def _row_boundary(self, file, size):
+        # End of the last complete line at or before size
+        pos = size
+        while pos > 0:
+            start = max(0, pos - 4096)
+            file.seek(start)
+            newline = file.read(pos - start).rfind(b"\n")
+            if newline >= 0:
+                return start + newline + 1
+            pos = start
+        return 0
+
+    def _open_parts(self, source):
+        """
+        Open every segment under the rotation lock so the layout cannot
+        change underneath the copy. Returns [(file, data offset, data bytes)].
+        """
+        parts = []
+        with rotation_lock:
+            segments = read_meta(source).get("segments", [])
+            for path, seg in zip(segment_files(source), segments):
+                file = open_segment(path)
+                read_head(file)
+                parts.append((file, file.tell(), seg["data_bytes"]))
+            file = open(source, mode='rb')
+            read_head(file)
+            offset = file.tell()
+            boundary = self._row_boundary(file, os.fstat(file.fileno()).st_size)
+            parts.append((file, offset, max(boundary - offset, 0)))
+        return parts
 
+    def _run(self, source):
+        flush_data(wait=True)
+        headers = read_headers(source)
+        parts = self._open_parts(source)
+        try:
+            total = sum(size for _, _, size in parts)
+            incremental = source == self.source and headers == self.headers and \
+                self.copied <= total and os.path.isfile(self.destination) and \
+                os.path.getsize(self.destination) == self.destination_size
+            if not incremental:
+                with open(source, mode='r', newline='') as text:
+                    file_date = next(row for row in csv.reader(text) if row)[0]
+                with open(self.destination, mode='w', newline='') as destination:
+                    csvWriter = csv.writer(destination)
+                    csvWriter.writerow([file_date])
+                    csvWriter.writerow(headers)
+                self.source, self.headers, self.copied = source, headers, 0
+            remaining = max(total - self.copied, 1)
+            skip, copied, reported = self.copied, 0, 0
+            with open(self.destination, mode='ab') as destination:
+                for file, offset, size in parts:
+                    if skip >= size:
+                        skip -= size
+                        continue
+                    file.seek(offset + skip)
+                    left, skip = size - skip, 0
+                    while left > 0:
+                        block = file.read(min(self.block_size, left))
+                        if not block:
+                            break
+                        destination.write(block)
+                        left -= len(block)
+                        copied += len(block)
+                        if copied*10//remaining > reported:
+                            reported = copied*10//remaining
+                            self.report(f"{self.name}: {reported*10}%")
+                destination.flush()
+                os.fsync(destination.fileno())
+            self.copied += copied
+            self.destination_size = os.path.getsize(self.destination)
+        finally:
+            for file, _, _ in parts:
+                file.close()
+        self.report(f"{self.name} {'updated' if incremental else 'created'}: "
+                    f"{os.path.basename(self.destination)} (+{copied} bytes)")
+
+snapshot = None
+def copy_file(progress=None):
+    # Snapshot of the current test file to Data/copy.csv (background thread)
+    global snapshot
     source_file = current_directory + "/Data/" + file_name
     destination_file = current_directory + "/Data/" + "copy.csv"
-
-    shutil.copy2(source_file, destination_file)
+    if snapshot is None or snapshot.destination != destination_file:
+        snapshot = Snapshot(destination_file)
+    snapshot.progress = progress
+    return snapshot.start(source_file)
 
 #~~~~~~~~~~~~~~~~~~~~~~~~~~~~ Data Write Functions ~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 def write_data(data, testing, time_to_write):
-    global file_name
     if testing and time_to_write:
-        with open(file_name, 'a', newline='') as file_data:
-            csvWriter = csv.writer(file_data, delimiter=',')
-            csvWriter.writerow(data)
+        writer.write(data)
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~ Event Logs  ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+def log_file_name(suffix):
+    # Event logs sit next to the test file, e.g. 08-06-24_0_alarms.csv
+    return os.path.splitext(file_name)[0] + f"_{suffix}.csv"
+
+def append_log(suffix, headers, rows):
+    if file_name is None or not rows:
+        return
+    log_file = log_file_name(suffix)
+    new_file = not os.path.isfile(log_file)
+    with open(log_file, 'a', newline='') as file_data:
+        csvWriter = csv.writer(file_data, delimiter=',')
+        if new_file:
+            csvWriter.writerow(headers)
+        csvWriter.writerows(rows)
+
+def write_alarms(events, time_data):
+    headers = ["Time of Day", "Test Time", "Channel", "Rule", "State", "Value"]
+    append_log("alarms", headers, [list(time_data) + list(event) for event in events])
+
+def write_procedure(events, time_data):
+    headers = ["Time of Day", "Test Time", "Event", "Message"]
+    append_log("procedure", headers, [list(time_data) + list(event) for event in events])
+
+group_headers = {} # header row last written to each group log
+def write_groups(names, rows):
+    # Channel group statistics; the header row is repeated when the groups change
+    if file_name is None:
+        return
+    headers = ["Time of Day", "Test Time"] + list(names)
+    log_file = log_file_name("groups")
+    if os.path.isfile(log_file) and group_headers.get(log_file, headers) != headers:
+        rows = [headers] + list(rows)
+    group_headers[log_file] = headers
+    append_log("groups", headers, rows)
 
 #~~~~~~~~~~~~~~~~~~~~~~~~~~~~ Data Dump  ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
-def data_dump(data, testing):
-    # cols = list(range(len(data[0]))) 
-    datar = pd.DataFrame(data)
+class DataDump(BackgroundJob):
+    """
+    Writes the in-memory data log in the background. The caller hands over a
+    shallow copy of data_log taken on the UI thread (rows are never modified
+    after they are appended), so the dump is a consistent cut. A repeated
+    dump appends only the rows logged after the last dumped row; when that
+    row is gone (test reset) the dump is rewritten.
+    """
+    name = "Data dump"
+    block_rows = 5000
+
+    def __init__(self, destination, progress=None):
+        super().__init__(destination, progress)
+        self.last_row = None # last row object written
+        self.rows_dumped = 0
+
+    def _run(self, rows):
+        start = 0
+        if self.last_row is not None and os.path.isfile(self.destination):
+            # Look for the last dumped row, newest first
+            start = next((len(rows) - i for i, row in enumerate(reversed(rows))
+                          if row is self.last_row), 0)
+        if start == 0:
+            self.rows_dumped = 0
+        new_rows = rows[start:]
+        for i in range(0, len(new_rows), self.block_rows):
+            block = new_rows[i:i+self.block_rows]
+            index = range(self.rows_dumped, self.rows_dumped + len(block))
+            pd.DataFrame(block, index=index).to_csv(
+                self.destination, mode='w' if self.rows_dumped == 0 else 'a',
+                header=self.rows_dumped == 0)
+            self.rows_dumped += len(block)
+            self.report(f"{self.name}: {min(i + self.block_rows, len(new_rows))}/{len(new_rows)} rows")
+        if new_rows:
+            self.last_row = new_rows[-1]
+        self.report(f"{self.name} {'appended' if start else 'written'}: {len(new_rows)} rows")
+
+dump = None
+def data_dump(data, testing, progress=None):
+    global dump
     destination_file = current_directory + "/Data/" + "data_dump.csv"
     if not testing:
-        datar.to_csv(destination_file)
+        if dump is None or dump.destination != destination_file:
+            dump = DataDump(destination_file)
+        dump.progress = progress
+        return dump.start(list(data))
        
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~ Channel Names  ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+"""
+Renamed channel headers are kept in a small sidecar file next to the test
+file (e.g. 08-06-24_0.meta.json) instead of rewriting the CSV, so a rename
+costs the same on a 10 row or a 10 million row file and can be done while
+recording. Readers and exports merge the sidecar names into the header row.
+"""
+def meta_file_name(path):
+    return os.path.splitext(path)[0] + ".meta.json"
+
+def read_meta(path):
+    try:
+        with open(meta_file_name(path), mode='r') as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+def write_meta(path, meta):
+    # Write to a temp file and swap it in so the sidecar is never half written
+    meta_path = meta_file_name(path)
+    with open(meta_path + ".tmp", mode='w') as file:
+        json.dump(meta, file)
+    os.replace(meta_path + ".tmp", meta_path)
+
+meta_lock = threading.Lock() # the writer thread records segments in the same sidecar
+def update_meta(path, **fields):
+    with meta_lock:
+        meta = read_meta(path)
+        meta.update(fields)
+        write_meta(path, meta)
+
 def write_headers(headers):
-    global file_name
-    # Read the CSV file into a list of lists
-    with open(file_name, mode='r', newline='') as file:
-        reader = csv.reader(file)
-        data = list(reader)
-    # Overwrite the first row (header)
-    data[2] = headers
-    # Write the updated data back to the CSV file
-    with open(file_name, mode='w', newline='') as file:
-        writer = csv.writer(file)
-        writer.writerows(data)
+    update_meta(file_name, headers=list(headers))
+    update_catalog(headers=list(headers))
+    if writer is not None:
+        writer.set_headers(headers)
+
+def read_headers(path):
+    # Header row of a test file with any renamed channels merged in
+    headers = read_meta(path).get("headers")
+    if headers is None:
+        with open(path, mode='r', newline='') as file:
+            rows = (row for row in csv.reader(file) if row)
+            next(rows)
+            headers = next(rows)
+    return headers
+
+def export_file(source_file, destination_file):
+    # Stream a copy of a test file (all segments) with the merged header row
+    headers = read_headers(source_file)
+    with open(source_file, mode='r', newline='') as source:
+        file_date = next(row for row in csv.reader(source) if row)[0]
+    with open(destination_file, mode='w', newline='') as destination:
+        csvWriter = csv.writer(destination)
+        csvWriter.writerow([file_date])
+        csvWriter.writerow(headers)
+        csvWriter.writerows(iter_rows(source_file))
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ Segments  ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+"""
+A long test is one logical file split into segments. The test file (e.g.
+08-06-24_0.csv) always holds the current segment with the usual date and
+header rows; completed segments are renamed to 08-06-24_0.seg000.csv, then
+gzip'd to 08-06-24_0.seg000.csv.gz by a background thread. The sidecar lists
+the segments in order with their row count, data byte count and first/last
+time of day, and the readers below stitch them back together.
+"""
+rotation_lock = threading.Lock() # held while a segment is moved out
+
+def segment_file_name(path, n):
+    return os.path.splitext(path)[0] + f".seg{n:03d}.csv"
+
+def read_head(file):
+    # File date and header lines of a test file opened in binary mode
+    head = []
+    while len(head) < 2:
+        line = file.readline()
+        if not line:
+            break
+        if line.strip():
+            head.append(line)
+    return head
+
+def open_segment(path):
+    return gzip.open(path, mode='rb') if path.endswith(".gz") else open(path, mode='rb')
+
+def segment_files(path):
+    # Completed segments in order followed by the current test file
+    directory = os.path.dirname(os.path.abspath(path))
+    return [os.path.join(directory, seg["file"]) for seg in read_meta(path).get("segments", [])] + [path]
+
+def iter_rows(path):
+    # Data rows (lists of strings) of every segment of a test, in order
+    for segment in segment_files(path):
+        with open_segment(segment) as file:
+            read_head(file)
+            text = io.TextIOWrapper(file, newline='')
+            for row in csv.reader(text):
+                if row:
+                    yield row
+
+def compress_segment(path, n):
+    """
+    Gzip segment n of the test at path, then point the sidecar at the .gz
+    and remove the plain segment. Safe to repeat after a crash.
+    """
+    plain = segment_file_name(path, n)
+    compressed = plain + ".gz"
+    try:
+        if os.path.isfile(plain):
+            with open(plain, mode='rb') as source, gzip.open(compressed + ".tmp", mode='wb') as target:
+                shutil.copyfileobj(source, target, 1 << 20)
+            with open(compressed + ".tmp", mode='rb+') as target:
+                os.fsync(target.fileno())
+            os.replace(compressed + ".tmp", compressed)
+        # Readers open segments under rotation_lock, so swap and remove under it
+        with rotation_lock:
+            with meta_lock:
+                meta = read_meta(path)
+                meta["segments"][n]["file"] = os.path.basename(compressed)
+                write_meta(path, meta)
+            if os.path.isfile(plain):
+                os.remove(plain)
+    except OSError as e:
+        print(f"Unable to compress {plain}: {e}")
+
+def compress_pending(path):
+    # Finish compressing segments left plain (e.g. by a crash)
+    for n, seg in enumerate(read_meta(path).get("segments", [])):
+        if not seg["file"].endswith(".gz"):
+            threading.Thread(target=compress_segment, args=(path, n), daemon=True).start()
 
 def read_config(config_file="default_config.csv"):
     file_path = current_directory + "/config/" + config_file
@@ -0,0 +1,196 @@
+"""
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+                                 HEADER
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+Title:       groups.py
+Origin Date: 10/19/2026
+Revised:     10/19/2026
+Author(s):   Russell Hedrick
+Contact:     rhedrick@frontierenergy.com
+Description:
+
+The following script is designed to track named groups of thermocouples
+(e.g. the zones of a griddle plate) and compute the mean, min, max and spread
+of every group in one masked NumPy pass per sample. Groups are read from the
+optional group_* columns of a config file or added from the data window, and
+their statistics feed the group log, the plot and a dedicated alarm engine.
+
+"""
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#                                   Imports
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+import re
+import numpy as np
+
+import core.alarms as al
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#                                  Constants
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+STATS = ("Avg", "Min", "Max", "Spread") # row order of the statistics arrays
+LOG_SECONDS = 5.0 # group log rows are written at least this often (the CSV writer's sync interval)
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#                           Classes & Functions
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+def parse_channels(spec):
+    """
+    Channel numbers of a group spec such as "1-4", "1,3,5" or "2-4, 9"
+    (0 = ambient, n = Temp n). Raises ValueError for anything else.
+    """
+    channels = []
+    for token in re.split(r"[,;\s]+", str(spec).strip()):
+        if not token:
+            continue
+        first, _, last = token.partition("-")
+        first = int(float(first))
+        last = int(float(last)) if last else first
+        if last < first:
+            raise ValueError(f"invalid channel range: {token}")
+        channels.extend(range(first, last + 1))
+    if not channels:
+        raise ValueError(f"no channels in group: {spec}")
+    return list(dict.fromkeys(channels))
+
+def format_channels(channels):
+    # Inverse of parse_channels, collapsing consecutive runs ("1-4,7")
+    runs = []
+    for channel in channels:
+        if runs and channel == runs[-1][1] + 1:
+            runs[-1][1] = channel
+        else:
+            runs.append([channel, channel])
+    return ",".join(str(a) if a == b else f"{a}-{b}" for a, b in runs)
+
+def group_stats(values, mask):
+    """
+    Mean, min, max and spread of each group in one masked pass.
+    values - (..., n_channels) temperatures, NaN for open channels
+    mask   - (n_groups, n_channels) channel membership
+    Returns an array (len(STATS), ..., n_groups); NaN where a group has no
+    valid channel.
+    """
+    values = np.asarray(values, dtype=float)[..., None, :]
+    valid = mask & ~np.isnan(values)
+    count = valid.sum(axis=-1)
+    total = np.where(valid, values, 0.0).sum(axis=-1)
+    lo = np.where(valid, values, np.inf).min(axis=-1, initial=np.inf)
+    hi = np.where(valid, values, -np.inf).max(axis=-1, initial=-np.inf)
+    empty = count == 0
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = total/count
+    lo[empty] = np.nan
+    hi[empty] = np.nan
+    return np.stack((mean, lo, hi, hi - lo))
+
+
+class ChannelGroups:
+    """
+    Named channel groups held as a boolean membership mask so every group is
+    evaluated with the same array operations. `stats` holds the statistics
+    of the latest sample (STATS x groups). Group alarms run on a separate
+    AlarmEngine whose channels are each group's Avg followed by each
+    group's Spread:
+    high/low - limits on the group mean (F)
+    spread   - maximum spread (max - min) within the group (F)
+    """
+
+    def __init__(self, n_channels):
+        self.n_channels = n_channels
+        self.names = []
+        self.channels = []
+        self.high = []
+        self.low = []
+        self.spread = []
+        self._rebuild()
+
+    def _rebuild(self):
+        # Recreate the mask, statistics and alarm engine after a group change
+        self.mask = np.zeros((len(self.names), self.n_channels), dtype=bool)
+        for i, channels in enumerate(self.channels):
+            self.mask[i, [c for c in channels if c < self.n_channels]] = True
+        self.stats = np.full((len(STATS), len(self.names)), np.nan)
+        self.alarms = al.AlarmEngine(max(2*len(self.names), 1))
+        self.alarms.names = [f"{name} Avg" for name in self.names] + \
+                            [f"{name} Spread" for name in self.names]
+        n = len(self.names)
+        self.alarms.high[:2*n] = self.high + self.spread
+        self.alarms.low[:n] = self.low
+
+    def set_group(self, name, channels, high=np.nan, low=np.nan, spread=np.nan):
+        # Add a group or redefine an existing one
+        channels = parse_channels(channels) if isinstance(channels, str) else list(channels)
+        if name in self.names:
+            i = self.names.index(name)
+            self.channels[i], self.high[i], self.low[i], self.spread[i] = channels, high, low, spread
+        else:
+            self.names.append(name)
+            self.channels.append(channels)
+            self.high.append(high)
+            self.low.append(low)
+            self.spread.append(spread)
+        self._rebuild()
+
+    def remove_group(self, name):
+        if name in self.names:
+            i = self.names.index(name)
+            for attr in (self.names, self.channels, self.high, self.low, self.spread):
+                attr.pop(i)
+            self._rebuild()
+
+    def load_config(self, configs):
+        """
+        Read groups from the optional group_name/group_channels columns of a
+        loaded config DataFrame (one group per row) with optional
+        group_high_alarm/group_low_alarm/group_spread_alarm limits. Replaces
+        the current groups when the config defines any.
+        """
+        if "group_name" not in configs or "group_channels" not in configs:
+            return
+        groups = []
+        for i, (name, spec) in enumerate(zip(configs["group_name"], configs["group_channels"])):
+            if not isinstance(name, str) or not name.strip():
+                continue
+            try:
+                channels = parse_channels(spec)
+            except ValueError as e:
+                print(f"Skipping channel group {name}: {e}")
+                continue
+            limits = [float(configs[column][i]) if column in configs else np.nan
+                      for column in ("group_high_alarm", "group_low_alarm", "group_spread_alarm")]
+            groups.append((name.strip(), channels, *limits))
+        if not groups:
+            return
+        for attr in (self.names, self.channels, self.high, self.low, self.spread):
+            attr.clear()
+        for name, channels, high, low, spread in groups:
+            self.names.append(name)
+            self.channels.append(channels)
+            self.high.append(high)
+            self.low.append(low)
+            self.spread.append(spread)
+        self._rebuild()
+
+    def columns(self, name):
+        # data_log columns of a group (for plotting)
+        return tuple(al.TC_OFFSET + c for c in self.channels[self.names.index(name)] if c < self.n_channels)
+
+    def update(self, row):
+        # Statistics of the temperature section of the latest data_log row
+        values = np.array(row[al.TC_OFFSET:al.TC_OFFSET + self.n_channels], dtype=float)
+        if values.size < self.n_channels:
+            values = np.pad(values, (0, self.n_channels - values.size), constant_values=np.nan)
+        self.stats = group_stats(values, self.mask)
+        return self.stats
+
+    def evaluate_alarms(self, t):
+        # Run the group alarm rules on the latest statistics
+        if not self.names:
+            return []
+        return self.alarms.evaluate(np.concatenate((self.stats[0], self.stats[3])), t)
+
+    def headers(self):
+        # Column names of the group log ("<group> Avg", "<group> Min", ...)
+        return [f"{name} {stat}" for name in self.names for stat in STATS]
+
+    def row(self):
+        # Latest statistics in headers() order (None where not available)
+        return [None if np.isnan(value) else round(float(value), 2) for value in self.stats.T.ravel()]
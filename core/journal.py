@@ -0,0 +1,334 @@
+"""
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+                                 HEADER
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+Title:       journal.py
+Origin Date: 10/19/2026
+Revised:     10/19/2026
+Author(s):   Russell Hedrick
+Contact:     rhedrick@frontierenergy.com
+Description:
+
+The following script is designed to keep a write-ahead journal of the live
+session so that a crash does not lose the in-memory data log. Every sample
+and control event (new file, start, reset, header rename, pulse reset, stop)
+is appended to a compact binary file, as are the channel group log rows until
+they are written. On startup the journal is replayed to
+rebuild the session and continue the same test file.
+
+Record layout: <type:u1><length:u4><payload><crc32(payload):u4>. Samples
+carry their absolute sample index (Data.current_index) so a recovered test
+keeps numbering its samples where it left off. A torn
+record at the end of the file (power loss mid-write) fails its CRC check and
+is ignored during recovery.
+
+"""
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#                                   Imports
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+import os
+import json
+import time
+import struct
+import zlib
+import queue
+import threading
+import numpy as np
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#                                  Constants
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+JOURNAL_FILE = "session.journal" # kept in the Data directory
+# Record types
+SAMPLE = 1
+FILE = 2
+HEADERS = 3
+START = 4
+RESET = 5
+PULSE_RESET = 6
+STOP = 7
+CLOSE = 8
+PCFS = 9
+GROUP_ROW = 10
+GROUPS_WRITTEN = 11
+
+RECORD_HEADER = struct.Struct("<BI")
+CRC = struct.Struct("<I")
+ORIGIN = struct.Struct("<d")
+INDEX = struct.Struct("<q")
+FOUR_FLOATS = struct.Struct("<4d")
+MAX_LOG = 21600 # rows kept in Data.data_log
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#                           Classes & Functions
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+def encode_sample(row, index):
+    # Sample index (i8), time of day as 8 ascii bytes, numeric columns as float64
+    tod = str(row[0]).encode("ascii")[:8].ljust(8)
+    return INDEX.pack(index) + tod + np.array(row[1:], dtype=float).tobytes()
+
+def encode_record(record_type, payload=b""):
+    return RECORD_HEADER.pack(record_type, len(payload)) + payload + CRC.pack(zlib.crc32(payload))
+
+def decode_samples(payloads):
+    # Decode equal length sample payloads in one pass; NaN becomes None.
+    # Returns (sample index of the first row, rows)
+    if not payloads:
+        return 0, []
+    n_values = (len(payloads[0]) - 16)//8
+    dtype = np.dtype([("index", "<i8"), ("tod", "S8"), ("values", "<f8", (n_values,))])
+    records = np.frombuffer(b"".join(payloads), dtype=dtype)
+    values = records["values"].astype(object)
+    values[np.isnan(records["values"])] = None
+    tods = [tod.decode("ascii").strip() for tod in records["tod"]]
+    return int(records["index"][0]), [[tod] + row for tod, row in zip(tods, values.tolist())]
+
+
+class Journal:
+    """
+    Append-only session journal. The caller's thread only encodes records;
+    a background thread appends them (the Data directory may be a slow
+    network drive), flushes them to the OS after every batch and fsyncs at
+    most every `sync_interval` seconds, or right away for start/reset/stop.
+    Compaction is queued the same way, so records queued after it land in
+    the rewritten journal.
+    """
+    _SYNC = object() # fsync request marker
+
+    def __init__(self, path, state=None, sync_interval=5.0):
+        self.path = path
+        self.sync_interval = sync_interval
+        self.samples = 0 # samples written since the last start/reset/compaction
+        # Mirror of the session state so the journal can compact itself.
+        # A fresh session truncates any journal left by a clean shutdown.
+        self.state = SessionState() if state is None else state
+        self.mode = "wb" if state is None else "ab"
+        self.good_size = None # journal size after the last successful write
+        self.error = None # last write error (None when healthy)
+        self.queue = queue.Queue()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def _write(self, record_type, payload=b""):
+        self.queue.put(encode_record(record_type, payload))
+
+    def sync(self):
+        # fsync once the records queued so far are written
+        self.queue.put(self._SYNC)
+
+    def _open(self):
+        # After a failed write, cut off the partly written batch first so
+        # later records do not follow a torn one
+        if self.good_size is not None and os.path.getsize(self.path) > self.good_size:
+            with open(self.path, "r+b") as file:
+                file.truncate(self.good_size)
+        file = open(self.path, self.mode)
+        self.mode = "ab"
+        return file
+
+    def _run(self):
+        file = None
+        last_sync = time.monotonic()
+        while True:
+            timeout = max(0.0, self.sync_interval - (time.monotonic() - last_sync))
+            try:
+                batch = [self.queue.get(timeout=timeout)]
+            except queue.Empty:
+                batch = [self._SYNC]
+            while True:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = any(item is None for item in batch)
+            try:
+                if file is None:
+                    file = self._open()
+                for item in batch:
+                    if isinstance(item, bytes):
+                        file.write(item)
+                    elif isinstance(item, tuple):
+                        file = self._compact(file, *item)
+                file.flush()
+                if stop or any(item is self._SYNC for item in batch) or \
+                        time.monotonic() - last_sync >= self.sync_interval:
+                    os.fsync(file.fileno())
+                    last_sync = time.monotonic()
+                self.good_size = file.tell()
+                self.error = None
+            except OSError as e:
+                # The records of this batch are lost; the next compaction
+                # rewrites the journal from the session state
+                if self.error is None:
+                    print(f"Unable to write session journal: {e}")
+                self.error = e
+                if file is not None:
+                    try:
+                        file.close()
+                    except OSError:
+                        pass
+                file = None
+                last_sync = time.monotonic()
+            if stop:
+                if file is not None:
+                    file.close()
+                return
+
+    #~~~~ Control events ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    def new_file(self, file_name):
+        self.state.file_name = file_name
+        self._write(FILE, file_name.encode("utf-8"))
+
+    def headers(self, headers):
+        self.state.headers = list(headers)
+        self._write(HEADERS, json.dumps(list(headers)).encode("utf-8"))
+
+    def pulse_reset(self, pulse_reset, pcfs):
+        self.state.pulse_reset = [float(x) for x in pulse_reset]
+        self.state.pcfs = [float(x) for x in pcfs]
+        self._write(PCFS, FOUR_FLOATS.pack(*self.state.pcfs))
+        self._write(PULSE_RESET, FOUR_FLOATS.pack(*self.state.pulse_reset))
+
+    def start(self, origin=None):
+        # origin: wall clock time (epoch seconds) of test time zero
+        self.state.origin = time.time() if origin is None else origin
+        self.state.testing = True
+        self.samples = 0
+        self._write(START, ORIGIN.pack(self.state.origin))
+        self.sync()
+
+    def reset(self, origin=None):
+        self.state.origin = time.time() if origin is None else origin
+        self.samples = 0
+        self._write(RESET, ORIGIN.pack(self.state.origin))
+        self.sync()
+
+    def stop(self):
+        self.state.testing = False
+        self._write(STOP)
+        self.sync()
+
+    def sample(self, row, index):
+        # index: absolute sample index of the row (Data.current_index - 1)
+        self._write(SAMPLE, encode_sample(row, index))
+        self.samples += 1
+
+    def group_row(self, headers, row):
+        # Channel group log row waiting to be written
+        self.state.group_rows.append((list(headers), list(row)))
+        self._write(GROUP_ROW, json.dumps([list(headers), list(row)]).encode("utf-8"))
+
+    def groups_written(self):
+        self.state.group_rows = []
+        self._write(GROUPS_WRITTEN)
+
+    #~~~~ Maintenance ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    def compact(self, data_log, n_samples):
+        """
+        Rewrite the journal as the current session state plus the rows still
+        held in data_log, so it never grows beyond ~2x the in-memory log.
+        n_samples - samples recorded so far (Data.current_index).
+        Only the snapshot is taken here; the writer thread encodes the rows
+        and swaps the files.
+        """
+        state = self.state
+        head = []
+        if state.file_name is not None:
+            head.append(encode_record(FILE, state.file_name.encode("utf-8")))
+        if state.headers is not None:
+            head.append(encode_record(HEADERS, json.dumps(state.headers).encode("utf-8")))
+        head.append(encode_record(PCFS, FOUR_FLOATS.pack(*state.pcfs)))
+        head.append(encode_record(PULSE_RESET, FOUR_FLOATS.pack(*state.pulse_reset)))
+        head.append(encode_record(START if state.testing else RESET, ORIGIN.pack(state.origin)))
+        rows = list(data_log[-MAX_LOG:]) # rows are never modified once logged
+        self.samples = len(rows)
+        self.queue.put((head, rows, n_samples - len(rows), list(state.group_rows)))
+
+    def _compact(self, file, head, rows, first_index, group_rows):
+        # Writer thread: write the snapshot to a tmp file and swap it in
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "wb") as new_file:
+            new_file.writelines(head)
+            new_file.writelines(encode_record(SAMPLE, encode_sample(row, first_index + i))
+                                for i, row in enumerate(rows))
+            new_file.writelines(encode_record(GROUP_ROW, json.dumps([list(headers), list(row)]).encode("utf-8"))
+                                for headers, row in group_rows)
+            new_file.flush()
+            os.fsync(new_file.fileno())
+        file.close()
+        os.replace(tmp_path, self.path)
+        return open(self.path, "ab")
+
+    def close(self, timeout=5.0):
+        # Clean shutdown: nothing to recover on the next start
+        self._write(CLOSE)
+        self.queue.put(None)
+        self.thread.join(timeout)
+
+
+class SessionState:
+
+    def __init__(self):
+        self.file_name = None
+        self.headers = None
+        self.pulse_reset = [0.0, 0.0, 0.0, 0.0]
+        self.pcfs = [1.0, 0.0125, 1.0, 1.0]
+        self.origin = time.time()
+        self.testing = False
+        self.rows = []
+        self.first_index = 0 # sample index of rows[0]
+        self.group_rows = [] # (headers, row) of group log rows not yet written
+        self.closed = False
+
+    def elapsed(self):
+        # Test time (s) since the recovered test-time origin
+        return time.time() - self.origin
+
+
+def recover(path):
+    """
+    Rebuild the session state from a journal. Returns None when there is no
+    journal or the previous session shut down cleanly.
+    """
+    if not os.path.isfile(path):
+        return None
+    with open(path, "rb") as file:
+        buffer = file.read()
+    state = SessionState()
+    rows = []
+    pos = 0
+    view = memoryview(buffer)
+    while pos + RECORD_HEADER.size <= len(buffer):
+        record_type, length = RECORD_HEADER.unpack_from(buffer, pos)
+        start = pos + RECORD_HEADER.size
+        end = start + length
+        if end + CRC.size > len(buffer):
+            break # torn record at the end of the file
+        payload = view[start:end]
+        if CRC.unpack_from(buffer, end)[0] != zlib.crc32(payload):
+            break
+        pos = end + CRC.size
+        if record_type == SAMPLE:
+            rows.append(payload)
+        elif record_type == FILE:
+            state.file_name = bytes(payload).decode("utf-8")
+        elif record_type == HEADERS:
+            state.headers = json.loads(bytes(payload).decode("utf-8"))
+        elif record_type in (START, RESET):
+            state.origin = ORIGIN.unpack(payload)[0]
+            state.testing = state.testing or record_type == START
+            rows = [] # data_log is cleared on start/reset
+        elif record_type == PULSE_RESET:
+            state.pulse_reset = list(FOUR_FLOATS.unpack(payload))
+        elif record_type == PCFS:
+            state.pcfs = list(FOUR_FLOATS.unpack(payload))
+        elif record_type == STOP:
+            state.testing = False
+        elif record_type == GROUP_ROW:
+            state.group_rows.append(tuple(json.loads(bytes(payload).decode("utf-8"))))
+        elif record_type == GROUPS_WRITTEN:
+            state.group_rows = []
+        state.closed = record_type == CLOSE
+    if state.closed or pos == 0:
+        return None
+    # Only decode the rows that fit in the in-memory log
+    state.first_index, state.rows = decode_samples([bytes(payload) for payload in rows[-MAX_LOG:]])
+    return state
@@ -0,0 +1,299 @@
+"""
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+                                 HEADER
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+Title:       metrics.py
+Origin Date: 10/19/2026
+Revised:     10/19/2026
+Author(s):   Russell Hedrick
+Contact:     rhedrick@frontierenergy.com
+Description:
+
+The following script is designed to keep health and latency metrics of the
+acquisition pipeline (NI reads, Modbus transactions, timer ticks, CSV writes,
+plot updates, queue depths) and export them in the Prometheus text format on
+a local port (Testzilla --metrics). Counters and histograms are updated by
+the modules that own the work; gauges of queue depths are read when the
+endpoint is scraped. Recording a value costs about a microsecond, so the
+metrics are always kept and only the endpoint is optional.
+
+"""
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#                                   Imports
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+import time
+import bisect
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#                                  Constants
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 9108
+PREFIX = "testzilla_"
+# Histogram bucket upper bounds (seconds)
+FAST_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+SLOW_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#                           Classes & Functions
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+def format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+def format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    """
+    One metric family. Unlabelled metrics are used directly (inc, set,
+    observe); labelled ones through labels("value", ...), which returns the
+    child for those label values (created on first use).
+    """
+    kind = None
+
+    def __init__(self, name, help, labels=()):
+        self.name = PREFIX + name
+        self.help = help
+        self.label_names = tuple(labels)
+        self.lock = threading.Lock()
+        self.children = {}
+        if not self.label_names:
+            self.children[()] = self._child()
+
+    def labels(self, *values):
+        values = tuple(str(v) for v in values)
+        child = self.children.get(values)
+        if child is None:
+            with self.lock:
+                child = self.children.setdefault(values, self._child())
+        return child
+
+    def __getattr__(self, attr):
+        # inc/set/observe/time of an unlabelled metric
+        children = self.__dict__.get("children", {})
+        if () not in children:
+            raise AttributeError(attr)
+        return getattr(children[()], attr)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for values, child in sorted(self.children.items()):
+            lines.extend(child.render(self.name, self.label_names, values))
+        return lines
+
+
+class _Value:
+    def __init__(self, lock):
+        self.lock = lock
+        self.value = 0
+
+    def inc(self, amount=1):
+        with self.lock:
+            self.value += amount
+
+    def set(self, value):
+        self.value = value
+
+    def render(self, name, names, values):
+        return [f"{name}{format_labels(names, values)} {format_value(self.value)}"]
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def _child(self):
+        return _Value(self.lock)
+
+
+class Gauge(Metric):
+    """
+    Gauge set by its owner, or read from `function` on every scrape (queue
+    depths and other values that already exist elsewhere).
+    """
+    kind = "gauge"
+
+    def __init__(self, name, help, labels=(), function=None):
+        self.function = function
+        super().__init__(name, help, labels)
+
+    def _child(self):
+        return _Value(self.lock)
+
+    def render(self):
+        if self.function is not None:
+            try:
+                self.children[()].value = self.function()
+            except Exception:
+                self.children[()].value = float("nan")
+        return super().render()
+
+
+class _Histogram:
+    def __init__(self, lock, buckets):
+        self.lock = lock
+        self.buckets = buckets
+        self.counts = [0]*(len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        i = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            self.counts[i] += 1
+            self.sum += value
+            self.count += 1
+
+    def time(self):
+        return Timer(self)
+
+    def render(self, name, names, values):
+        lines, total = [], 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            total += count
+            lines.append(f"{name}_bucket{format_labels(names, values, [('le', format_value(bound))])} {total}")
+        lines.append(f"{name}_sum{format_labels(names, values)} {format_value(self.sum)}")
+        lines.append(f"{name}_count{format_labels(names, values)} {self.count}")
+        return lines
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=FAST_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, help, labels)
+
+    def _child(self):
+        return _Histogram(self.lock, self.buckets)
+
+
+class Timer:
+    # with histogram.time(): ... observes the seconds spent in the block
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start)
+        return False
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = {}
+        self.lock = threading.Lock()
+
+    def register(self, metric):
+        # Return the metric already registered under the same name, if any
+        with self.lock:
+            return self.metrics.setdefault(metric.name, metric)
+
+    def render(self):
+        with self.lock:
+            metrics = list(self.metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+def counter(name, help, labels=()):
+    return REGISTRY.register(Counter(name, help, labels))
+
+def gauge(name, help, labels=(), function=None):
+    metric = REGISTRY.register(Gauge(name, help, labels))
+    if function is not None:
+        metric.function = function
+    return metric
+
+def histogram(name, help, labels=(), buckets=FAST_BUCKETS):
+    return REGISTRY.register(Histogram(name, help, labels, buckets))
+
+
+class TickMonitor:
+    """
+    Connected first to the acquisition timer: records the interval between
+    ticks and its deviation from the nominal period (jitter). Late ticks
+    (more than a period late) are also counted on their own. The profiler
+    reads `last_jitter` instead of timing the ticks again.
+    """
+
+    def __init__(self, period):
+        self.period = period
+        self.last = None
+        self.last_jitter = None # seconds, of the latest tick
+        buckets = tuple(period*f for f in (0.5, 0.9, 0.95, 0.99, 1.01, 1.05, 1.1, 1.5, 2, 5)) if period > 0 else SLOW_BUCKETS
+        self.intervals = histogram("tick_interval_seconds", "Time between acquisition timer ticks", buckets=buckets)
+        self.jitter = histogram("tick_jitter_seconds", "Absolute deviation of the tick interval from the timer period")
+        self.late = counter("ticks_late_total", "Ticks arriving more than one period late")
+
+    def tick(self):
+        now = time.perf_counter()
+        if self.last is not None:
+            interval = now - self.last
+            self.last_jitter = abs(interval - self.period)
+            self.intervals.observe(interval)
+            self.jitter.observe(self.last_jitter)
+            if interval > 2*self.period:
+                self.late.inc()
+        self.last = now
+
+
+class _Handler(BaseHTTPRequestHandler):
+    registry = REGISTRY
+
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = self.registry.render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass # scrapes are too frequent for the console
+
+
+class MetricsServer:
+    """
+    Serves REGISTRY at http://host:port/metrics from a background thread.
+    Bind to 127.0.0.1 (default) unless a Prometheus server on another
+    computer scrapes this station.
+    """
+
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        self.host = host
+        self.port = port
+        self.httpd = None
+
+    def start(self):
+        try:
+            self.httpd = ThreadingHTTPServer((self.host, self.port), _Handler)
+        except OSError as e:
+            print(f"Unable to start the metrics endpoint on {self.host}:{self.port}: {e}")
+            return False
+        self.httpd.daemon_threads = True
+        self.port = self.httpd.server_address[1]
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return True
+
+    def stop(self):
+        if self.httpd is not None:
+            self.httpd.shutdown()
+            self.httpd.server_close()
@@ -21,6 +21,15 @@ from pymodbus.constants import Endian
 from pymodbus.payload import BinaryPayloadDecoder 
 import serial
 import time
+
+import core.metrics as mt
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#                                   Metrics
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+TRANSACTION_SECONDS = mt.histogram("modbus_transaction_seconds", "Time to read all meter registers (successful reads)",
+                                   buckets=mt.SLOW_BUCKETS)
+ERRORS = mt.counter("modbus_errors_total", "Failed meter reads by cause", labels=("kind",))
+LAST_READ = mt.gauge("modbus_last_read_timestamp_seconds", "Unix time of the last successful meter read")
 #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 #                   Initialize modbus and connect to client
 #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
@@ -130,7 +139,10 @@ def data_stream(client, data):
     """
     while True:    
         try:
+            start = time.perf_counter()
             mb_data = list(get_all(client))
+            TRANSACTION_SECONDS.observe(time.perf_counter() - start)
+            LAST_READ.set(time.time())
             stack = data.mb_data
             if len(stack) > 0:
                 stack.pop(0)
@@ -138,13 +150,16 @@ def data_stream(client, data):
             time.sleep(0.1)
             data.mb_connected = True
         except TypeError:
-            pass
+            ERRORS.labels("no_response").inc()
         except serial.serialutil.SerialException: # Connection Lost
+            ERRORS.labels("connection_lost").inc()
             data.mb_connected = False
             time.sleep(1)
         except minimalmodbus.InvalidResponseError: # Invalid Response
+            ERRORS.labels("invalid_response").inc()
             pass # Ignore missed package 
         except Exception as e:
+            ERRORS.labels("other").inc()
             print(e)
 
 
@@ -24,6 +24,13 @@ import time
 
 import nidaqmx
 import nidaqmx.system
+
+import core.metrics as mt
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#                                   Metrics
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+TC_EMPTY_READS = mt.counter("ni_tc_empty_reads_total", "Thermocouple buffer reads that returned no samples (retried)")
+TC_READ_TIMEOUTS = mt.counter("ni_tc_read_timeouts_total", "Thermocouple reads that stayed empty after every retry")
 #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 #                   Create Task for each Device/Module
 #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
@@ -387,14 +394,16 @@ class NI:
         """
         Returns a *valid* list of temperature averages.
         Retries up to 'max_retries' times if buffer is empty.
-        Raises RunetimeError if still empty.
+        Raises RuntimeError if still empty.
         """
         for _ in range(max_retries):
             data = self._read_tc_continuous()
             if data.size:
                 return data.tolist()
+            TC_EMPTY_READS.inc()
             time.sleep(retry_delay)
-        raise RunetimeError("Thermocouple read timed-out: no data in buffer")
+        TC_READ_TIMEOUTS.inc()
+        raise RuntimeError("Thermocouple read timed-out: no data in buffer")
     #~~~~ Class method for reading data from NI-9226 module ~~~~~~~~~~~~~~~~~~~
     def read_rtd_data(self):
         data = []
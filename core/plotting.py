@@ -0,0 +1,540 @@
+"""
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+                                 HEADER
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+Title:       plotting.py
+Origin Date: 10/19/2026
+Revised:     10/19/2026
+Author(s):   Russell Hedrick
+Contact:     rhedrick@frontierenergy.com
+Description:
+
+The following script is designed to draw the live strip chart without
+clearing and re-plotting every second. New data_log rows are copied into a
+NumPy ring buffer, the plotted lines are persistent Line2D objects updated
+with set_data on views of that buffer, and only the lines are redrawn over a
+cached background (blitting). The axes are rescaled in steps, so the full
+figure is only redrawn when the data leaves the current limits or the
+channel selection changes.
+
+Every row is also folded into a min/max decimation pyramid, so the chart can
+show the whole test (or any zoomed window of it) at screen resolution: each
+level keeps the min and max of FACTOR buckets of the level below, and a query
+picks the finest level with no more buckets than the axes is pixels wide.
+Zooming and panning cost the same at hour 1 and hour 72.
+
+Lines can be placed on secondary (right-hand) y axes, e.g. W and V next to
+the temperatures, and can show the per-hour rate of a cumulative column
+(energy, gas, water) or a statistic of a channel group (core/groups.py),
+computed from the same buffer.
+
+"""
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#                                   Imports
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+import time
+import numpy as np
+
+import core.groups as gr
+import core.metrics as mt
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#                                  Constants
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+WINDOW = 3600 # samples shown on the strip chart
+X_MARGIN = 0.1 # room left on the right of the x axis (fraction of the span)
+Y_MARGIN = 0.1 # padding above/below the data (fraction of the data range)
+FACTOR = 4 # samples folded into one bucket of the next pyramid level
+RATE_WINDOW = 1.0 # minutes of history behind each plotted pulse/energy rate
+TWIN_OFFSET = 0.07 # spacing of additional right-hand y axes (fraction of the axes width)
+ZOOM_STEP = 1.25 # x span change per mouse wheel step
+DRAW_SECONDS = mt.histogram("plot_draw_seconds", "Strip chart render time (full redraw or blit of the lines)",
+                            labels=("kind",), buckets=mt.SLOW_BUCKETS)
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#                           Classes & Functions
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+class RingBuffer:
+    """
+    Last `window` data_log rows as float columns (data_log column c is
+    buffer column c-1; time of day is dropped). Every row is stored twice,
+    window apart, so the latest window is always one contiguous view.
+    """
+
+    def __init__(self, window=WINDOW):
+        self.window = window
+        self.buffer = None
+        self.count = 0
+        self.pos = 0
+        self.index = 0 # sample index (Data.current_index) of the last row copied in
+        self.last_row = None # last data_log row copied in
+
+    def reset(self):
+        self.count = 0
+        self.pos = 0
+        self.index = 0
+        self.last_row = None
+
+    def _push(self, values):
+        if self.buffer is None or self.buffer.shape[1] != values.shape[1]:
+            self.buffer = np.full((2*self.window, values.shape[1]), np.nan)
+            self.count = self.pos = 0
+        for value in values[-self.window:]:
+            self.buffer[self.pos] = value
+            self.buffer[self.pos + self.window] = value
+            self.pos = (self.pos + 1) % self.window
+            self.count += 1
+
+    def sync(self, data_log, index):
+        """
+        Copy the rows appended to data_log since the last call; index is the
+        monotonic sample counter of the last row (Data.current_index).
+        Returns (values, rebuilt): the new rows as a float array (None when
+        there are none) and whether the buffer was rebuilt from the whole
+        data_log. That only happens when the counter restarts (start, reset,
+        recovered session), never because of how many rows arrived.
+        """
+        if not data_log:
+            self.reset()
+            return None, True
+        new = index - self.index
+        if new == 0 and data_log[-1] is self.last_row:
+            return None, False
+        # The row before the new ones must be the last one copied in
+        rebuilt = not (0 < new < len(data_log) and data_log[-new - 1] is self.last_row)
+        if rebuilt:
+            self.reset()
+            new_rows = data_log
+        else:
+            new_rows = data_log[-new:]
+        values = np.array([row[1:] for row in new_rows], dtype=float)
+        self._push(values)
+        self.index = index
+        self.last_row = data_log[-1]
+        return values, rebuilt
+
+    def view(self):
+        # Latest rows, oldest first (a view, not a copy)
+        if self.count < self.window:
+            return self.buffer[:self.count]
+        return self.buffer[self.pos:self.pos + self.window]
+
+
+class Pyramid:
+    """
+    Min/max decimation of the whole test, kept up to date as rows arrive.
+    Level 0 holds every sample (float32); level k+1 holds one bucket per
+    FACTOR entries of level k (time of the first and last sample, min and
+    max of each column). Buckets are only built once complete, so the
+    newest few samples of a coarse level are read from the levels below.
+    """
+
+    def __init__(self, factor=FACTOR):
+        self.factor = factor
+        self.levels = []
+
+    def reset(self):
+        self.levels = []
+
+    def __len__(self):
+        return self.levels[0]["n"] if self.levels else 0
+
+    def _append(self, level, t, te, lo, hi):
+        # Append to a level's arrays, doubling their capacity when full
+        n, m = level["n"], len(t)
+        if n + m > len(level["t"]):
+            size = max(2*len(level["t"]), n + m, 1024)
+            for key in ("t", "te", "lo", "hi"):
+                if key in ("te", "hi") and level["raw"]:
+                    continue
+                grown = np.empty((size,) + level[key].shape[1:], dtype=level[key].dtype)
+                grown[:n] = level[key][:n]
+                level[key] = grown
+            if level["raw"]:
+                level["te"], level["hi"] = level["t"], level["lo"]
+        level["t"][n:n + m] = t
+        level["lo"][n:n + m] = lo
+        if not level["raw"]:
+            level["te"][n:n + m] = te
+            level["hi"][n:n + m] = hi
+        level["n"] = n + m
+
+    def _level(self, width, raw=False):
+        t, lo = np.empty(0), np.empty((0, width), dtype=np.float32)
+        return {"t": t, "te": t if raw else t.copy(), "lo": lo, "hi": lo if raw else lo.copy(),
+                "n": 0, "raw": raw}
+
+    def extend(self, values):
+        """
+        Add rows (float array; column 0 is test time, the rest are the
+        data_log columns after it).
+        """
+        if not len(values):
+            return
+        if self.levels and self.levels[0]["lo"].shape[1] != values.shape[1] - 1:
+            self.reset()
+        if not self.levels:
+            self.levels.append(self._level(values.shape[1] - 1, raw=True))
+        self._append(self.levels[0], values[:, 0], None, values[:, 1:], None)
+        k = 0
+        while True:
+            below = self.levels[k]
+            done = self.levels[k + 1]["n"]*self.factor if k + 1 < len(self.levels) else 0
+            blocks = (below["n"] - done)//self.factor
+            if blocks == 0:
+                break
+            if k + 1 == len(self.levels):
+                self.levels.append(self._level(below["lo"].shape[1]))
+            stop = done + blocks*self.factor
+            shape = (blocks, self.factor, below["lo"].shape[1])
+            # fmin/fmax skip open channels (NaN) unless the whole bucket is open
+            lo = np.fmin.reduce(below["lo"][done:stop].reshape(shape), axis=1)
+            hi = np.fmax.reduce(below["hi"][done:stop].reshape(shape), axis=1)
+            self._append(self.levels[k + 1], below["t"][done:stop:self.factor],
+                         below["te"][done + self.factor - 1:stop:self.factor], lo, hi)
+            k += 1
+
+    def span(self):
+        # (first, last) test time held
+        if not len(self):
+            return None
+        level = self.levels[0]
+        return level["t"][0], level["t"][level["n"] - 1]
+
+    def query(self, t0, t1, columns, max_buckets, last=False):
+        """
+        Returns (t, y) for the data_log columns between test times t0 and t1
+        with at most about 2*max_buckets points per column: the finest level
+        that fits, plus the newest samples it does not cover yet. Decimated
+        buckets are drawn as a min and a max point at the bucket time, or
+        with last on as one point at the time of their last sample holding
+        the max (the last value of a cumulative column, for rates).
+        """
+        cols = [c - 2 for c in columns] # data_log column -> level column
+        if not len(self):
+            return np.empty(0), np.empty((0, len(cols)))
+        top = 0
+        for k, level in enumerate(self.levels):
+            t = level["t"][:level["n"]]
+            if np.searchsorted(t, t1, "right") - np.searchsorted(t, t0, "left") <= max_buckets:
+                top = k
+                break
+        else:
+            top = len(self.levels) - 1
+        parts_t, parts_y = [], []
+        for k in range(top, -1, -1):
+            level = self.levels[k]
+            start = 0
+            if k < top:
+                # Entries already folded into the level above were drawn from it
+                start = self.levels[k + 1]["n"]*self.factor
+            t = level["t"][start:level["n"]]
+            i0 = start + np.searchsorted(t, t0, "left")
+            i1 = start + np.searchsorted(t, t1, "right")
+            if k > 0 and i0 > start:
+                i0 -= 1 # bucket that starts before t0 but reaches into it
+            if i1 <= i0:
+                continue
+            if level["raw"] or last:
+                parts_t.append(level["te"][i0:i1])
+                parts_y.append(level["hi"][i0:i1, cols])
+            else:
+                parts_t.append(np.repeat(level["t"][i0:i1], 2))
+                y = np.empty((2*(i1 - i0), len(cols)), dtype=np.float32)
+                y[0::2] = level["lo"][i0:i1, cols]
+                y[1::2] = level["hi"][i0:i1, cols]
+                parts_y.append(y)
+        if not parts_t:
+            return np.empty(0), np.empty((0, len(cols)))
+        return np.concatenate(parts_t), np.concatenate(parts_y)
+
+
+def source_columns(column):
+    # data_log columns a plotted line is computed from
+    if not isinstance(column, tuple):
+        return (column,)
+    if column[0] == "rate":
+        return (column[1],)
+    return tuple(column[2])
+
+def rate(t, total, window=RATE_WINDOW):
+    """
+    Per-hour rate of a cumulative column (test time in minutes) against
+    the latest point at least `window` minutes earlier, so points spaced
+    wider than the window (coarse history) use their neighbour; NaN until
+    a window of history exists. Expects one value per time (not min/max
+    envelopes).
+    """
+    j = np.searchsorted(t, t - window + 1e-6, "right") - 1 # 1e-6: rounded test times
+    earlier = np.maximum(j, 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rates = (total - total[earlier])/(t - t[earlier])*60
+    rates[j < 0] = np.nan
+    return rates
+
+
+class ZoomPan:
+    """
+    Mouse zoom/pan of the time (x) axis: the wheel zooms around the cursor,
+    dragging pans and a double click resets. callback(t0, t1) receives the
+    new view ((None, None) on reset) and enabled() gates the handling.
+    """
+
+    def __init__(self, canvas, ax, callback, enabled=None):
+        self.ax = ax
+        self.callback = callback
+        self.enabled = enabled or (lambda: True)
+        self.drag = None
+        canvas.mpl_connect("scroll_event", self._on_scroll)
+        canvas.mpl_connect("button_press_event", self._on_press)
+        canvas.mpl_connect("motion_notify_event", self._on_motion)
+        canvas.mpl_connect("button_release_event", self._on_release)
+
+    def _in_axes(self, event):
+        # The axes or one of its twins (they share x and sit on top of it)
+        return event.inaxes is not None and event.inaxes.get_shared_x_axes().joined(event.inaxes, self.ax)
+
+    def _on_scroll(self, event):
+        if not self.enabled() or not self._in_axes(event) or event.xdata is None:
+            return
+        x0, x1 = self.ax.get_xlim()
+        scale = 1/ZOOM_STEP if event.button == "up" else ZOOM_STEP
+        self.callback(event.xdata - (event.xdata - x0)*scale, event.xdata + (x1 - event.xdata)*scale)
+
+    def _on_press(self, event):
+        if not self.enabled() or not self._in_axes(event) or event.button != 1:
+            return
+        if event.dblclick:
+            self.drag = None
+            self.callback(None, None)
+        else:
+            self.drag = (event.x, self.ax.get_xlim())
+
+    def _on_motion(self, event):
+        if self.drag is None:
+            return
+        x, (x0, x1) = self.drag
+        shift = (event.x - x)*(x1 - x0)/max(self.ax.bbox.width, 1.0)
+        self.callback(x0 - shift, x1 - shift)
+
+    def _on_release(self, event):
+        self.drag = None
+
+
+class StripChart:
+    """
+    Persistent lines on a matplotlib axes drawn by blitting.
+    style - callable(ax, lines, twins) that applies the axes formatting (run
+    on redraws; lines for the legend, twins = visible secondary axes)
+
+    By default the chart follows the last `window` samples. With history on
+    it shows the whole test from the decimation pyramid; the mouse wheel
+    zooms the time axis, dragging pans it and a double click returns to the
+    whole test.
+    """
+
+    def __init__(self, canvas, ax, style=None, window=WINDOW):
+        self.canvas = canvas
+        self.ax = ax
+        self.style = style
+        self.buffer = RingBuffer(window)
+        self.pyramid = Pyramid()
+        self.history = False
+        self.view = None # zoomed (t0, t1) in history mode (None = whole test)
+        self.lines = []
+        self.columns = None
+        self.labels = None
+        self.axes = None # axis name per line (None = main axis)
+        self.twins = {} # axis name -> secondary axes (created on first use)
+        self.ylim = None # fixed y limits of the main axis (None = autoscale)
+        self.background = None
+        self.needs_redraw = True
+        self.redraws = 0
+        canvas.mpl_connect("draw_event", self._on_draw)
+        self.zoom = ZoomPan(canvas, ax, self.set_view, enabled=lambda: self.history)
+
+    def _on_draw(self, event):
+        # Cache everything but the lines, then draw the lines on top
+        self.background = self.canvas.copy_from_bbox(self.ax.bbox)
+        for line in self.lines:
+            self.ax.draw_artist(line)
+
+    def set_lines(self, columns, labels, ylim=None, axes=None):
+        """
+        Recreate the lines when the channel selection changes.
+        columns - data_log column per line, ("rate", column) for the
+                  per-hour rate of a cumulative column, or
+                  ("group", stat, columns) for a statistic of a channel group
+        axes    - axis name per line; lines sharing a name share a right-hand
+                  y axis (None = main axis)
+        """
+        axes = [None]*len(columns) if axes is None else list(axes)
+        if columns == self.columns and labels == self.labels and axes == self.axes and ylim == self.ylim:
+            return
+        if columns != self.columns or labels != self.labels or axes != self.axes:
+            for line in self.lines:
+                line.remove()
+            for name in axes:
+                if name is not None and name not in self.twins:
+                    twin = self.ax.twinx()
+                    twin.set_ylabel(name)
+                    self.twins[name] = twin
+            for name, twin in self.twins.items():
+                twin.set_visible(name in axes)
+            # Offset each extra right-hand axis so their ticks do not overlap
+            visible = self.visible_twins()
+            for k, twin in enumerate(visible):
+                twin.spines["right"].set_position(("axes", 1 + TWIN_OFFSET*k))
+            self.ax.figure.subplots_adjust(right=0.9 - 0.06*max(len(visible) - 1, 0))
+            colors = [f"C{i}" for i in range(len(labels))]
+            self.lines = [(self.ax if name is None else self.twins[name]).plot(
+                              [], [], label=label, lw=0.75, animated=True, color=color)[0]
+                          for label, name, color in zip(labels, axes, colors)]
+            self.columns, self.labels, self.axes = list(columns), list(labels), axes
+        self.ylim = ylim
+        self.needs_redraw = True
+
+    def visible_twins(self):
+        return [self.twins[name] for name in dict.fromkeys(self.axes or []) if name is not None]
+
+    def set_history(self, history):
+        # Switch between the last window and the whole test
+        if history != self.history:
+            self.history = history
+            self.view = None
+            self.needs_redraw = True
+
+    #~~~ VIEW (history mode) ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    def set_view(self, t0, t1):
+        """
+        Show test times t0..t1 (None, None = the whole test). Views that
+        cover the whole test go back to following it.
+        """
+        span = self.pyramid.span()
+        if t0 is not None and span is not None and t0 <= span[0] and t1 >= span[1]:
+            t0 = t1 = None
+        self.view = None if t0 is None else (t0, t1)
+        self.needs_redraw = True
+        self.render()
+
+    #~~~ DRAWING ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    def _rescale_x(self, t):
+        """
+        x grows in steps of X_MARGIN of the span (or is pinned to a zoomed
+        view). Returns True when the limits changed.
+        """
+        x0, x1 = self.ax.get_xlim()
+        if self.history and self.view is not None:
+            if self.needs_redraw:
+                self.ax.set_xlim(self.view)
+                return True
+            return False
+        if self.needs_redraw or t[-1] > x1 or t[0] < x0:
+            span = max(t[-1] - t[0], 1.0)
+            self.ax.set_xlim(t[0], t[-1] + X_MARGIN*span)
+            return True
+        return False
+
+    def _rescale_y(self, ax, ys, force, ylim=None):
+        """
+        y follows the data with Y_MARGIN padding and tightens again once the
+        data uses less than half the axis. Returns True when it changed.
+        """
+        if ylim is not None:
+            if force:
+                ax.set_ylim(ylim)
+            return force
+        ys = [y for y in ys if len(y)]
+        if not ys:
+            return False
+        # fmin/fmax skip open channels without an all-NaN warning
+        lo = np.fmin.reduce([np.fmin.reduce(y) for y in ys])
+        hi = np.fmax.reduce([np.fmax.reduce(y) for y in ys])
+        if np.isnan(lo):
+            return False
+        y0, y1 = ax.get_ylim()
+        pad = max((hi - lo)*Y_MARGIN, 0.5)
+        if force or lo < y0 or hi > y1 or (hi - lo + 2*pad) < 0.5*(y1 - y0):
+            ax.set_ylim(lo - pad, hi + pad)
+            return True
+        return False
+
+    def feed(self, data_log, index):
+        """
+        Fold the new data_log rows into the ring buffer and the pyramid.
+        Called on every acquisition tick (index = Data.current_index), so
+        the whole-test history does not depend on how often, or whether,
+        the chart is drawn.
+        """
+        values, rebuilt = self.buffer.sync(data_log, index)
+        if rebuilt:
+            self.pyramid.reset()
+            self.view = None
+        if values is not None:
+            self.pyramid.extend(values)
+
+    def _series(self):
+        """
+        (t, x per line, y per line) to plot. Raw columns of the live window
+        stay views of the ring buffer (no copy); history comes from a
+        pyramid query. Rates in history are computed from the last value
+        of each bucket (a second query), never from the min/max envelope.
+        """
+        raw = list(dict.fromkeys(column for c in self.columns for column in source_columns(c)))
+        totals = list(dict.fromkeys(c[1] for c in self.columns if isinstance(c, tuple) and c[0] == "rate"))
+        if not self.history:
+            view = self.buffer.view()
+            t, source = view[:, 0], {c: view[:, c - 1] for c in raw}
+            t_last, last = t, source
+        else:
+            t0, t1 = self.pyramid.span() if self.view is None else self.view
+            width = max(int(self.ax.bbox.width), 100)
+            t, y = self.pyramid.query(t0, t1, raw, width)
+            source = {c: y[:, i] for i, c in enumerate(raw)}
+            if totals:
+                t_last, y = self.pyramid.query(t0, t1, totals, width, last=True)
+                last = {c: y[:, i] for i, c in enumerate(totals)}
+        xs, ys = [], []
+        for c in self.columns:
+            if not isinstance(c, tuple):
+                xs.append(t)
+                ys.append(source[c])
+            elif c[0] == "rate":
+                xs.append(t_last)
+                ys.append(rate(t_last, last[c[1]]))
+            else:
+                values = np.column_stack([source[column] for column in c[2]])
+                mask = np.ones((1, len(c[2])), dtype=bool)
+                xs.append(t)
+                ys.append(gr.group_stats(values, mask)[gr.STATS.index(c[1]), :, 0])
+        return t, xs, ys
+
+    def render(self):
+        if not self.buffer.count or not self.lines:
+            return
+        start = time.perf_counter()
+        t, xs, ys = self._series()
+        for line, x, y in zip(self.lines, xs, ys):
+            line.set_data(x, y)
+        changed = len(t) > 0 and self._rescale_x(t)
+        force = self.needs_redraw or changed
+        changed |= self._rescale_y(self.ax, [y for y, name in zip(ys, self.axes) if name is None],
+                                   force, self.ylim)
+        for name, twin in self.twins.items():
+            if name in self.axes:
+                changed |= self._rescale_y(twin, [y for y, axis in zip(ys, self.axes) if axis == name], force)
+        if changed or self.needs_redraw or self.background is None:
+            self.draw()
+            DRAW_SECONDS.labels("full").observe(time.perf_counter() - start)
+        else:
+            self.canvas.restore_region(self.background)
+            for line in self.lines:
+                self.ax.draw_artist(line)
+            self.canvas.blit(self.ax.bbox)
+            DRAW_SECONDS.labels("blit").observe(time.perf_counter() - start)
+
+    def draw(self):
+        # Full redraw: refresh the styling/legend and recache the background
+        if self.style is not None:
+            self.style(self.ax, self.lines, self.visible_twins())
+        self.needs_redraw = False
+        self.redraws += 1
+        self.canvas.draw()
@@ -0,0 +1,182 @@
+"""
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+                                 HEADER
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+Title:       procedures.py
+Origin Date: 10/19/2026
+Revised:     10/19/2026
+Author(s):   Russell Hedrick
+Contact:     rhedrick@frontierenergy.com
+Description:
+
+The following script is designed to run cooking test protocols (fryer and
+griddle/burger tests) as state machines on the live data stream. Load-in is
+detected from the drop in cooking surface/oil temperature and cook-complete
+from its recovery. Each phase is timestamped and per-load energy and
+productivity are computed as the data arrives.
+
+"""
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#                                   Imports
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+import numpy as np
+
+import core.alarms as al
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#                                  Constants
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# data_log columns of each meter total (same mapping as the energy rate calculator)
+METER_COLUMNS = {"Gas Meter": 6, "120V Meter": 5, "208V Meter": 4, "Water Meter": 7}
+# Procedure states
+PREHEAT = "preheat"     # waiting for the control temperature to reach setpoint
+READY = "ready"         # at setpoint, waiting for a load
+COOKING = "cooking"     # load detected, waiting for temperature recovery
+COMPLETE = "complete"   # all loads cooked
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#                           Classes & Functions
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+class TestProcedure:
+    """
+    Generic load/recover state machine.
+    channels       - temperature channels averaged into the control temperature
+    setpoint       - thermostat setpoint (F)
+    ready_band     - control temp within setpoint-ready_band counts as ready
+    load_drop      - drop below setpoint (F) that marks a load-in
+    recovery_band  - control temp back within setpoint-recovery_band = cooked
+    min_cook_time  - minimum cook time (min) before recovery is accepted
+    load_weight    - weight of food per load (lb)
+    n_loads        - number of loads in the test
+    meter          - meter used for per-load energy (see METER_COLUMNS)
+    n_channels     - temperature channels recorded (Ambient + thermocouples);
+                     channels outside 0..n_channels-1 raise ValueError
+    """
+    name = "Procedure"
+
+    def __init__(self, channels, setpoint, load_weight, n_loads=3, meter="Gas Meter",
+                 ready_band=5.0, load_drop=15.0, recovery_band=5.0, min_cook_time=1.0,
+                 hhv=1.0, gcf=1.0, n_channels=None):
+        self.channels = np.asarray(channels, dtype=int)
+        if n_channels is not None and len(self.channels) and \
+                (self.channels.min() < 0 or self.channels.max() >= n_channels):
+            raise ValueError(f"channels must be 0-{n_channels - 1} on this station")
+        self.setpoint = setpoint
+        self.load_weight = load_weight
+        self.n_loads = n_loads
+        self.meter_ix = METER_COLUMNS[meter]
+        self.ready_band = ready_band
+        self.load_drop = load_drop
+        self.recovery_band = recovery_band
+        self.min_cook_time = min_cook_time
+        self.energy_factor = hhv*gcf
+        self.reset()
+
+    def reset(self):
+        self.state = PREHEAT
+        self.loads = [] # one dict per completed load
+        self.load_start = None # (test time, meter total, index) at load-in
+        self.min_temp = None # lowest control temperature of the current load
+        self.control_temp = None
+
+    def _control_temp(self, row):
+        temps = np.array([row[al.TC_OFFSET+c] for c in self.channels], dtype=float)
+        return np.nanmean(temps) if np.any(~np.isnan(temps)) else np.nan
+
+    def evaluate(self, row, index):
+        """
+        Advance the state machine with one data_log row recorded at data_log
+        `index`. Returns a list of (event, message) tuples for phase changes.
+        """
+        t, meter = row[1], row[self.meter_ix]
+        temp = self._control_temp(row)
+        self.control_temp = temp
+        if np.isnan(temp) or self.state == COMPLETE:
+            return []
+        events = []
+        if self.state == PREHEAT and temp >= self.setpoint - self.ready_band:
+            self.state = READY
+            events.append(("ready", f"{self.name} ready at {temp:.1f} F"))
+        elif self.state == READY and temp <= self.setpoint - self.load_drop:
+            self.state = COOKING
+            self.load_start = (t, meter, index)
+            self.min_temp = temp
+            events.append(("load in", f"{self.name} load {len(self.loads)+1} in"))
+        elif self.state == COOKING:
+            self.min_temp = min(self.min_temp, temp)
+            cook_time = t - self.load_start[0]
+            if cook_time >= self.min_cook_time and temp >= self.setpoint - self.recovery_band:
+                load = self._complete_load(t, meter, index)
+                events.append(("cook complete", f"{self.name} load {len(self.loads)} complete: "
+                               f"{load['cook_time']:.2f} min, {load['energy']:.1f} energy, "
+                               f"{load['productivity']:.1f} lb/h"))
+                self.state = COMPLETE if len(self.loads) >= self.n_loads else READY
+        return events
+
+    def _complete_load(self, t, meter, index):
+        t0, meter0, index0 = self.load_start
+        cook_time = t - t0
+        load = {"load": len(self.loads) + 1,
+                "start_index": index0,
+                "end_index": index,
+                "start_time": t0,
+                "end_time": t,
+                "cook_time": cook_time,
+                "min_temp": round(float(self.min_temp), 1),
+                "energy": float(meter - meter0)*self.energy_factor,
+                "productivity": self.load_weight*60/cook_time if cook_time > 0 else 0.0}
+        load["energy_per_lb"] = load["energy"]/self.load_weight if self.load_weight else 0.0
+        self.loads.append(load)
+        self.load_start = None
+        return load
+
+    def update(self, data):
+        return self.evaluate(data.data_log[-1], data.current_index - 1)
+
+    def totals(self):
+        # Running totals over the completed loads
+        if not self.loads:
+            return None
+        cook_time = sum(load["cook_time"] for load in self.loads)
+        energy = sum(load["energy"] for load in self.loads)
+        weight = self.load_weight*len(self.loads)
+        return {"loads": len(self.loads),
+                "energy": energy,
+                "energy_per_lb": energy/weight if weight else 0.0,
+                "productivity": weight*60/cook_time if cook_time > 0 else 0.0}
+
+    def summary(self):
+        text = f"{self.name}: {self.state}"
+        if self.state == COOKING:
+            text += f" load {len(self.loads)+1}/{self.n_loads}"
+        totals = self.totals()
+        if totals is not None:
+            text += f" | {totals['loads']}/{self.n_loads} loads, {totals['productivity']:.1f} lb/h"
+        return text
+
+
+class FryTest(TestProcedure):
+    """
+    Fryer cooking test: frozen fries dropped into oil at 350 F, cook complete
+    when the oil recovers. Control temperature is the oil thermocouple(s).
+    """
+    name = "Fry Test"
+
+    def __init__(self, channels, setpoint=350.0, load_weight=3.0, n_loads=6,
+                 meter="Gas Meter", **kwargs):
+        kwargs.setdefault("load_drop", 20.0)
+        kwargs.setdefault("min_cook_time", 2.0)
+        super().__init__(channels, setpoint, load_weight, n_loads, meter, **kwargs)
+
+
+class BurgerTest(TestProcedure):
+    """
+    Griddle cooking test: frozen patties loaded onto a 375 F surface, cook
+    complete when the average surface temperature recovers.
+    """
+    name = "Burger Test"
+
+    def __init__(self, channels, setpoint=375.0, load_weight=2.0, n_loads=3,
+                 meter="Gas Meter", **kwargs):
+        kwargs.setdefault("load_drop", 25.0)
+        kwargs.setdefault("min_cook_time", 1.5)
+        kwargs.setdefault("recovery_band", 10.0)
+        super().__init__(channels, setpoint, load_weight, n_loads, meter, **kwargs)
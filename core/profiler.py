@@ -0,0 +1,210 @@
+"""
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+                                 HEADER
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+Title:       profiler.py
+Origin Date: 10/19/2026
+Revised:     10/19/2026
+Author(s):   Russell Hedrick
+Contact:     rhedrick@frontierenergy.com
+Description:
+
+The following script is designed to find out which stage of the per-tick
+pipeline is slow while the application runs. Every timer slot and UI refresh
+is wrapped by a TickProfiler stage; while stage timing is on, each call is
+timed and kept in a rolling window (p50/p99/max shown in the status bar) and
+in the testzilla_stage_seconds metric. Tick cost is measured from the first
+and last timer slots; timer jitter is taken from the metrics TickMonitor. A SamplingProfiler records the
+stacks of the UI thread for a few seconds and writes them in the collapsed
+format read by flame graph tools (one "frame;frame;frame count" per line).
+
+"""
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#                                   Imports
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+import os
+import sys
+import time
+import threading
+from collections import Counter
+from datetime import datetime
+import numpy as np
+
+import core.metrics as mt
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#                                  Constants
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+WINDOW = 300 # calls per stage kept for the rolling statistics
+READOUT_STAGES = 4 # slowest stages (by p99) shown in the status bar
+SAMPLE_SECONDS = 10.0 # length of an on-demand sampling profile
+SAMPLE_INTERVAL = 0.005 # seconds between stack samples
+STAGE_SECONDS = mt.histogram("stage_seconds", "Time spent in each pipeline stage (while stage timing is on)",
+                             labels=("stage",))
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#                           Classes & Functions
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+class Rolling:
+    # Last `size` values (seconds) in a ring buffer
+    def __init__(self, size=WINDOW):
+        self.values = np.zeros(size)
+        self.n = 0
+
+    def add(self, value):
+        self.values[self.n % len(self.values)] = value
+        self.n += 1
+
+    def stats(self):
+        # (p50, p99, max) in seconds, None before the first value
+        if self.n == 0:
+            return None
+        values = self.values[:min(self.n, len(self.values))]
+        p50, p99 = np.percentile(values, (50, 99))
+        return float(p50), float(p99), float(values.max())
+
+
+class TickProfiler:
+    """
+    Per-stage timing of the acquisition tick. wrap(name, callback) returns
+    the callback to connect to the timer (or add to the RefreshScheduler);
+    while `enabled` is False it only adds a flag check per call. begin() and
+    end() are connected as the first and last timer slots to measure the
+    whole tick; the jitter of its start is read from `ticks` (a
+    metrics.TickMonitor connected before begin()).
+    """
+
+    def __init__(self, ticks, enabled=False):
+        self.ticks = ticks
+        self.enabled = enabled
+        self.stages = {} # name -> Rolling
+        self.histograms = {}
+        self.tick = Rolling()
+        self.jitter = Rolling()
+        self.started = None # start of the current tick
+
+    def set_enabled(self, enabled):
+        self.enabled = enabled
+        self.started = None
+
+    def wrap(self, name, callback):
+        self.stages[name] = Rolling()
+        self.histograms[name] = STAGE_SECONDS.labels(name)
+
+        def stage(*args):
+            if not self.enabled:
+                return callback(*args)
+            start = time.perf_counter()
+            try:
+                return callback(*args)
+            finally:
+                self.record(name, time.perf_counter() - start)
+        return stage
+
+    def record(self, name, seconds):
+        self.stages[name].add(seconds)
+        self.histograms[name].observe(seconds)
+
+    def begin(self):
+        if not self.enabled:
+            return
+        if self.ticks.last_jitter is not None:
+            self.jitter.add(self.ticks.last_jitter)
+        self.started = time.perf_counter()
+
+    def end(self):
+        if self.enabled and self.started is not None:
+            self.tick.add(time.perf_counter() - self.started)
+            self.started = None
+
+    def summary(self):
+        # {name: (p50, p99, max)} of every stage that ran, plus tick and jitter
+        result = {name: rolling.stats() for name, rolling in self.stages.items() if rolling.n}
+        for name, rolling in (("tick", self.tick), ("jitter", self.jitter)):
+            if rolling.n:
+                result[name] = rolling.stats()
+        return result
+
+    def readout(self, stages=READOUT_STAGES):
+        """
+        One line for the status bar: tick cost and jitter (p50/p99 ms) and
+        the slowest stages by p99.
+        """
+        if not self.enabled:
+            return ""
+        summary = self.summary()
+        parts = [f"{name} {summary[name][0]*1e3:.1f}/{summary[name][1]*1e3:.1f}"
+                 for name in ("tick", "jitter") if name in summary]
+        slowest = sorted((item for item in summary.items() if item[0] not in ("tick", "jitter")),
+                         key=lambda item: item[1][1], reverse=True)[:stages]
+        parts += [f"{name} {p50*1e3:.1f}/{p99*1e3:.1f}" for name, (p50, p99, _) in slowest]
+        return "Profile p50/p99 ms: " + (" | ".join(parts) if parts else "waiting for data")
+
+    def report(self):
+        # Table of every stage (for the profile dump)
+        lines = [f"{'stage':<20} {'calls':>8} {'p50 ms':>9} {'p99 ms':>9} {'max ms':>9}"]
+        rollings = dict(self.stages, tick=self.tick, jitter=self.jitter)
+        for name, rolling in rollings.items():
+            stats = rolling.stats()
+            if stats is not None:
+                lines.append(f"{name:<20} {rolling.n:>8} " + " ".join(f"{v*1e3:>9.2f}" for v in stats))
+        return "\n".join(lines)
+
+
+class SamplingProfiler:
+    """
+    Samples the stack of one thread (the UI thread by default) from a
+    background thread every `interval` seconds for `seconds` and writes the
+    collapsed stacks to `path`, heaviest first. Sampling only reads the
+    frames, so the profiled thread runs undisturbed apart from the GIL.
+    """
+
+    def __init__(self, path, seconds=SAMPLE_SECONDS, interval=SAMPLE_INTERVAL, thread_id=None, header=""):
+        self.path = path
+        self.seconds = seconds
+        self.interval = interval
+        self.thread_id = threading.main_thread().ident if thread_id is None else thread_id
+        self.header = header
+        self.stacks = Counter()
+        self.samples = 0
+        self.thread = None
+        self.done = threading.Event()
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+        return self
+
+    @staticmethod
+    def collapse(frame):
+        # "module:function;module:function" from the outermost frame in
+        names = []
+        while frame is not None:
+            code = frame.f_code
+            names.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+            frame = frame.f_back
+        return ";".join(reversed(names))
+
+    def _run(self):
+        end = time.perf_counter() + self.seconds
+        while time.perf_counter() < end:
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.stacks[self.collapse(frame)] += 1
+                self.samples += 1
+            del frame
+            time.sleep(self.interval)
+        self.write()
+        self.done.set()
+
+    def write(self):
+        try:
+            with open(self.path, "w") as file:
+                if self.header:
+                    file.write("".join(f"# {line}\n" for line in self.header.splitlines()))
+                file.write(f"# {self.samples} samples every {self.interval*1e3:.0f} ms\n")
+                for stack, count in self.stacks.most_common():
+                    file.write(f"{stack} {count}\n")
+        except OSError as e:
+            print(f"Unable to write profile {self.path}: {e}")
+
+def profile_path(directory):
+    return os.path.join(directory, f"profile_{datetime.now().strftime('%Y%m%d-%H%M%S')}.txt")
@@ -0,0 +1,393 @@
+"""
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+                                 HEADER
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+Title:       reader.py
+Origin Date: 10/19/2026
+Revised:     10/19/2026
+Author(s):   Russell Hedrick
+Contact:     rhedrick@frontierenergy.com
+Description:
+
+The following script is designed to read row ranges and column slices out of
+large historical test files without loading them whole. A CSV test file is
+memory mapped and indexed once (byte offset of every data row, cached next to
+the file as <test>.idx.npz and extended as the file grows); only the
+requested byte range is parsed. Test time restarts at every Reset, so time
+lookups go through the elapsed test time of every row (test time plus the
+time recorded before each reset), built once and cached in the same index. Column stores (core/storage.py) are read
+through memory mapped .npy chunks with the same interface.
+
+Usage:
+    python -m core.reader Data/08-06-24_0.csv 3600 10800 "Test Time" "Temp 1"
+
+"""
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#                                   Imports
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+import io
+import os
+import sys
+import time
+import mmap
+import numpy as np
+import pandas as pd
+
+import core.file_utils as fu
+import core.storage as st
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#                                  Constants
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+SCAN_BLOCK = 1 << 24 # bytes scanned per pass when building the row index
+NEWLINE = ord("\n")
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#                           Classes & Functions
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+def index_file_name(path):
+    return os.path.splitext(path)[0] + ".idx.npz"
+
+
+class TestReader:
+    """
+    Shared interface: len(reader), headers, file_date, refresh(),
+    read(start, stop, columns) -> DataFrame indexed by row number and
+    take(rows, columns) for scattered rows (e.g. a sample of a long test).
+    """
+
+    def column(self, name, start=0, stop=None):
+        return self.read(start, stop, [name])[name].to_numpy()
+
+    _elapsed = None # elapsed test time (minutes) of the rows indexed so far
+    _elapsed_state = (0.0, 0.0) # (last recorded test time, time before the last reset)
+
+    def elapsed(self):
+        """
+        Monotonic test time (minutes) of every row: the recorded test time
+        plus the time recorded before each reset (a drop of test time).
+        Built once and extended as the file grows.
+        """
+        n = len(self)
+        have = 0 if self._elapsed is None else len(self._elapsed)
+        if have < n:
+            last, offset = self._elapsed_state if have else (0.0, 0.0)
+            t = pd.to_numeric(pd.Series(self.column(self.headers[1], have, n)), errors="coerce")
+            t = t.ffill().fillna(last).to_numpy(dtype=float)
+            previous = np.r_[last, t[:-1]]
+            offsets = offset + np.cumsum(np.where(t < previous, previous, 0.0))
+            self._elapsed = np.r_[self._elapsed if have else np.zeros(0), t + offsets]
+            self._elapsed_state = (float(t[-1]), float(offsets[-1]))
+        return self._elapsed[:n]
+
+    def find_time(self, test_time_min):
+        # First row at or after an elapsed test time (see elapsed())
+        return int(np.searchsorted(self.elapsed(), test_time_min))
+
+
+class CSVReader(TestReader):
+    """
+    Random access reader for a test CSV. offsets holds the byte offset of
+    every data row followed by the end of the last complete line, so row i
+    spans offsets[i]:offsets[i+1].
+    """
+
+    def __init__(self, path, cache=True, headers=None):
+        self.path = path
+        self.cache = cache
+        self.map = None
+        # Compressed segments are read into memory once (they never change)
+        self.file = None if path.endswith(".gz") else open(path, "rb")
+        self.file_date = None
+        self.offsets = np.zeros(1, dtype=np.int64)
+        self._map()
+        self._load_index()
+        self.refresh()
+        self.file_date = bytes(self.map[:64]).split(b"\n")[0].strip().split(b",")[0].decode()
+        self.headers = fu.read_headers(path) if headers is None else headers
+
+    def _map(self):
+        if self.file is None:
+            if self.map is None:
+                with fu.open_segment(self.path) as file:
+                    self.map = file.read()
+            return
+        if isinstance(self.map, mmap.mmap):
+            self.map.close()
+        size = os.fstat(self.file.fileno()).st_size
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+
+    def _load_index(self):
+        # Reuse the cached index if the last indexed row is still in place
+        # (a rotated or replaced file will not match)
+        try:
+            with np.load(index_file_name(self.path)) as cached:
+                offsets, last_row = cached["offsets"], cached["last_row"].tobytes()
+                elapsed = cached["elapsed"] if "elapsed" in cached.files else None
+                elapsed_state = tuple(cached["elapsed_state"]) if elapsed is not None else None
+        except (OSError, ValueError, KeyError):
+            return
+        if offsets.size > 1 and offsets[-1] <= len(self.map) and \
+                bytes(self.map[offsets[-2]:offsets[-1]]) == last_row:
+            self.offsets = offsets
+            if elapsed is not None and len(elapsed) == offsets.size - 1:
+                self._elapsed, self._elapsed_state = elapsed, elapsed_state
+
+    def _save_index(self):
+        if not self.cache or self.offsets.size < 2:
+            return
+        arrays = {}
+        if self._elapsed is not None and len(self._elapsed) == len(self):
+            arrays = {"elapsed": self._elapsed, "elapsed_state": np.array(self._elapsed_state)}
+        try:
+            last_row = bytes(self.map[self.offsets[-2]:self.offsets[-1]])
+            np.savez(index_file_name(self.path), offsets=self.offsets,
+                     last_row=np.frombuffer(last_row, dtype=np.uint8), **arrays)
+        except OSError:
+            pass
+
+    def elapsed(self):
+        indexed = 0 if self._elapsed is None else len(self._elapsed)
+        elapsed = super().elapsed()
+        if len(elapsed) > indexed:
+            self._save_index()
+        return elapsed
+
+    def refresh(self):
+        """
+        Index rows appended since the last call (live test files keep
+        growing). Returns the number of new rows.
+        """
+        self._map()
+        end = int(self.offsets[-1])
+        ends = []
+        pos = end
+        while pos < len(self.map):
+            count = min(SCAN_BLOCK, len(self.map) - pos)
+            block = np.frombuffer(self.map, dtype=np.uint8, count=count, offset=pos)
+            ends.append(np.flatnonzero(block == NEWLINE).astype(np.int64) + pos + 1)
+            pos += count
+        line_ends = np.concatenate(ends) if ends else np.zeros(0, dtype=np.int64)
+        if not line_ends.size:
+            return 0
+        line_starts = np.r_[end, line_ends[:-1]]
+        # Blank lines ("\r\n", "\r\r\n" from Windows text mode) are not rows
+        content = np.frombuffer(self.map, dtype=np.uint8)[line_starts]
+        blank = (line_ends - line_starts <= 3) & ((content == 13) | (content == NEWLINE))
+        line_starts = line_starts[~blank]
+        if end == 0:
+            if line_starts.size < 2:
+                return 0 # wait for the file date and header rows
+            line_starts = line_starts[2:]
+        self.offsets = np.r_[self.offsets[:-1], line_starts, line_ends[-1]]
+        self._save_index()
+        return line_starts.size
+
+    def __len__(self):
+        return self.offsets.size - 1
+
+    def _slice(self, start, stop):
+        n = len(self)
+        start, stop, _ = slice(start, stop).indices(n)
+        return start, max(start, stop)
+
+    def read(self, start=0, stop=None, columns=None):
+        """
+        Rows start:stop as a DataFrame (renamed headers, NaN for open
+        channels). columns - optional list of header names.
+        """
+        start, stop = self._slice(start, stop)
+        usecols = None if columns is None else [self.headers.index(name) for name in columns]
+        if stop == start:
+            return pd.DataFrame(columns=self.headers if columns is None else columns)
+        block = self.map[self.offsets[start]:self.offsets[stop]]
+        frame = pd.read_csv(io.BytesIO(block), header=None, names=self.headers,
+                            usecols=usecols, skip_blank_lines=True)
+        frame.index = pd.RangeIndex(start, start + len(frame))
+        return frame if columns is None else frame[columns]
+
+    def take(self, rows, columns=None):
+        # Only the byte ranges of the requested (sorted) rows are parsed
+        rows = np.asarray(rows, dtype=np.int64)
+        rows = rows[(rows >= 0) & (rows < len(self))]
+        if not len(rows):
+            return pd.DataFrame(columns=self.headers if columns is None else columns)
+        block = b"".join(self.map[a:b] for a, b in zip(self.offsets[rows], self.offsets[rows + 1]))
+        usecols = None if columns is None else [self.headers.index(name) for name in columns]
+        frame = pd.read_csv(io.BytesIO(block), header=None, names=self.headers,
+                            usecols=usecols, skip_blank_lines=True)
+        frame.index = rows[:len(frame)]
+        return frame if columns is None else frame[columns]
+
+    def close(self):
+        if isinstance(self.map, mmap.mmap):
+            self.map.close()
+        if self.file is not None:
+            self.file.close()
+
+
+class SegmentedReader(TestReader):
+    """
+    Reader for a test split into segments (see file_utils Segments). Row
+    counts come from the sidecar, so only the segments a read touches are
+    opened; compressed segments are kept for the last `cache` reads.
+    """
+
+    def __init__(self, path, cache=2):
+        self.path = path
+        self.cache = cache
+        self.readers = {} # segment path -> CSVReader (compressed segments)
+        self.current = None
+        self.segments = None
+        self.refresh()
+
+    def refresh(self):
+        n_before = len(self) if self.current is not None else 0
+        with fu.rotation_lock:
+            segments = fu.read_meta(self.path).get("segments", [])
+            self.headers = fu.read_headers(self.path)
+            if self.current is None or self.segments is None or len(segments) != len(self.segments):
+                # The test file was rotated: reopen it from its new start
+                if self.current is not None:
+                    self.current.close()
+                self.current = CSVReader(self.path, headers=self.headers)
+            else:
+                self.current.refresh()
+        self.segments = segments
+        self.paths = fu.segment_files(self.path)[:-1]
+        self.file_date = self.current.file_date
+        self.offsets = np.r_[0, np.cumsum([seg["rows"] for seg in segments] + [len(self.current)])]
+        return len(self) - n_before
+
+    def __len__(self):
+        return int(self.offsets[-1])
+
+    def _reader(self, i):
+        if i == len(self.paths):
+            return self.current
+        path = self.paths[i]
+        if path not in self.readers:
+            while len(self.readers) >= self.cache:
+                self.readers.pop(next(iter(self.readers))).close()
+            self.readers[path] = CSVReader(path, headers=self.headers)
+        return self.readers[path]
+
+    def read(self, start=0, stop=None, columns=None):
+        start, stop, _ = slice(start, stop).indices(len(self))
+        stop = max(start, stop)
+        frames = []
+        first = max(np.searchsorted(self.offsets, start, side="right") - 1, 0)
+        for i in range(first, len(self.offsets) - 1):
+            if self.offsets[i] >= stop:
+                break
+            a, b = max(start - self.offsets[i], 0), min(stop, self.offsets[i+1]) - self.offsets[i]
+            frames.append(self._reader(i).read(a, b, columns))
+        if not frames:
+            return pd.DataFrame(columns=self.headers if columns is None else columns)
+        frame = pd.concat(frames)
+        frame.index = pd.RangeIndex(start, start + len(frame))
+        return frame
+
+    def take(self, rows, columns=None):
+        rows = np.asarray(rows, dtype=np.int64)
+        rows = rows[(rows >= 0) & (rows < len(self))]
+        segment = np.searchsorted(self.offsets, rows, side="right") - 1
+        frames = [self._reader(i).take(rows[segment == i] - self.offsets[i], columns)
+                  for i in np.unique(segment)]
+        if not frames:
+            return pd.DataFrame(columns=self.headers if columns is None else columns)
+        frame = pd.concat(frames)
+        frame.index = rows[:len(frame)]
+        return frame
+
+    def close(self):
+        for reader in self.readers.values():
+            reader.close()
+        self.current.close()
+
+
+class StoreReader(TestReader):
+    """
+    Same interface over a column store directory. Chunks are memory mapped
+    so only the requested rows/columns are read from disk.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.refresh()
+
+    def refresh(self):
+        manifest = st.read_manifest(self.directory)
+        n_before = getattr(self, "offsets", np.zeros(1, dtype=np.int64))[-1]
+        self.file_date = manifest["file_date"]
+        self.headers = fu.read_meta(self.directory).get("headers", manifest["headers"])
+        self.chunks = [chunk["name"] for chunk in manifest["chunks"]]
+        self.offsets = np.r_[0, np.cumsum([chunk["rows"] for chunk in manifest["chunks"]])].astype(np.int64)
+        return int(self.offsets[-1] - n_before)
+
+    def __len__(self):
+        return int(self.offsets[-1])
+
+    def read(self, start=0, stop=None, columns=None):
+        start, stop, _ = slice(start, stop).indices(len(self))
+        stop = max(start, stop)
+        names = self.headers if columns is None else columns
+        value_ix = [self.headers.index(name) - 1 for name in names if name != self.headers[0]]
+        values, tods = [], []
+        first = np.searchsorted(self.offsets, start, side="right") - 1
+        for c in range(max(first, 0), len(self.chunks)):
+            if self.offsets[c] >= stop:
+                break
+            a, b = max(start - self.offsets[c], 0), min(stop, self.offsets[c+1]) - self.offsets[c]
+            path = os.path.join(self.directory, self.chunks[c])
+            values.append(np.load(path + "_values.npy", mmap_mode="r")[a:b, value_ix])
+            if self.headers[0] in names:
+                tods.append(np.load(path + "_tod.npy", mmap_mode="r")[a:b].astype(str))
+        block = np.concatenate(values) if values else np.zeros((0, len(value_ix)))
+        frame = pd.DataFrame(block, columns=[self.headers[i+1] for i in value_ix],
+                             index=pd.RangeIndex(start, start + len(block)))
+        if self.headers[0] in names:
+            frame.insert(0, self.headers[0], np.concatenate(tods) if tods else [])
+        return frame[names]
+
+    def take(self, rows, columns=None):
+        rows = np.asarray(rows, dtype=np.int64)
+        rows = rows[(rows >= 0) & (rows < len(self))]
+        names = self.headers if columns is None else columns
+        value_ix = [self.headers.index(name) - 1 for name in names if name != self.headers[0]]
+        chunk = np.searchsorted(self.offsets, rows, side="right") - 1
+        values, tods = [np.zeros((0, len(value_ix)))], [np.zeros(0, dtype=str)]
+        for c in np.unique(chunk):
+            local = rows[chunk == c] - self.offsets[c]
+            path = os.path.join(self.directory, self.chunks[c])
+            values.append(np.load(path + "_values.npy", mmap_mode="r")[local][:, value_ix])
+            if self.headers[0] in names:
+                tods.append(np.load(path + "_tod.npy", mmap_mode="r")[local].astype(str))
+        frame = pd.DataFrame(np.concatenate(values), columns=[self.headers[i+1] for i in value_ix],
+                             index=rows)
+        if self.headers[0] in names:
+            frame.insert(0, self.headers[0], np.concatenate(tods))
+        return frame[names]
+
+    def close(self):
+        pass
+
+
+def open_test(path):
+    # Reader for a test CSV (segmented or not) or a column store directory
+    if os.path.isdir(path):
+        return StoreReader(path)
+    if fu.read_meta(path).get("segments"):
+        return SegmentedReader(path)
+    return CSVReader(path)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) >= 4:
+        start_time = time.perf_counter()
+        reader = open_test(sys.argv[1])
+        index_time = time.perf_counter() - start_time
+        frame = reader.read(int(sys.argv[2]), int(sys.argv[3]), sys.argv[4:] or None)
+        print(frame)
+        print(f"{len(reader)} rows indexed in {index_time:.3f}s, "
+              f"slice read in {time.perf_counter() - start_time - index_time:.3f}s")
+    else:
+        print(__doc__)
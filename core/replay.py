@@ -0,0 +1,163 @@
+"""
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+                                 HEADER
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+Title:       replay.py
+Origin Date: 10/19/2026
+Revised:     10/19/2026
+Author(s):   Russell Hedrick
+Contact:     rhedrick@frontierenergy.com
+Description:
+
+The following script is designed to replay a recorded test file through the
+same pipeline used for live data (Data.get_data, plotting, analysis). A
+ReplayDAQ stands in for the NI class: each step loads the next recorded row
+into Data.ni_data/Data.mb_data and the test clock follows the recorded test
+time, so a test can be replayed at 1x, Nx or as fast as possible.
+
+"""
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#                                   Imports
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+import csv
+import time
+import numpy as np
+
+import core.alarms as al
+import core.file_utils as fu
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#                                  Constants
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+OPEN_VALUE = 9999.0 # out of range reading so Data.get_data marks the channel open
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#                           Classes & Functions
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+def parse_value(value):
+    if value == "":
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return value
+
+def read_test_file(path):
+    """
+    Read a test file written by file_utils.file_setup/write_data.
+    Returns (file date, headers, rows) with numeric cells converted to float
+    and empty cells to None. Blank lines (Windows line endings) are skipped,
+    segments of a long test are stitched in order and renamed channels are
+    taken from the metadata sidecar. The sidecar always lists two modules of
+    channels, so the headers are cut to the width of the recorded rows.
+    """
+    with open(path, mode='r', newline='') as file:
+        file_date = next(row for row in csv.reader(file) if row)[0]
+    headers = fu.read_headers(path)
+    rows = [[row[0]] + [parse_value(value) for value in row[1:]] for row in fu.iter_rows(path)]
+    width = max((len(row) for row in rows), default=len(headers))
+    return file_date, headers[:width], rows
+
+
+class ReplayDAQ:
+    """
+    Stands in for niDAQFuncs.NI when replaying a recorded test. Pulse totals
+    are converted back into raw counts with Data.pcfs so Data.get_data
+    rebuilds the same totals.
+    speed - playback rate relative to real time (0 = as fast as possible)
+    """
+
+    def __init__(self, path, speed=1.0):
+        self.path = path
+        self.speed = speed
+        self.pcfs = np.ones(4)
+        self.file_date, self.headers, self.rows = read_test_file(path)
+        n_temps = len(self.headers) - al.TC_OFFSET # headers match the row width
+        self.tc_modules = 1 if n_temps <= 16 else 2
+        self.connected = True
+        self.four_chan = False
+        self.index = -1
+        self.elapsed = 0.0 # monotonic replay clock (s)
+        self.last_time = None
+        # Recorded sample spacing (s) used for the replay clock and timer
+        times = np.array([row[1] for row in self.rows if isinstance(row[1], float)])
+        steps = np.diff(times)*60
+        steps = steps[steps > 0]
+        self.interval = max(1, int(round(np.median(steps)))) if steps.size else 1
+
+    def __len__(self):
+        return len(self.rows)
+
+    @property
+    def finished(self):
+        return self.index >= len(self.rows) - 1
+
+    def timer_interval(self):
+        # QTimer interval (ms) for the requested playback speed
+        return 0 if not self.speed else int(1000*self.interval/self.speed)
+
+    def clock(self):
+        """
+        Replacement for time.monotonic in TestTime. Follows the recorded test
+        time; resets in the file (t0 rows) keep the clock running forward.
+        """
+        return self.elapsed
+
+    def _advance_clock(self, test_time_min):
+        if not isinstance(test_time_min, float):
+            return
+        t = round(test_time_min*60/self.interval)*self.interval
+        if self.last_time is None:
+            self.elapsed = t # start the clock at the first recorded time
+        elif t > self.last_time:
+            self.elapsed += t - self.last_time
+        else:
+            self.elapsed += self.interval
+        self.last_time = t
+
+    def read_all_tz(self):
+        # Current row in the layout returned by NI.read_all_tz
+        row = self.rows[max(self.index, 0)]
+        totals = np.array([v if isinstance(v, float) else 0.0 for v in row[5:9]])
+        counts = np.divide(totals, self.pcfs, out=np.zeros(4), where=self.pcfs != 0)
+        analog = [v if isinstance(v, float) else 0.0 for v in row[9:11]]
+        temps = [OPEN_VALUE if v is None else v for v in row[al.TC_OFFSET:]]
+        temps += [OPEN_VALUE]*(self.tc_modules*16 - len(temps))
+        return list(counts) + analog + temps
+
+    def read_mb_data(self):
+        row = self.rows[max(self.index, 0)]
+        return [[v if isinstance(v, float) else 0.0 for v in row[2:5]] + [0]*10]
+
+    def step(self, data):
+        """
+        Load the next recorded row into data. Returns False once the file is
+        exhausted.
+        """
+        if self.finished:
+            return False
+        self.index += 1
+        self.pcfs = np.array(data.pcfs, dtype=float)
+        self._advance_clock(self.rows[self.index][1])
+        data.ni_data = self.read_all_tz()
+        data.mb_data = self.read_mb_data()
+        data.mb_connected = True
+        return True
+
+    def close_daq(self):
+        pass
+
+
+def run(daq, data, test_time, stages=()):
+    """
+    Drive the pipeline as fast as possible through the whole file.
+    stages - extra callables run after Data.get_data on every row
+    Returns (rows processed, seconds elapsed).
+    """
+    start = time.perf_counter()
+    rows = 0
+    while daq.step(data):
+        test_time.update_time()
+        data.get_data(test_time)
+        for stage in stages:
+            stage()
+        rows += 1
+    return rows, time.perf_counter() - start
@@ -0,0 +1,359 @@
+"""
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+                                 HEADER
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+Title:       server.py
+Origin Date: 10/19/2026
+Revised:     10/19/2026
+Author(s):   Russell Hedrick
+Contact:     rhedrick@frontierenergy.com
+Description:
+
+The following script is designed to serve the live data of a running test to
+other computers (supervisors watching several test cells from one desk). An
+embedded HTTP server offers:
+
+    GET /          - a small live table page
+    GET /snapshot  - the latest sample as JSON (?channels=Temp 1,Temp 2)
+    GET /channels  - the channel names
+    GET /ws        - a WebSocket stream of samples
+
+WebSocket clients choose their channels, format (compact JSON or binary) and
+maximum rate in the query string (/ws?channels=Temp 1,Temp 2&rate=1&format=
+binary) or later with a JSON message {"channels": [...], "rate": 1,
+"format": "json"}. Every subscription is acknowledged with
+{"channels": [...], "format": ..., "rate": ...}; JSON frames are then
+{"seq", "tod", "t", "v": [values in channel order]} and binary frames are
+<seq:u4><test time:f8><value:f4 per channel> (little endian, NaN = open).
+
+The server runs on its own thread with an asyncio loop. publish() only hands
+the sample to that loop, so encoding and sending never cost the acquisition
+timer anything. Each client has a small queue: when a client reads slower
+than the data arrives the oldest frames are dropped (it always sees the
+latest values) and a client that stops reading is disconnected.
+
+"""
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#                                   Imports
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+import asyncio
+import base64
+import hashlib
+import html
+import json
+import socket
+import struct
+import threading
+import time
+from urllib.parse import urlsplit, parse_qs
+import numpy as np
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#                                  Constants
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+DEFAULT_HOST = "127.0.0.1" # use 0.0.0.0 (or the LAN address) to serve the lab network
+DEFAULT_PORT = 8765
+WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11" # RFC 6455 handshake constant
+QUEUE_FRAMES = 16 # frames buffered per client before the oldest are dropped
+SEND_TIMEOUT = 10.0 # seconds a client may stall a send before it is disconnected
+REQUEST_TIMEOUT = 10.0 # seconds to receive an HTTP request
+MAX_RATE = 10.0 # highest stream rate (frames/s) a client may request
+MAX_MESSAGE = 65536 # largest message accepted from a client (bytes)
+BINARY_HEADER = struct.Struct("<Id") # sequence number, test time (min)
+RATE_TOLERANCE = 0.9 # fraction of the interval accepted as "due" (tick jitter)
+PAGE = """<!DOCTYPE html><html><head><meta charset="utf-8"><title>Testzilla - STATION</title>
+<style>body{background:#000;color:#fff;font-family:Bahnschrift,sans-serif}td{padding:1px 14px}</style></head>
+<body><h3>STATION</h3><div id="t">connecting...</div><table id="v"></table><script>
+let names = [];
+const ws = new WebSocket(`ws://${location.host}/ws?rate=1`);
+ws.onmessage = e => {
+  const m = JSON.parse(e.data);
+  if (m.channels) { names = m.channels; return; }
+  document.getElementById("t").textContent = `${m.tod}   Test Time = ${m.t} min`;
+  document.getElementById("v").innerHTML =
+    names.map((n, i) => `<tr><td>${n}</td><td>${m.v[i] ?? "NA"}</td></tr>`).join("");
+};
+ws.onclose = () => { document.getElementById("t").textContent = "disconnected"; };
+</script></body></html>"""
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#                           Classes & Functions
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+def parse_address(text, host=DEFAULT_HOST, port=DEFAULT_PORT):
+    # "host:port", "port" or "host" -> (host, port)
+    text = str(text).strip()
+    if text.isdigit():
+        return host, int(text)
+    name, _, number = text.rpartition(":")
+    if name and number.isdigit():
+        return name, int(number)
+    return text or host, port
+
+def row_array(row):
+    # Numeric view of a data_log row (time of day and open channels -> NaN)
+    return np.array([v if isinstance(v, (int, float)) else np.nan for v in row], dtype=float)
+
+def json_value(value):
+    return None if np.isnan(value) else round(float(value), 4)
+
+def ws_frame(payload, opcode=None):
+    # Unmasked, unfragmented server frame (text for str, binary for bytes)
+    if isinstance(payload, str):
+        payload, opcode = payload.encode(), opcode or 0x1
+    opcode = opcode or 0x2
+    n = len(payload)
+    if n < 126:
+        header = struct.pack("!BB", 0x80 | opcode, n)
+    elif n < 65536:
+        header = struct.pack("!BBH", 0x80 | opcode, 126, n)
+    else:
+        header = struct.pack("!BBQ", 0x80 | opcode, 127, n)
+    return header + payload
+
+async def read_ws_message(reader):
+    # (opcode, payload) of the next client frame
+    head = await reader.readexactly(2)
+    opcode, masked, n = head[0] & 0x0F, head[1] & 0x80, head[1] & 0x7F
+    if n == 126:
+        n = struct.unpack("!H", await reader.readexactly(2))[0]
+    elif n == 127:
+        n = struct.unpack("!Q", await reader.readexactly(8))[0]
+    if n > MAX_MESSAGE:
+        raise ValueError("message too large")
+    mask = await reader.readexactly(4) if masked else None
+    payload = await reader.readexactly(n)
+    if mask is not None:
+        payload = (np.frombuffer(payload, np.uint8) ^ np.resize(np.frombuffer(mask, np.uint8), n)).tobytes()
+    return opcode, payload
+
+
+class Client:
+    """
+    One WebSocket subscriber: its channel selection (None = all), format,
+    minimum interval between frames and bounded send queue.
+    """
+
+    def __init__(self, writer):
+        self.writer = writer
+        self.peer = writer.get_extra_info("peername")
+        self.channels = None
+        self.format = "json"
+        self.interval = 1/MAX_RATE
+        self.last_sent = 0.0
+        self.queue = asyncio.Queue(QUEUE_FRAMES)
+        self.dropped = 0 # frames dropped because the client fell behind
+
+    def subscribe(self, channels=None, rate=None, fmt=None):
+        if channels is not None:
+            self.channels = None if channels in ("all", "") else \
+                [name.strip() for name in (channels.split(",") if isinstance(channels, str) else channels)]
+        if rate is not None:
+            self.interval = 1/min(max(float(rate), 1e-3), MAX_RATE)
+        if fmt is not None:
+            if fmt not in ("json", "binary"):
+                raise ValueError(f"unknown format: {fmt}")
+            self.format = fmt
+
+    def push(self, message):
+        # Queue a frame; a full queue drops its oldest frame (backpressure)
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(message)
+
+
+class LiveServer:
+    """
+    HTTP/WebSocket server for the live data of this station. Call start()
+    once, set_headers() whenever channels are renamed and publish() with the
+    latest data_log row every tick (from the Qt thread).
+    """
+
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT, station=None):
+        self.host = host
+        self.port = port
+        self.station = station or socket.gethostname()
+        self.headers = []
+        self.index = {} # channel name -> data_log column
+        self.latest = None # (seq, row) of the last published sample
+        self.info = {} # extra snapshot fields (file name, alarms, ...)
+        self.seq = 0
+        self.clients = set()
+        self.loop = None
+        self.thread = None
+        self.error = None
+
+    #~~~~ Acquisition side (Qt thread) ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    def start(self):
+        # Bind and serve on a background thread; False if the port is unavailable
+        ready = threading.Event()
+        self.thread = threading.Thread(target=self._run, args=(ready,), daemon=True)
+        self.thread.start()
+        ready.wait()
+        if self.error is not None:
+            print(f"Unable to start live server on {self.host}:{self.port}: {self.error}")
+            return False
+        return True
+
+    def stop(self):
+        if self.loop is not None and self.loop.is_running():
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self.thread.join(2)
+
+    def set_headers(self, headers):
+        self.headers = list(headers)
+        self.index = {name: i for i, name in enumerate(self.headers) if i > 1}
+
+    def publish(self, row, **info):
+        # Hand the latest sample to the server loop (never blocks)
+        self.seq += 1
+        self.latest = (self.seq, list(row))
+        self.info = info
+        if self.clients and self.loop is not None:
+            self.loop.call_soon_threadsafe(self._broadcast, self.latest)
+
+    #~~~~ Server loop ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    def _run(self, ready):
+        self.loop = asyncio.new_event_loop()
+        try:
+            server = self.loop.run_until_complete(asyncio.start_server(self._handle, self.host, self.port))
+            self.port = server.sockets[0].getsockname()[1] # resolves port 0
+        except OSError as e:
+            self.error = e
+            ready.set()
+            return
+        ready.set()
+        try:
+            self.loop.run_forever()
+        finally:
+            server.close()
+            for client in list(self.clients):
+                client.writer.close()
+            self.loop.close()
+
+    def _columns(self, channels):
+        # (names, data_log columns) of a channel selection (None = all)
+        names = list(self.index) if channels is None else channels
+        return names, [self.index.get(name, -1) for name in names]
+
+    def _encode(self, seq, row, array, fmt, columns):
+        columns = np.array(columns, dtype=int)
+        known = (columns >= 0) & (columns < len(array))
+        values = np.where(known, array[np.where(known, columns, 0)], np.nan)
+        if fmt == "binary":
+            return BINARY_HEADER.pack(seq % 2**32, array[1]) + values.astype("<f4").tobytes()
+        return json.dumps({"seq": seq, "tod": row[0], "t": json_value(array[1]),
+                           "v": [json_value(v) for v in values]}, separators=(",", ":"))
+
+    def _broadcast(self, frame):
+        # Encode the sample once per distinct subscription and queue it
+        seq, row = frame
+        array = row_array(row)
+        now = time.monotonic()
+        encoded = {}
+        for client in list(self.clients):
+            if now - client.last_sent < client.interval*RATE_TOLERANCE:
+                continue
+            key = (client.format, None if client.channels is None else tuple(client.channels))
+            if key not in encoded:
+                encoded[key] = self._encode(seq, row, array, client.format, self._columns(client.channels)[1])
+            client.last_sent = now
+            client.push(encoded[key])
+
+    async def _handle(self, reader, writer):
+        try:
+            request = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), REQUEST_TIMEOUT)
+            lines = request.decode("latin-1").split("\r\n")
+            method, target, _ = lines[0].split(" ", 2)
+            headers = {}
+            for line in lines[1:]:
+                name, _, value = line.partition(":")
+                headers[name.strip().lower()] = value.strip()
+            url = urlsplit(target)
+            query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+            if url.path == "/ws" and headers.get("upgrade", "").lower() == "websocket":
+                await self._websocket(reader, writer, headers, query)
+                return
+            if method != "GET":
+                self._respond(writer, 405, "text/plain", b"method not allowed")
+            elif url.path == "/snapshot":
+                self._respond(writer, 200, "application/json", json.dumps(self.snapshot(query.get("channels"))).encode())
+            elif url.path == "/channels":
+                self._respond(writer, 200, "application/json", json.dumps(list(self.index)).encode())
+            elif url.path == "/":
+                self._respond(writer, 200, "text/html; charset=utf-8",
+                              PAGE.replace("STATION", html.escape(self.station)).encode())
+            else:
+                self._respond(writer, 404, "text/plain", b"not found")
+            await writer.drain()
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError, ValueError) as e:
+            pass
+        finally:
+            writer.close()
+
+    def _respond(self, writer, code, content_type, body):
+        reason = {200: "OK", 404: "Not Found", 405: "Method Not Allowed"}[code]
+        writer.write(f"HTTP/1.1 {code} {reason}\r\nContent-Type: {content_type}\r\n"
+                     f"Content-Length: {len(body)}\r\nCache-Control: no-cache\r\n"
+                     f"Access-Control-Allow-Origin: *\r\nConnection: close\r\n\r\n".encode() + body)
+
+    def snapshot(self, channels=None):
+        # Latest sample as a JSON-ready dict
+        names, columns = self._columns(None if channels is None else [c.strip() for c in channels.split(",")])
+        result = {"station": self.station, "seq": None, "time_of_day": None, "test_time": None, "values": {}}
+        if self.latest is not None:
+            seq, row = self.latest
+            array = row_array(row)
+            result.update(seq=seq, time_of_day=row[0], test_time=json_value(array[1]),
+                          values={name: json_value(array[c]) if 0 <= c < len(array) else None
+                                  for name, c in zip(names, columns)})
+        result.update(self.info)
+        return result
+
+    async def _websocket(self, reader, writer, headers, query):
+        key = headers.get("sec-websocket-key", "")
+        accept = base64.b64encode(hashlib.sha1((key + WS_GUID).encode()).digest()).decode()
+        writer.write(("HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                      f"Sec-WebSocket-Accept: {accept}\r\n\r\n").encode())
+        client = Client(writer)
+        try:
+            client.subscribe(query.get("channels"), query.get("rate"), query.get("format"))
+        except ValueError as e:
+            writer.write(ws_frame(json.dumps({"error": str(e)})))
+        self._acknowledge(client)
+        self.clients.add(client)
+        sender = asyncio.ensure_future(self._send(client))
+        try:
+            while not sender.done():
+                opcode, payload = await read_ws_message(reader)
+                if opcode == 0x8: # close
+                    writer.write(ws_frame(payload[:2], 0x8))
+                    break
+                if opcode == 0x9: # ping
+                    writer.write(ws_frame(payload, 0xA))
+                elif opcode == 0x1: # subscription change
+                    try:
+                        message = json.loads(payload)
+                        client.subscribe(message.get("channels"), message.get("rate"), message.get("format"))
+                    except (ValueError, TypeError, AttributeError) as e:
+                        writer.write(ws_frame(json.dumps({"error": str(e)})))
+                    self._acknowledge(client)
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError) as e:
+            pass
+        finally:
+            self.clients.discard(client)
+            sender.cancel()
+
+    def _acknowledge(self, client):
+        names = self._columns(client.channels)[0]
+        client.writer.write(ws_frame(json.dumps({"channels": names, "format": client.format,
+                                                 "rate": round(1/client.interval, 3)})))
+
+    async def _send(self, client):
+        # Drain the client's queue; a client that stalls a send is dropped
+        try:
+            while True:
+                message = await client.queue.get()
+                client.writer.write(ws_frame(message))
+                await asyncio.wait_for(client.writer.drain(), SEND_TIMEOUT)
+        except (asyncio.TimeoutError, ConnectionError) as e:
+            # abort() drops the unsent buffer (close() would wait for it)
+            client.writer.transport.abort()
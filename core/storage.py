@@ -0,0 +1,246 @@
+"""
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+                                 HEADER
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+Title:       storage.py
+Origin Date: 10/19/2026
+Revised:     10/19/2026
+Author(s):   Russell Hedrick
+Contact:     rhedrick@frontierenergy.com
+Description:
+
+The following script is designed to provide an optional columnar binary
+storage backend for test data. Rows are buffered and written as chunks of
+.npy files (numeric block stored column-major + time of day column) listed
+in a manifest.json that also carries the schema and units. Chunks can be
+memory mapped, so loading a week-long test takes seconds instead of
+re-parsing text. An exporter writes the same CSV layout as file_utils.
+Rows of the chunk being filled are appended to a small tail file whenever
+the CSV writer syncs, so a crash loses no more of the store than of the
+CSV; the tail is folded into a chunk when the store is reopened.
+
+Usage:
+    python -m core.storage convert Data/08-06-24_0.csv
+    python -m core.storage export Data/08-06-24_0.cols Data/export.csv
+
+"""
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#                                   Imports
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+import os
+import sys
+import csv
+import json
+import numpy as np
+import pandas as pd
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#                                  Constants
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+MANIFEST = "manifest.json"
+CHUNK_ROWS = 3600 # one hour of 1 second samples per chunk
+UNITS = {"Time of Day": "hh:mm:ss", "Test Time": "min", "Voltage": "V", "W": "W",
+         "Wh.208": "Wh", "Wh.120": "Wh", "Gas": "ft3", "Water": "gal", "Extra": "",
+         "AI 1": "V", "AI 2": "V"}
+TEMP_UNITS = "F"
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#                           Classes & Functions
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+def store_dir_name(path):
+    # Column store that sits next to a test file, e.g. 08-06-24_0.cols
+    return os.path.splitext(path)[0] + ".cols"
+
+def default_units(headers):
+    return [UNITS.get(name, TEMP_UNITS if i >= 11 else "") for i, name in enumerate(headers)]
+
+def read_manifest(directory):
+    with open(os.path.join(directory, MANIFEST), mode='r') as file:
+        return json.load(file)
+
+def write_manifest(directory, manifest):
+    path = os.path.join(directory, MANIFEST)
+    with open(path + ".tmp", mode='w') as file:
+        json.dump(manifest, file, indent=1)
+    os.replace(path + ".tmp", path)
+
+
+class ColumnStore:
+    """
+    Append-only chunked column store for one test. Rows are the same lists
+    written to the CSV (time of day followed by numeric columns, None for
+    open channels). Full chunks are written as:
+        chunk_NNNNN_tod.npy     - time of day (S8)
+        chunk_NNNNN_values.npy  - float64 block, Fortran order (NaN = open)
+        chunk_NNNNN_ints.npy    - packed mask of cells written as integers
+                                  (only when there are any, e.g. modbus zeros)
+        chunk_NNNNN_tail.jsonl  - rows of the chunk being filled (sync())
+    The manifest is only rewritten after a chunk is safely on disk.
+    """
+
+    def __init__(self, directory, file_date, headers, chunk_rows=CHUNK_ROWS):
+        self.directory = directory
+        self.chunk_rows = chunk_rows
+        self.rows = []
+        self.synced = 0 # rows at the front of self.rows already in the tail file
+        os.makedirs(directory, exist_ok=True)
+        if os.path.isfile(os.path.join(directory, MANIFEST)):
+            self.manifest = read_manifest(directory)
+        else:
+            self.manifest = {"file_date": file_date,
+                             "headers": list(headers),
+                             "units": default_units(headers),
+                             "dtype": "<f8",
+                             "chunks": []}
+            write_manifest(directory, self.manifest)
+        self._recover_tail()
+
+    def _tail_path(self, n=None):
+        n = len(self.manifest["chunks"]) if n is None else n
+        return os.path.join(self.directory, f"chunk_{n:05d}_tail.jsonl")
+
+    def _recover_tail(self):
+        # Rows synced before a crash become a chunk; tails of chunks already
+        # written (crash between the manifest and the tail removal) are stale
+        for name in os.listdir(self.directory):
+            if name.endswith("_tail.jsonl") and os.path.join(self.directory, name) != self._tail_path():
+                os.remove(os.path.join(self.directory, name))
+        if os.path.isfile(self._tail_path()):
+            with open(self._tail_path(), mode='r') as file:
+                for line in file:
+                    try:
+                        self.rows.append(json.loads(line))
+                    except ValueError:
+                        break # torn last line
+            self.flush()
+
+    def append(self, row):
+        self.rows.append(row)
+        if len(self.rows) >= self.chunk_rows:
+            self.flush()
+
+    def sync(self):
+        # Append the rows added since the last sync to the tail file (fsync'd)
+        if self.synced > len(self.rows):
+            self.synced = 0
+        if self.synced == len(self.rows):
+            return
+        with open(self._tail_path(), mode='a') as file:
+            file.writelines(json.dumps(list(row), default=lambda v: v.item()) + "\n" for row in self.rows[self.synced:])
+            file.flush()
+            os.fsync(file.fileno())
+        self.synced = len(self.rows)
+
+    def flush(self):
+        # Write buffered rows as a (possibly short) chunk
+        if not self.rows:
+            return
+        n_values = len(self.manifest["headers"]) - 1
+        tod = np.array([str(row[0]) for row in self.rows], dtype="S8")
+        values = np.full((len(self.rows), n_values), np.nan)
+        ints = np.zeros(values.shape, dtype=bool)
+        for i, row in enumerate(self.rows):
+            cells = row[1:n_values+1]
+            values[i, :len(cells)] = [np.nan if v is None else v for v in cells]
+            ints[i, :len(cells)] = [isinstance(v, (int, np.integer)) for v in cells]
+        name = f"chunk_{len(self.manifest['chunks']):05d}"
+        np.save(os.path.join(self.directory, name + "_tod.npy"), tod)
+        np.save(os.path.join(self.directory, name + "_values.npy"), np.asfortranarray(values))
+        if ints.any():
+            np.save(os.path.join(self.directory, name + "_ints.npy"), np.packbits(ints, axis=None))
+        self.manifest["chunks"].append({"name": name, "rows": len(self.rows)})
+        write_manifest(self.directory, self.manifest)
+        tail = self._tail_path(len(self.manifest["chunks"]) - 1)
+        if os.path.isfile(tail):
+            os.remove(tail)
+        self.rows = []
+        self.synced = 0
+
+    def set_headers(self, headers):
+        self.manifest["headers"] = list(headers)
+        write_manifest(self.directory, self.manifest)
+
+    def close(self):
+        self.flush()
+
+
+def load(directory, columns=None):
+    """
+    Load a column store into a DataFrame. columns - optional list of header
+    names to load (memory mapped, so unused columns are never read).
+    """
+    manifest = read_manifest(directory)
+    headers = manifest["headers"]
+    if columns is None:
+        columns = headers
+    value_ix = [headers.index(name) - 1 for name in columns if name != headers[0]]
+    frames = []
+    for chunk in manifest["chunks"]:
+        values = np.load(os.path.join(directory, chunk["name"] + "_values.npy"), mmap_mode="r")
+        frame = pd.DataFrame(np.array(values[:, value_ix]),
+                             columns=[headers[i+1] for i in value_ix])
+        if headers[0] in columns:
+            tod = np.load(os.path.join(directory, chunk["name"] + "_tod.npy"))
+            frame.insert(0, headers[0], tod.astype(str))
+        frames.append(frame)
+    if not frames:
+        return pd.DataFrame(columns=columns)
+    return pd.concat(frames, ignore_index=True)
+
+def export_csv(directory, destination_file, headers=None):
+    """
+    Write the store in the same layout as file_utils.file_setup/write_data:
+    date row, header row, data rows with empty cells for open channels.
+    headers - optional header row (e.g. renamed channels from the sidecar)
+    """
+    manifest = read_manifest(directory)
+    with open(destination_file, mode='w', newline='') as file:
+        csvWriter = csv.writer(file, delimiter=',')
+        csvWriter.writerow([manifest["file_date"]])
+        csvWriter.writerow(headers or manifest["headers"])
+        for chunk in manifest["chunks"]:
+            tod = np.load(os.path.join(directory, chunk["name"] + "_tod.npy")).astype(str)
+            raw = np.load(os.path.join(directory, chunk["name"] + "_values.npy"))
+            values = raw.astype(object)
+            ints_path = os.path.join(directory, chunk["name"] + "_ints.npy")
+            if os.path.isfile(ints_path):
+                ints = np.unpackbits(np.load(ints_path), count=raw.size).reshape(raw.shape).astype(bool)
+                values[ints] = raw[ints].astype(np.int64).astype(object)
+            values[np.isnan(raw)] = None
+            csvWriter.writerows([t] + row for t, row in zip(tod, values.tolist()))
+
+def parse_cell(value):
+    # Keep integer cells as int so the export reproduces them unchanged
+    if value == "":
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        return float(value)
+
+def convert_csv(source_file, directory=None, chunk_rows=CHUNK_ROWS):
+    # Build a column store from an existing test file (all segments)
+    import core.file_utils as fu
+    directory = directory or store_dir_name(source_file)
+    if os.path.isfile(os.path.join(directory, MANIFEST)):
+        # Appending would store every row a second time
+        raise FileExistsError(f"{directory} already exists; remove it to convert again")
+    with open(source_file, mode='r', newline='') as file:
+        rows = (row for row in csv.reader(file) if row)
+        file_date = next(rows)[0]
+    headers = fu.read_headers(source_file)
+    store = ColumnStore(directory, file_date, headers, chunk_rows)
+    for row in fu.iter_rows(source_file):
+        store.append([row[0]] + [parse_cell(value) for value in row[1:]])
+    store.close()
+    return store.directory
+
+
+if __name__ == "__main__":
+    if len(sys.argv) >= 3 and sys.argv[1] == "convert":
+        try:
+            print(convert_csv(sys.argv[2], *sys.argv[3:4]))
+        except FileExistsError as e:
+            print(e)
+    elif len(sys.argv) == 4 and sys.argv[1] == "export":
+        export_csv(sys.argv[2], sys.argv[3])
+    else:
+        print(__doc__)